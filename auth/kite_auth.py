@@ -1,16 +1,26 @@
 import json
 import os
 from datetime import datetime
-from kiteconnect import KiteConnect
+from typing import Optional
 from config.settings import Settings
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
 class KiteAuth:
-    """Handles Kite Connect authentication - FIXED VERSION"""
+    """
+    Handles Kite Connect authentication - FIXED VERSION
+
+    kiteconnect (and the Twisted reactor its ticker pulls in) is imported
+    only when a session is actually built, not when this module loads.
+    broker='sim' (default: Settings.BROKER) hands out the offline
+    KiteSimulator instead, without touching the token file.
+    """
     
-    def __init__(self):
+    def __init__(self, broker: Optional[str] = None):
+        self.broker = broker or Settings.BROKER
+        if self.broker not in ('kite', 'sim'):
+            raise ValueError(f"Unknown broker: {self.broker}")
         self.api_key = Settings.KITE_API_KEY
         self.api_secret = Settings.KITE_API_SECRET
         self.token_file = Settings.TOKEN_FILE
@@ -29,6 +39,7 @@ class KiteAuth:
     def create_session(self, request_token: str) -> bool:
         """Create session using request token"""
         try:
+            from kiteconnect import KiteConnect
             kite = KiteConnect(api_key=self.api_key)
             data = kite.generate_session(request_token, api_secret=self.api_secret)
             
@@ -51,11 +62,21 @@ class KiteAuth:
             logger.error(f"❌ Failed to create session: {e}")
             return False
     
-    def get_kite_instance(self) -> KiteConnect:
+    def get_kite_instance(self) -> Optional['KiteConnect']:
         """Get authenticated Kite instance"""
         if self.kite:
             return self.kite
         
+        if self.broker == 'sim':
+            try:
+                from trading.kite_simulator import KiteSimulator
+                self.kite = KiteSimulator.from_settings()
+                logger.info("🧪 Using offline Kite simulator (--broker sim)")
+                return self.kite
+            except Exception as e:
+                logger.error(f"❌ Failed to start Kite simulator: {e}")
+                return None
+        
         try:
             if not self.token_file.exists():
                 logger.error("❌ No token file found. Please authenticate first.")
@@ -64,6 +85,7 @@ class KiteAuth:
             with open(self.token_file, 'r') as f:
                 tokens = json.load(f)
             
+            from kiteconnect import KiteConnect
             self.kite = KiteConnect(api_key=self.api_key)
             self.kite.set_access_token(tokens['access_token'])
             
@@ -94,6 +116,10 @@ class KiteAuth:
     
     def invalidate_token(self):
         """Invalidate current token"""
+        if self.broker == 'sim':
+            self.kite = None
+            return
+        
         if self.kite:
             try:
                 self.kite.invalidate_access_token()
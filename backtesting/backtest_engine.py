@@ -6,20 +6,28 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Any, Tuple
 import json
 from dataclasses import dataclass
+from backtesting.cost_model import TransactionCostModel
+from backtesting.instrument_data import DualInstrumentData
+from config.enhanced_settings import EXIT_ATR_MULTIPLES
+from trading.bars import Bars
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Bump whenever a change to the engine alters backtest output, so cached
+# results from older engine logic are never served.
+ENGINE_VERSION = "1.2.2"
+
 @dataclass
 class Trade:
     """Single trade record"""
     entry_time: datetime
     exit_time: datetime
     direction: str  # 'BUY' or 'SELL'
-    entry_price: float
-    exit_price: float
+    entry_price: float  # fill price, after slippage
+    exit_price: float   # fill price, after slippage
     quantity: int
-    pnl: float
+    pnl: float          # net of slippage and charges
     pnl_percent: float
     stop_loss: float
     take_profit: float
@@ -27,6 +35,8 @@ class Trade:
     confidence: float
     atr: float
     duration_minutes: int
+    gross_pnl: float = 0.0  # at bar prices, before any costs
+    costs: float = 0.0      # slippage + charges for both legs
 
 @dataclass
 class BacktestResults:
@@ -51,15 +61,20 @@ class BacktestResults:
     max_consecutive_losses: int
     avg_trade_duration: float
     trades: List[Trade]
+    total_costs: float = 0.0
 
 class BacktestEngine:
     """Enhanced backtesting engine for multi-indicator strategy"""
     
-    def __init__(self, strategy, position_sizer, risk_manager, config):
+    def __init__(self, strategy, position_sizer, risk_manager, config, cost_model=None):
         self.strategy = strategy
         self.position_sizer = position_sizer
         self.risk_manager = risk_manager
         self.config = config
+        self.trading_symbol = config.get('trading_symbol', 'NIFTYBEES')
+        
+        # Slippage and charges per fill (None = frictionless fills at the bar close)
+        self.cost_model = cost_model if cost_model is not None else TransactionCostModel.from_config(config)
         
         # Backtest state
         self.current_capital = config.get('account_balance', 10000)
@@ -73,8 +88,26 @@ class BacktestEngine:
         logger.info(f"   Initial capital: ₹{self.initial_capital:,.2f}")
         logger.info(f"   Strategy: {config.get('profile', 'unknown')}")
     
-    def run_backtest(self, data: pd.DataFrame, start_date: str = None, end_date: str = None) -> BacktestResults:
-        """Run complete backtest on historical data"""
+    def run_backtest(self, data: pd.DataFrame, start_date: str = None, end_date: str = None,
+                     cache=None) -> BacktestResults:
+        """Run complete backtest on historical data
+        
+        If a BacktestResultCache is given, identical runs (same data, config
+        and engine version) are served from disk instead of being recomputed.
+        """
+        
+        cache_key = None
+        if cache is not None:
+            cache_config = dict(self.config, cost_model=self.cost_model.describe() if self.cost_model else None)
+            cache_key = cache.make_key(data, cache_config, start_date, end_date)
+            cached = cache.get(cache_key)
+            if cached is not None:
+                results, self.equity_curve = cached
+                self.trades = list(results.trades)
+                self.positions = []
+                self.current_capital = results.final_capital
+                logger.info("✅ Backtest loaded from cache")
+                return results
         
         logger.info("🚀 Starting backtest...")
         
@@ -90,6 +123,12 @@ class BacktestEngine:
         logger.info(f"📊 Backtesting period: {data.index[0]} to {data.index[-1]}")
         logger.info(f"📈 Data points: {len(data)} candles")
         
+        # Signals come from the signal instrument; fills, sizing and P&L use the traded one
+        market = DualInstrumentData.from_frame(data, self.trading_symbol)
+        signal_bars = Bars.from_frame(data)
+        trading_close = market.trading.close
+        trading_volume = market.trading.volume
+        
         # Reset state
         self.current_capital = self.initial_capital
         self.positions = []
@@ -99,9 +138,10 @@ class BacktestEngine:
         
         # Main backtest loop
         for i in range(50, len(data)):  # Start after warmup period
-            current_time = data.index[i]
-            current_data = data.iloc[:i+1]  # Data up to current point
-            current_price = data.iloc[i]['close']
+            current_time = market.index[i]
+            current_data = signal_bars[:i+1]  # Signal data up to current point (a view, not a copy)
+            current_price = trading_close[i]
+            current_volume = trading_volume[i]
             
             # Record equity curve
             portfolio_value = self.calculate_portfolio_value(current_price)
@@ -113,14 +153,14 @@ class BacktestEngine:
             })
             
             # Check for exit conditions first
-            self.check_exit_conditions(current_time, current_price, current_data)
+            self.check_exit_conditions(current_time, current_price, current_data, current_volume)
             
             # Generate trading signal
             if len(self.positions) == 0:  # Only enter new positions if no current position
                 signal, signal_data = self.strategy.get_signal(current_data)
                 
                 if signal in ['BUY', 'SELL']:
-                    self.process_entry_signal(signal, signal_data, current_time, current_price)
+                    self.process_entry_signal(signal, signal_data, current_time, current_price, current_volume)
             
             # Log progress periodically
             if i % 1000 == 0:
@@ -128,9 +168,7 @@ class BacktestEngine:
         
         # Close any remaining positions
         if self.positions:
-            final_price = data.iloc[-1]['close']
-            final_time = data.index[-1]
-            self.close_position(final_time, final_price, "End of backtest")
+            self.close_position(market.index[-1], trading_close[-1], "End of backtest", trading_volume[-1])
         
         # Calculate results
         results = self.calculate_results(data.index[0], data.index[-1])
@@ -140,25 +178,34 @@ class BacktestEngine:
         logger.info(f"🎯 Win rate: {results.win_rate:.1%}")
         logger.info(f"💰 Total return: {results.total_return_percent:.1%}")
         logger.info(f"📉 Max drawdown: {results.max_drawdown_percent:.1%}")
+        if self.cost_model:
+            logger.info(f"💸 Transaction costs: ₹{results.total_costs:,.2f}")
+        
+        if cache is not None:
+            cache.put(cache_key, results, self.equity_curve)
         
         return results
     
-    def process_entry_signal(self, signal: str, signal_data: Dict, timestamp: datetime, price: float):
+    def process_entry_signal(self, signal: str, signal_data: Dict, timestamp: datetime, price: float,
+                             volume: float = 0.0):
         """Process entry signal and create position"""
         
-        # Calculate position size
-        atr_value = signal_data.get('indicators', {}).get('atr', price * 0.02)
+        # Calculate position size (the sizer scales signal-instrument ATR to the traded instrument)
+        signal_atr = signal_data.get('indicators', {}).get('atr', price * 0.02)
         confidence = signal_data.get('confidence', 0.5)
         
         sizing = self.position_sizer.calculate_position_size(
             account_balance=self.current_capital,
             current_price=price,
-            atr_value=atr_value,
-            signal_confidence=confidence
+            atr_value=signal_atr,
+            signal_confidence=confidence,
+            symbol=self.trading_symbol
         )
+        atr_value = sizing['scaled_atr']
         
-        # Risk assessment
-        stop_loss_price = price - (atr_value * 2) if signal == 'BUY' else price + (atr_value * 2)
+        # Risk assessment (same exit levels as the live bot)
+        stop_distance = atr_value * EXIT_ATR_MULTIPLES['stop_loss']
+        stop_loss_price = price - stop_distance if signal == 'BUY' else price + stop_distance
         
         risk_assessment = self.risk_manager.assess_trade_risk(
             entry_price=price,
@@ -176,33 +223,43 @@ class BacktestEngine:
         if risk_assessment['recommendation'] == 'REDUCE_SIZE':
             quantity = risk_assessment['suggested_quantity']
         
+        # Market entry fills through the spread/impact and pays entry-side charges
+        entry_fill, entry_charges = price, 0.0
+        if self.cost_model:
+            is_buy = signal == 'BUY'
+            entry_fill = self.cost_model.fill_price(is_buy, price, quantity, atr_value, volume)
+            entry_charges = self.cost_model.order_charges(is_buy, entry_fill * quantity)
+        
         # Calculate margin required
         leverage = sizing.get('leverage_used', 5.0)
-        margin_required = quantity * price / leverage
+        margin_required = quantity * entry_fill / leverage
         
         # Check if we have enough capital
-        if margin_required > self.current_capital * 0.9:  # Keep 10% buffer
+        if margin_required + entry_charges > self.current_capital * 0.9:  # Keep 10% buffer
             return
         
         # Create position
         position = {
             'entry_time': timestamp,
             'direction': signal,
-            'entry_price': price,
+            'entry_price': entry_fill,
+            'quoted_entry_price': price,
+            'entry_charges': entry_charges,
             'quantity': quantity if signal == 'BUY' else -quantity,
             'stop_loss': stop_loss_price,
-            'take_profit': price + (atr_value * 4) if signal == 'BUY' else price - (atr_value * 4),
+            'take_profit': (price + atr_value * EXIT_ATR_MULTIPLES['take_profit'] if signal == 'BUY'
+                            else price - atr_value * EXIT_ATR_MULTIPLES['take_profit']),
             'confidence': confidence,
             'atr': atr_value,
             'margin_used': margin_required
         }
         
         self.positions.append(position)
-        self.current_capital -= margin_required
+        self.current_capital -= margin_required + entry_charges
         
         logger.debug(f"📈 {signal} position opened at ₹{price:.2f}, quantity: {abs(quantity)}")
     
-    def check_exit_conditions(self, timestamp: datetime, price: float, data: pd.DataFrame):
+    def check_exit_conditions(self, timestamp: datetime, price: float, data: Bars, volume: float = 0.0):
         """Check and process exit conditions"""
         
         if not self.positions:
@@ -243,27 +300,34 @@ class BacktestEngine:
             exit_reason = "Time Limit"
         
         if should_exit:
-            self.close_position(timestamp, price, exit_reason)
+            self.close_position(timestamp, price, exit_reason, volume)
     
-    def close_position(self, timestamp: datetime, price: float, reason: str):
+    def close_position(self, timestamp: datetime, price: float, reason: str, volume: float = 0.0):
         """Close current position and record trade"""
         
         if not self.positions:
             return
         
         position = self.positions.pop(0)
+        quantity = abs(position['quantity'])
+        direction = 1 if position['quantity'] > 0 else -1
+        
+        # Market exit fills through the spread/impact and pays exit-side charges
+        exit_fill, exit_charges = price, 0.0
+        if self.cost_model:
+            is_buy = direction < 0
+            exit_fill = self.cost_model.fill_price(is_buy, price, quantity, position['atr'], volume)
+            exit_charges = self.cost_model.order_charges(is_buy, exit_fill * quantity)
         
         # Calculate P&L
-        quantity = abs(position['quantity'])
-        if position['quantity'] > 0:  # Long position
-            pnl = (price - position['entry_price']) * quantity
-        else:  # Short position
-            pnl = (position['entry_price'] - price) * quantity
+        gross_pnl = (price - position.get('quoted_entry_price', position['entry_price'])) * quantity * direction
+        fill_pnl = (exit_fill - position['entry_price']) * quantity * direction
+        pnl = fill_pnl - position.get('entry_charges', 0.0) - exit_charges
         
         pnl_percent = pnl / (position['entry_price'] * quantity) * 100
         
-        # Return margin to capital
-        self.current_capital += position['margin_used'] + pnl
+        # Return margin to capital (entry charges were paid at entry)
+        self.current_capital += position['margin_used'] + fill_pnl - exit_charges
         
         # Create trade record
         trade = Trade(
@@ -271,7 +335,7 @@ class BacktestEngine:
             exit_time=timestamp,
             direction=position['direction'],
             entry_price=position['entry_price'],
-            exit_price=price,
+            exit_price=exit_fill,
             quantity=quantity,
             pnl=pnl,
             pnl_percent=pnl_percent,
@@ -280,7 +344,9 @@ class BacktestEngine:
             exit_reason=reason,
             confidence=position['confidence'],
             atr=position['atr'],
-            duration_minutes=int((timestamp - position['entry_time']).total_seconds() / 60)
+            duration_minutes=int((timestamp - position['entry_time']).total_seconds() / 60),
+            gross_pnl=gross_pnl,
+            costs=gross_pnl - pnl
         )
         
         self.trades.append(trade)
@@ -413,7 +479,8 @@ class BacktestEngine:
             max_consecutive_wins=max_consecutive_wins,
             max_consecutive_losses=max_consecutive_losses,
             avg_trade_duration=avg_duration,
-            trades=self.trades
+            trades=self.trades,
+            total_costs=sum(t.costs for t in self.trades)
         )
     
     def save_results(self, results: BacktestResults, filename: str):
@@ -440,7 +507,8 @@ class BacktestEngine:
                 'sharpe_ratio': results.sharpe_ratio,
                 'max_consecutive_wins': results.max_consecutive_wins,
                 'max_consecutive_losses': results.max_consecutive_losses,
-                'avg_trade_duration': results.avg_trade_duration
+                'avg_trade_duration': results.avg_trade_duration,
+                'total_costs': results.total_costs
             },
             'trades': [
                 {
@@ -452,6 +520,8 @@ class BacktestEngine:
                     'quantity': trade.quantity,
                     'pnl': trade.pnl,
                     'pnl_percent': trade.pnl_percent,
+                    'gross_pnl': trade.gross_pnl,
+                    'costs': trade.costs,
                     'exit_reason': trade.exit_reason,
                     'confidence': trade.confidence,
                     'duration_minutes': trade.duration_minutes
@@ -490,6 +560,7 @@ Average Win: ₹{results.avg_win:.2f}
 Average Loss: ₹{results.avg_loss:.2f}
 Profit Factor: {results.profit_factor:.2f}
 Sharpe Ratio: {results.sharpe_ratio:.2f}
+Transaction Costs: ₹{results.total_costs:,.2f} (slippage + charges, already in P&L)
 
 🔥 STREAKS
 {'='*25}
@@ -0,0 +1,144 @@
+# backtesting/cost_model.py
+
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, Optional
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Zerodha equity intraday (MIS) charges, as fractions of turnover
+ZERODHA_MIS_CHARGES = {
+    'brokerage_rate': 0.0003,         # 0.03% per executed order...
+    'brokerage_cap': 20.0,            # ...capped at ₹20
+    'stt_sell_rate': 0.00025,         # STT 0.025% on the sell side
+    'exchange_txn_rate': 0.0000297,   # NSE transaction charge 0.00297%
+    'sebi_rate': 10 / 1e7,            # SEBI fee ₹10 per crore
+    'gst_rate': 0.18,                 # GST on brokerage + exchange + SEBI charges
+    'stamp_buy_rate': 0.00003,        # Stamp duty 0.003% on the buy side
+}
+
+class TransactionCostModel:
+    """
+    Statutory charges plus slippage for simulated fills
+
+    Every method accepts scalars or numpy arrays, so the same model prices a
+    single fill inside the engine and a whole trade ledger in one pass.
+
+    Slippage per share = price * slippage_bps / 10,000
+                       + atr * slippage_atr_factor
+                       + price * slippage_volume_factor * (quantity / bar volume)
+    """
+
+    def __init__(self, charges: Optional[Dict[str, float]] = None, slippage_bps: float = 1.0,
+                 slippage_atr_factor: float = 0.02, slippage_volume_factor: float = 0.1):
+        self.charges = {**ZERODHA_MIS_CHARGES, **(charges or {})}
+        self.slippage_bps = slippage_bps
+        self.slippage_atr_factor = slippage_atr_factor
+        self.slippage_volume_factor = slippage_volume_factor
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> Optional['TransactionCostModel']:
+        """Cost model for a strategy profile, or None when 'transaction_costs' is off"""
+        if not config.get('transaction_costs', True):
+            return None
+        return cls(
+            charges=config.get('cost_charges'),
+            slippage_bps=config.get('slippage_bps', 1.0),
+            slippage_atr_factor=config.get('slippage_atr_factor', 0.02),
+            slippage_volume_factor=config.get('slippage_volume_factor', 0.1)
+        )
+
+    def describe(self) -> Dict[str, Any]:
+        """Parameters that determine the model's output (used in cache keys)"""
+        return {
+            'charges': self.charges,
+            'slippage_bps': self.slippage_bps,
+            'slippage_atr_factor': self.slippage_atr_factor,
+            'slippage_volume_factor': self.slippage_volume_factor
+        }
+
+    # ------------------------------------------------------------------
+    # Slippage
+    # ------------------------------------------------------------------
+
+    def slippage(self, price, quantity, atr=0.0, volume=0.0):
+        """Adverse price move per share for a market fill"""
+        price = np.asarray(price, dtype=float)
+        quantity = np.abs(np.asarray(quantity, dtype=float))
+        volume = np.asarray(volume, dtype=float)
+
+        participation = np.divide(quantity, volume, out=np.zeros(np.broadcast(quantity, volume).shape),
+                                  where=volume > 0)
+        slip = (price * self.slippage_bps / 10_000
+                + np.asarray(atr, dtype=float) * self.slippage_atr_factor
+                + price * self.slippage_volume_factor * participation)
+        return slip if slip.ndim else float(slip)
+
+    def fill_price(self, is_buy, price, quantity, atr=0.0, volume=0.0):
+        """Price actually paid (buy) or received (sell) after slippage"""
+        slip = self.slippage(price, quantity, atr, volume)
+        fill = np.where(is_buy, np.asarray(price, dtype=float) + slip, np.asarray(price, dtype=float) - slip)
+        return fill if fill.ndim else float(fill)
+
+    # ------------------------------------------------------------------
+    # Charges
+    # ------------------------------------------------------------------
+
+    def order_charges(self, is_buy, turnover):
+        """Brokerage, STT, exchange, SEBI, GST and stamp duty for one executed order"""
+        c = self.charges
+        is_buy = np.asarray(is_buy, dtype=bool)
+        turnover = np.abs(np.asarray(turnover, dtype=float))
+
+        brokerage = np.minimum(turnover * c['brokerage_rate'], c['brokerage_cap'])
+        stt = np.where(is_buy, 0.0, turnover * c['stt_sell_rate'])
+        exchange = turnover * c['exchange_txn_rate']
+        sebi = turnover * c['sebi_rate']
+        gst = (brokerage + exchange + sebi) * c['gst_rate']
+        stamp = np.where(is_buy, turnover * c['stamp_buy_rate'], 0.0)
+
+        total = brokerage + stt + exchange + sebi + gst + stamp
+        return total if total.ndim else float(total)
+
+    # ------------------------------------------------------------------
+    # Ledger
+    # ------------------------------------------------------------------
+
+    def apply_to_ledger(self, ledger: pd.DataFrame, include_slippage: bool = True) -> pd.DataFrame:
+        """
+        Re-price a gross trade ledger net of costs in one vectorized pass
+
+        Needs entry_price, exit_price, quantity and direction ('BUY'/'SELL'
+        or 'LONG'/'SHORT'); atr, entry_volume and exit_volume are used for
+        slippage when present. Returns a copy with entry_fill, exit_fill,
+        gross_pnl, slippage_cost, charges and net_pnl columns.
+        """
+        out = ledger.copy()
+        quantity = out['quantity'].abs().to_numpy(dtype=float)
+        is_long = out['direction'].isin(['BUY', 'LONG']).to_numpy()
+        entry = out['entry_price'].to_numpy(dtype=float)
+        exit_ = out['exit_price'].to_numpy(dtype=float)
+
+        if include_slippage:
+            atr = out['atr'].to_numpy(dtype=float) if 'atr' in out else 0.0
+            entry_volume = out['entry_volume'].to_numpy(dtype=float) if 'entry_volume' in out else 0.0
+            exit_volume = out['exit_volume'].to_numpy(dtype=float) if 'exit_volume' in out else 0.0
+            entry_fill = self.fill_price(is_long, entry, quantity, atr, entry_volume)
+            exit_fill = self.fill_price(~is_long, exit_, quantity, atr, exit_volume)
+        else:
+            entry_fill, exit_fill = entry, exit_
+
+        direction = np.where(is_long, 1.0, -1.0)
+        gross_pnl = (exit_ - entry) * quantity * direction
+        filled_pnl = (exit_fill - entry_fill) * quantity * direction
+        charges = (self.order_charges(is_long, entry_fill * quantity)
+                   + self.order_charges(~is_long, exit_fill * quantity))
+
+        out['entry_fill'] = entry_fill
+        out['exit_fill'] = exit_fill
+        out['gross_pnl'] = gross_pnl
+        out['slippage_cost'] = gross_pnl - filled_pnl
+        out['charges'] = charges
+        out['net_pnl'] = filled_pnl - charges
+        return out
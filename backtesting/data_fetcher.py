@@ -4,23 +4,37 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 from typing import Optional
-from auth.kite_auth import KiteAuth
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
 class HistoricalDataFetcher:
-    """Fetch and prepare historical data for backtesting"""
+    """
+    Fetch and prepare historical data for backtesting
+
+    The Kite session is opened on the first real fetch, so sample-data runs
+    never log in or touch the network.
+    """
     
     def __init__(self):
-        self.auth = KiteAuth()
-        self.kite = None
-        self.setup_connection()
+        self.auth = None
+        self._kite = None
+        self._connected = False
+    
+    @property
+    def kite(self):
+        if not self._connected:
+            self.setup_connection()
+        return self._kite
     
     def setup_connection(self):
         """Setup Kite connection"""
-        self.kite = self.auth.get_kite_instance()
-        if not self.kite:
+        from auth.kite_auth import KiteAuth
+        
+        self._connected = True
+        self.auth = KiteAuth()
+        self._kite = self.auth.get_kite_instance()
+        if not self._kite:
             logger.error("❌ Failed to setup Kite connection for data fetching")
     
     def fetch_historical_data(self, 
@@ -233,17 +247,22 @@ class HistoricalDataFetcher:
         return df
     
     def save_data(self, df: pd.DataFrame, filename: str):
-        """Save data to CSV file"""
+        """Save data as a memory-mapped dataset directory, or CSV for a .csv filename"""
         try:
-            df.to_csv(filename)
+            if filename.lower().endswith('.csv'):
+                df.to_csv(filename)
+            else:
+                from backtesting.dataset import write_dataset
+                write_dataset(df, filename)
             logger.info(f"💾 Data saved to {filename}")
         except Exception as e:
             logger.error(f"❌ Failed to save data: {e}")
     
     def load_data(self, filename: str) -> pd.DataFrame:
-        """Load data from CSV file"""
+        """Load data from a dataset directory (memory-mapped) or CSV file"""
         try:
-            df = pd.read_csv(filename, index_col=0, parse_dates=True)
+            from backtesting.dataset import load_frame
+            df = load_frame(filename)
             logger.info(f"📂 Data loaded from {filename}: {len(df)} records")
             return df
         except Exception as e:
@@ -0,0 +1,140 @@
+# backtesting/dataset.py
+
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Union
+
+import numpy as np
+import pandas as pd
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+DATASET_VERSION = 1
+MANIFEST = 'manifest.json'
+INDEX_FILE = 'timestamp.npy'
+
+# Every column is stored in one fixed dtype; timestamps are UTC epoch nanoseconds
+INDEX_DTYPE = np.dtype('<i8')
+COLUMN_DTYPE = np.dtype('<f8')
+
+
+def is_dataset(path: Union[str, Path]) -> bool:
+    return (Path(path) / MANIFEST).is_file()
+
+
+def write_dataset(data: pd.DataFrame, path: Union[str, Path]) -> Path:
+    """
+    Save a candle frame as a dataset directory
+
+    One .npy file per column (float64) plus timestamp.npy (int64 UTC
+    nanoseconds) and manifest.json, which records the column order, the
+    index timezone and name, and the row count. The directory is built
+    beside path and renamed into place, so readers never see half a dataset.
+    """
+    path = Path(path)
+    if path.exists() and not is_dataset(path):
+        raise ValueError(f"{path} exists and is not a dataset - not overwriting it")
+    if not len(data.columns):
+        raise ValueError("Cannot write a dataset without columns")
+    non_numeric = [str(c) for c in data.columns if not pd.api.types.is_numeric_dtype(data[c])]
+    if non_numeric:
+        raise ValueError(f"Dataset columns must be numeric: {non_numeric}")
+
+    index = pd.DatetimeIndex(data.index)
+    tz = str(index.tz) if index.tz is not None else None
+    stamps = (index.tz_convert('UTC') if tz else index).as_unit('ns').asi8
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    staging = Path(tempfile.mkdtemp(prefix=f".{path.name}.", dir=path.parent))
+    try:
+        np.save(staging / INDEX_FILE, stamps.astype(INDEX_DTYPE))
+        columns = []
+        for i, column in enumerate(data.columns):
+            filename = f"{column}.npy" if str(column).isidentifier() else f"column_{i}.npy"
+            np.save(staging / filename, data[column].to_numpy(dtype=COLUMN_DTYPE))
+            columns.append({'name': str(column), 'file': filename})
+
+        manifest = {
+            'version': DATASET_VERSION,
+            'rows': len(data),
+            'index': {'file': INDEX_FILE, 'dtype': INDEX_DTYPE.str, 'unit': 'ns', 'tz': tz,
+                      'name': data.index.name},
+            'column_dtype': COLUMN_DTYPE.str,
+            'columns': columns,
+            'start': str(data.index[0]) if len(data) else None,
+            'end': str(data.index[-1]) if len(data) else None
+        }
+        with open(staging / MANIFEST, 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+        if path.exists():
+            shutil.rmtree(path)
+        os.replace(staging, path)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    logger.info(f"💾 Dataset saved to {path}: {len(data)} rows x {len(columns)} columns")
+    return path
+
+
+def read_manifest(path: Union[str, Path]) -> Dict[str, Any]:
+    path = Path(path)
+    try:
+        with open(path / MANIFEST, 'r') as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        raise ValueError(f"{path} is not a dataset (no {MANIFEST})") from None
+    if manifest.get('version') != DATASET_VERSION:
+        raise ValueError(f"{path}: dataset version {manifest.get('version')} is not supported "
+                         f"(expected {DATASET_VERSION})")
+    return manifest
+
+
+def _map(path: Path, filename: str, dtype: np.dtype, rows: int) -> np.memmap:
+    values = np.load(path / filename, mmap_mode='r')
+    if values.dtype != dtype or values.shape != (rows,):
+        raise ValueError(f"{path / filename}: expected {rows} x {dtype}, found {values.shape} x {values.dtype}")
+    return values
+
+
+def open_dataset(path: Union[str, Path]) -> pd.DataFrame:
+    """
+    Open a dataset as a read-only DataFrame over memory-mapped columns
+
+    Nothing is parsed or copied: the frame's columns and index are views
+    of the mapped files, so opening costs the same at any size, and every
+    process opening the dataset shares one page-cache copy.
+    """
+    path = Path(path)
+    manifest = read_manifest(path)
+    rows = manifest['rows']
+    index_spec = manifest['index']
+
+    stamps = _map(path, index_spec['file'], INDEX_DTYPE, rows)
+    if index_spec['tz']:
+        # int64 with a tz dtype is read as UTC epoch ns without a copy
+        index = pd.DatetimeIndex(np.asarray(stamps), dtype='datetime64[ns, UTC]', name=index_spec['name'], copy=False)
+        index = index.tz_convert(index_spec['tz'])
+    else:
+        index = pd.DatetimeIndex(np.asarray(stamps).view('M8[ns]'), name=index_spec['name'], copy=False)
+
+    column_dtype = np.dtype(manifest['column_dtype'])
+    columns = {spec['name']: np.asarray(_map(path, spec['file'], column_dtype, rows))
+               for spec in manifest['columns']}
+    return pd.DataFrame(columns, index=index, copy=False)
+
+
+def load_frame(path: Union[str, Path]) -> pd.DataFrame:
+    """A dataset directory (memory-mapped) or, for older files, a CSV"""
+    if is_dataset(path):
+        return open_dataset(path)
+    if Path(path).is_dir():
+        raise ValueError(f"{path} is a directory but not a dataset (no {MANIFEST})")
+    logger.info(f"💡 Parsing CSV {path}; `data convert` turns it into a dataset that opens instantly")
+    return pd.read_csv(path, index_col=0, parse_dates=True)
@@ -0,0 +1,76 @@
+# backtesting/instrument_data.py
+
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+OHLCV = ('open', 'high', 'low', 'close', 'volume')
+
+@dataclass(frozen=True)
+class InstrumentArrays:
+    """OHLCV columns of one instrument as contiguous float64 arrays"""
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+
+    @classmethod
+    def from_columns(cls, df: pd.DataFrame, columns) -> 'InstrumentArrays':
+        return cls(*(np.ascontiguousarray(df[col].to_numpy(dtype=np.float64)) for col in columns))
+
+    @classmethod
+    def from_price(cls, price: np.ndarray, volume: np.ndarray) -> 'InstrumentArrays':
+        """Close-only series (e.g. a bare trading_price column): OHLC all equal the close"""
+        return cls(price, price, price, price, volume)
+
+@dataclass(frozen=True)
+class DualInstrumentData:
+    """
+    Signal instrument (e.g. NIFTY 50) and traded instrument (e.g. NIFTYBEES) on one time axis
+
+    Indicators are computed on the signal columns; sizing, ATR scaling and
+    fills use the traded columns, matching the live bot. Built from the frame
+    produced by HistoricalDataFetcher.prepare_backtest_data (signal OHLCV +
+    *_trading columns + trading_price) or generate_sample_data (signal
+    OHLCV + trading_price).
+    """
+    index: pd.DatetimeIndex
+    signal: InstrumentArrays
+    trading: InstrumentArrays
+    trading_symbol: str
+    has_trading_prices: bool
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, trading_symbol: str = 'NIFTYBEES') -> 'DualInstrumentData':
+        signal = InstrumentArrays.from_columns(df, OHLCV)
+
+        trading_columns = tuple(f"{col}_trading" for col in OHLCV)
+        if all(col in df.columns for col in trading_columns):
+            trading = InstrumentArrays.from_columns(df, trading_columns)
+            has_trading_prices = True
+        elif 'trading_price' in df.columns:
+            price = np.ascontiguousarray(df['trading_price'].to_numpy(dtype=np.float64))
+            volume = (df['volume_trading'].to_numpy(dtype=np.float64) if 'volume_trading' in df.columns
+                      else np.zeros(len(df)))
+            trading = InstrumentArrays.from_price(price, volume)
+            has_trading_prices = True
+        else:
+            # Single-instrument data: trade the signal instrument itself
+            logger.warning("⚠️ No trading_price column - fills will use the signal instrument's close")
+            trading = signal
+            has_trading_prices = False
+
+        return cls(
+            index=pd.DatetimeIndex(df.index),
+            signal=signal,
+            trading=trading,
+            trading_symbol=trading_symbol,
+            has_trading_prices=has_trading_prices
+        )
@@ -0,0 +1,367 @@
+# backtesting/job_queue.py
+
+import json
+import os
+import pickle
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Tuple
+
+import pandas as pd
+
+from backtesting.dataset import is_dataset, open_dataset, write_dataset
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sweeps (
+    id TEXT PRIMARY KEY,
+    created REAL NOT NULL,
+    base_config TEXT NOT NULL,
+    data_path TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS trials (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    sweep TEXT NOT NULL REFERENCES sweeps(id),
+    params TEXT NOT NULL,
+    budget REAL NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    lease_expires REAL,
+    score REAL,
+    rows INTEGER,
+    result BLOB,
+    error TEXT,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS trials_by_status ON trials(status, id);
+CREATE INDEX IF NOT EXISTS trials_by_sweep ON trials(sweep, status);
+"""
+
+# Trial lifecycle: pending -> leased -> done, or back to pending on failure or
+# an expired lease until max_attempts is used up, then failed
+FINISHED = ('done', 'failed')
+
+
+@dataclass
+class TrialJob:
+    """A leased trial, with what a worker needs to run it"""
+    id: int
+    sweep: str
+    params: Dict[str, Any]
+    budget: float
+    attempt: int
+    base_config: Dict[str, Any]
+    data_path: str
+
+
+class TrialQueue:
+    """
+    Durable optimization trial queue in a single SQLite file
+
+    The optimizer submits parameter sets; workers lease one trial at a time,
+    run it and write the scored result back. A lease expires after
+    lease_seconds unless the worker heartbeats, so a crashed worker's trial
+    goes back to pending and is retried, up to max_attempts. Candles live
+    beside the file as a memory-mapped dataset all workers share. Every state
+    change is one short transaction, so any number of worker processes can
+    share the file. Workers on other hosts need the file on a filesystem
+    with working locks, with wal=False (WAL needs shared memory on one host).
+    """
+
+    def __init__(self, path: str, lease_seconds: float = 300, max_attempts: int = 3, wal: bool = True):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.wal = wal
+        self._local = threading.local()  # one connection per thread (heartbeats run beside the trial)
+        self._sweeps: Dict[str, Tuple[Dict[str, Any], str]] = {}
+        self._db().executescript(SCHEMA)
+
+    @property
+    def data_dir(self) -> Path:
+        """Candle store shared by the queue's workers"""
+        return self.path.with_name(self.path.stem + '_data')
+
+    def _db(self) -> sqlite3.Connection:
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(str(self.path), timeout=60, isolation_level=None)
+            db.execute(f"PRAGMA journal_mode={'WAL' if self.wal else 'DELETE'}")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        db = self._db()
+        db.execute("BEGIN IMMEDIATE")  # take the write lock up front: no lease races
+        try:
+            yield db
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+    def close(self):
+        db = getattr(self._local, 'db', None)
+        if db is not None:
+            db.close()
+            self._local.db = None
+
+    # ------------------------------------------------------------------
+    # Producer side
+    # ------------------------------------------------------------------
+
+    def create_sweep(self, base_config: Mapping[str, Any], data_path: str) -> str:
+        """
+        Register a sweep; data_path is stored relative to the queue file when
+        it lives beside it, so workers find it whatever their working
+        directory (or mount point) is
+        """
+        data_path = Path(data_path).resolve()
+        try:
+            data_path = data_path.relative_to(self.path.resolve().parent)
+        except ValueError:
+            pass  # outside the queue directory - keep it absolute
+        sweep = uuid.uuid4().hex[:12]
+        with self._transaction() as db:
+            db.execute("INSERT INTO sweeps (id, created, base_config, data_path) VALUES (?, ?, ?, ?)",
+                       (sweep, time.time(), json.dumps(dict(base_config)), str(data_path)))
+        return sweep
+
+    def submit(self, sweep: str, param_sets: List[Dict[str, Any]], budget: float = 1.0) -> List[int]:
+        """Enqueue parameter sets; returns their trial ids in order"""
+        now = time.time()
+        with self._transaction() as db:
+            ids = [db.execute("INSERT INTO trials (sweep, params, budget, updated) VALUES (?, ?, ?, ?)",
+                              (sweep, json.dumps(params), budget, now)).lastrowid
+                   for params in param_sets]
+        return ids
+
+    def fetch(self, trial_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """Status, score, rows, unpickled result and error for each trial id"""
+        rows = {}
+        db = self._db()
+        for start in range(0, len(trial_ids), 500):
+            chunk = trial_ids[start:start + 500]
+            query = (f"SELECT id, status, attempts, score, rows, result, error FROM trials "
+                     f"WHERE id IN ({','.join('?' * len(chunk))})")
+            for trial_id, status, attempts, score, n_rows, blob, error in db.execute(query, chunk):
+                rows[trial_id] = {
+                    'status': status, 'attempts': attempts, 'score': score, 'rows': n_rows or 0,
+                    'result': pickle.loads(blob) if blob is not None else None, 'error': error
+                }
+        return rows
+
+    def counts(self, trial_ids: Optional[List[int]] = None, sweep: Optional[str] = None) -> Dict[str, int]:
+        """Trials per status, for a sweep or a set of trial ids"""
+        if trial_ids is not None:
+            # One submit() inserts under one write lock, so its ids are contiguous
+            query, args = ("SELECT status, COUNT(*) FROM trials WHERE id BETWEEN ? AND ? GROUP BY status",
+                           (min(trial_ids), max(trial_ids)))
+        elif sweep is not None:
+            query, args = "SELECT status, COUNT(*) FROM trials WHERE sweep = ? GROUP BY status", (sweep,)
+        else:
+            query, args = "SELECT status, COUNT(*) FROM trials GROUP BY status", ()
+        return dict(self._db().execute(query, args).fetchall())
+
+    # ------------------------------------------------------------------
+    # Worker side
+    # ------------------------------------------------------------------
+
+    def _reclaim_expired(self, db: sqlite3.Connection, now: float):
+        db.execute(
+            "UPDATE trials SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+            "worker = NULL, lease_expires = NULL, error = 'lease expired (worker lost)', updated = ? "
+            "WHERE status = 'leased' AND lease_expires < ?",
+            (self.max_attempts, now, now)
+        )
+
+    def lease(self, worker: str) -> Optional[TrialJob]:
+        """Claim the oldest pending trial (reclaiming expired leases first)"""
+        now = time.time()
+        with self._transaction() as db:
+            self._reclaim_expired(db, now)
+            row = db.execute("SELECT id, sweep, params, budget, attempts FROM trials "
+                             "WHERE status = 'pending' ORDER BY id LIMIT 1").fetchone()
+            if row is None:
+                return None
+            trial_id, sweep, params, budget, attempts = row
+            db.execute("UPDATE trials SET status = 'leased', worker = ?, attempts = attempts + 1, "
+                       "lease_expires = ?, updated = ? WHERE id = ?",
+                       (worker, now + self.lease_seconds, now, trial_id))
+
+        if sweep not in self._sweeps:
+            base_config, data_path = self._db().execute(
+                "SELECT base_config, data_path FROM sweeps WHERE id = ?", (sweep,)).fetchone()
+            # Relative paths are relative to the queue file (an absolute one is kept as is)
+            self._sweeps[sweep] = (json.loads(base_config), str(self.path.parent / data_path))
+        base_config, data_path = self._sweeps[sweep]
+        return TrialJob(trial_id, sweep, json.loads(params), budget, attempts + 1, base_config, data_path)
+
+    def heartbeat(self, job: TrialJob, worker: str) -> bool:
+        """Extend a lease; False when the lease was lost (expired and reclaimed)"""
+        now = time.time()
+        with self._transaction() as db:
+            updated = db.execute("UPDATE trials SET lease_expires = ?, updated = ? "
+                                 "WHERE id = ? AND worker = ? AND status = 'leased'",
+                                 (now + self.lease_seconds, now, job.id, worker)).rowcount
+        return updated == 1
+
+    def complete(self, job: TrialJob, worker: str, score: float, n_rows: int, result: Any):
+        """Store a trial's result; results are deterministic, so a late finisher still counts"""
+        blob = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._transaction() as db:
+            db.execute("UPDATE trials SET status = 'done', worker = ?, score = ?, rows = ?, result = ?, "
+                       "error = NULL, lease_expires = NULL, updated = ? WHERE id = ? AND status != 'done'",
+                       (worker, score, n_rows, blob, time.time(), job.id))
+
+    def fail(self, job: TrialJob, worker: str, error: str):
+        """Release a trial after an error: retried until max_attempts, then failed"""
+        with self._transaction() as db:
+            db.execute("UPDATE trials SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                       "worker = NULL, lease_expires = NULL, error = ?, updated = ? "
+                       "WHERE id = ? AND worker = ? AND status = 'leased'",
+                       (self.max_attempts, error[:2000], time.time(), job.id, worker))
+
+
+def store_candles(queue: TrialQueue, data: pd.DataFrame) -> Path:
+    """Write data to the queue's candle store once, as a dataset (content-addressed); returns its path"""
+    from backtesting.result_cache import BacktestResultCache
+
+    path = queue.data_dir / f"candles_{BacktestResultCache.fingerprint_data(data)[:16]}"
+    if not is_dataset(path):
+        write_dataset(data, path)
+        logger.info(f"📦 Stored {len(data)} candles for workers at {path}")
+    return path
+
+
+# Memory-mapped candle frames a worker has opened, by path (sweeps usually share one)
+_candles: Dict[str, pd.DataFrame] = {}
+
+
+def _load_candles(path: str) -> pd.DataFrame:
+    if path not in _candles:
+        if len(_candles) >= 2:
+            _candles.pop(next(iter(_candles)))
+        _candles[path] = open_dataset(path)
+    return _candles[path]
+
+
+class QueueEvaluator:
+    """
+    StrategyOptimizer batch evaluator backed by a TrialQueue
+
+    Each batch is submitted as trials of one sweep and the call blocks until
+    workers have finished (or given up on) every one of them.
+    """
+
+    def __init__(self, queue: TrialQueue, data: pd.DataFrame, base_config: Mapping[str, Any],
+                 poll_interval: float = 1.0, idle_warning: float = 30.0):
+        self.queue = queue
+        self.sweep = queue.create_sweep(base_config, store_candles(queue, data))
+        self.poll_interval = poll_interval
+        self.idle_warning = idle_warning
+        logger.info(f"📮 Optimization sweep {self.sweep} on queue {queue.path}")
+
+    def __call__(self, param_sets: List[Dict[str, Any]], budget: float) -> List[Tuple[Any, int]]:
+        trial_ids = self.queue.submit(self.sweep, param_sets, budget)
+        logger.info(f"📮 Queued {len(trial_ids)} trials at {budget:.0%} of data")
+
+        started = last_change = time.monotonic()
+        last_counts, warned = None, False
+        while True:
+            counts = self.queue.counts(trial_ids)
+            finished = sum(counts.get(status, 0) for status in FINISHED)
+            if counts != last_counts:
+                logger.info(f"📊 Sweep {self.sweep}: {finished}/{len(trial_ids)} finished "
+                            f"({counts.get('leased', 0)} running, {counts.get('failed', 0)} failed)")
+                last_counts, last_change = counts, time.monotonic()
+            if finished == len(trial_ids):
+                break
+            if not warned and time.monotonic() - last_change > self.idle_warning:
+                logger.warning(f"⏳ No progress for {time.monotonic() - started:.0f}s - are workers running? "
+                               f"Start some with: python3 cli_enhanced.py optimize-worker --queue {self.queue.path}")
+                warned = True
+            time.sleep(self.poll_interval)
+
+        rows = self.queue.fetch(trial_ids)
+        for trial_id in trial_ids:
+            if rows[trial_id]['status'] == 'failed':
+                logger.warning(f"⚠️ Trial {trial_id} failed after {rows[trial_id]['attempts']} attempts: "
+                               f"{rows[trial_id]['error']}")
+        return [(rows[trial_id]['result'], rows[trial_id]['rows']) for trial_id in trial_ids]
+
+
+def worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def run_worker(queue_path: str, idle_timeout: Optional[float] = None, max_trials: Optional[int] = None,
+               poll_interval: float = 1.0, lease_seconds: float = 300, max_attempts: int = 3,
+               stop_event=None) -> int:
+    """
+    Pull and run trials until stopped, idle for idle_timeout, or max_trials done
+
+    Returns the number of trials this worker completed.
+    """
+    from backtesting.optimizer import run_trial, score_backtest_result
+    from config.registry import StrategyConfig
+
+    queue = TrialQueue(queue_path, lease_seconds=lease_seconds, max_attempts=max_attempts)
+    worker = worker_id()
+    completed, idle_since = 0, time.monotonic()
+    logger.info(f"👷 Worker {worker} serving {queue_path}")
+
+    try:
+        while not (stop_event is not None and stop_event.is_set()):
+            if max_trials is not None and completed >= max_trials:
+                break
+            job = queue.lease(worker)
+            if job is None:
+                if idle_timeout is not None and time.monotonic() - idle_since > idle_timeout:
+                    logger.info(f"💤 Worker {worker} idle for {idle_timeout:.0f}s, exiting")
+                    break
+                time.sleep(poll_interval)
+                continue
+
+            # Keep the lease alive while the backtest runs
+            done = threading.Event()
+
+            def beat():
+                while not done.wait(queue.lease_seconds / 3):
+                    if not queue.heartbeat(job, worker):
+                        logger.warning(f"⚠️ Lost the lease on trial {job.id}")
+                        break
+                queue.close()
+
+            heart = threading.Thread(target=beat, name=f"lease-{job.id}", daemon=True)
+            heart.start()
+            try:
+                config = StrategyConfig(job.base_config).replace(**job.params)
+                result, n_rows = run_trial(_load_candles(job.data_path), config, job.budget)
+                queue.complete(job, worker, score_backtest_result(result), n_rows, result)
+                completed += 1
+                logger.info(f"✅ Trial {job.id} (sweep {job.sweep}, attempt {job.attempt}) done")
+            except Exception as e:
+                logger.error(f"❌ Trial {job.id} failed on attempt {job.attempt}: {e}")
+                queue.fail(job, worker, f"{type(e).__name__}: {e}")
+            finally:
+                done.set()
+                heart.join()
+            idle_since = time.monotonic()
+    finally:
+        queue.close()
+
+    logger.info(f"👷 Worker {worker} finished {completed} trials")
+    return completed
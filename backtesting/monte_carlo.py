@@ -0,0 +1,221 @@
+# backtesting/monte_carlo.py
+
+import json
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+import numpy as np
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+PERCENTILES = [5, 25, 50, 75, 95]
+
+# Per-path statistics returned by each simulation chunk
+PATH_STATS = ['final_capital', 'max_drawdown', 'max_drawdown_percent',
+              'min_equity', 'max_consecutive_losses', 'sharpe_ratio']
+
+
+def _simulate_chunk(pnl: np.ndarray,
+                    pnl_percent: np.ndarray,
+                    initial_capital: float,
+                    n_paths: int,
+                    method: str,
+                    seed) -> Dict[str, np.ndarray]:
+    """
+    Simulate one chunk of trade sequences as a (paths x trades) matrix
+
+    Module level so it can be shipped to worker processes.
+    """
+    rng = np.random.default_rng(seed)
+    n_trades = len(pnl)
+
+    if method == 'bootstrap':
+        idx = rng.integers(0, n_trades, size=(n_paths, n_trades))
+    else:  # shuffle: same trades, random order
+        idx = rng.permuted(np.tile(np.arange(n_trades), (n_paths, 1)), axis=1)
+
+    path_pnl = pnl[idx]
+    equity = initial_capital + np.cumsum(path_pnl, axis=1)
+
+    # Drawdown against the running peak, starting from the initial capital
+    peaks = np.maximum(np.maximum.accumulate(equity, axis=1), initial_capital)
+    drawdown = peaks - equity
+    max_dd_idx = np.argmax(drawdown, axis=1)
+    rows = np.arange(n_paths)
+    max_drawdown = drawdown[rows, max_dd_idx]
+    max_drawdown_percent = max_drawdown / peaks[rows, max_dd_idx] * 100
+
+    # Longest losing streak: run length resets wherever a trade wins
+    losses = path_pnl <= 0
+    loss_count = np.cumsum(losses, axis=1)
+    reset_at = np.maximum.accumulate(np.where(losses, 0, loss_count), axis=1)
+    max_consecutive_losses = (loss_count - reset_at).max(axis=1)
+
+    # Same simplified per-trade Sharpe as BacktestEngine.calculate_results
+    path_returns = pnl_percent[idx]
+    std = path_returns.std(axis=1)
+    sharpe = np.divide(path_returns.mean(axis=1), std, out=np.zeros(n_paths), where=std > 0)
+
+    return {
+        'final_capital': equity[:, -1],
+        'max_drawdown': max_drawdown,
+        'max_drawdown_percent': max_drawdown_percent,
+        'min_equity': np.minimum(equity.min(axis=1), initial_capital),
+        'max_consecutive_losses': max_consecutive_losses,
+        'sharpe_ratio': sharpe,
+    }
+
+
+@dataclass
+class MonteCarloResults:
+    """Distribution of backtest metrics across resampled trade sequences"""
+    method: str
+    n_simulations: int
+    n_trades: int
+    initial_capital: float
+    ruin_threshold_percent: float
+    ruin_probability: float
+    loss_probability: float
+    final_capital: Dict[str, float] = field(default_factory=dict)
+    max_drawdown_percent: Dict[str, float] = field(default_factory=dict)
+    max_consecutive_losses: Dict[str, float] = field(default_factory=dict)
+    sharpe_ratio: Dict[str, float] = field(default_factory=dict)
+
+
+class MonteCarloSimulator:
+    """
+    Monte Carlo resampling of a backtest trade ledger
+
+    A single backtest gives one equity path. This resamples the realized
+    trade P&Ls (bootstrap with replacement, or shuffled order) into many
+    alternative paths to get confidence intervals for drawdown, losing
+    streaks, Sharpe and final capital, plus the probability of ruin.
+
+    Paths are simulated as 2-D NumPy matrices in chunks of `chunk_size`
+    rows to bound memory, optionally spread across worker processes.
+    Drawdowns are measured on closed-trade equity, so they can read lower
+    than the bar-level drawdown reported by BacktestEngine.
+    """
+
+    METHODS = ['bootstrap', 'shuffle']
+
+    def __init__(self,
+                 pnl: np.ndarray,
+                 pnl_percent: np.ndarray,
+                 initial_capital: float,
+                 ruin_threshold_percent: float = 50.0,
+                 seed: Optional[int] = None):
+        self.pnl = np.asarray(pnl, dtype=np.float64)
+        self.pnl_percent = np.asarray(pnl_percent, dtype=np.float64)
+        self.initial_capital = float(initial_capital)
+        self.ruin_threshold_percent = ruin_threshold_percent
+        self.seed = seed
+
+        if len(self.pnl) == 0:
+            raise ValueError("Monte Carlo simulation needs at least one trade")
+
+        logger.info(f"🎲 Monte Carlo simulator: {len(self.pnl)} trades, "
+                    f"initial capital ₹{self.initial_capital:,.2f}")
+
+    @classmethod
+    def from_results(cls, results, **kwargs) -> 'MonteCarloSimulator':
+        """Build from a BacktestResults trade ledger"""
+        return cls(
+            pnl=[t.pnl for t in results.trades],
+            pnl_percent=[t.pnl_percent for t in results.trades],
+            initial_capital=results.initial_capital,
+            **kwargs
+        )
+
+    @classmethod
+    def from_results_file(cls, filename: str, **kwargs) -> 'MonteCarloSimulator':
+        """Build from a results file written by BacktestEngine.save_results"""
+        with open(filename, 'r') as f:
+            saved = json.load(f)
+        return cls(
+            pnl=[t['pnl'] for t in saved['trades']],
+            pnl_percent=[t['pnl_percent'] for t in saved['trades']],
+            initial_capital=saved['summary']['initial_capital'],
+            **kwargs
+        )
+
+    def simulate(self,
+                 n_simulations: int = 10000,
+                 method: str = 'bootstrap',
+                 chunk_size: int = 5000,
+                 workers: int = 1) -> MonteCarloResults:
+        """Run the simulation and summarize the per-path statistics"""
+        if method not in self.METHODS:
+            raise ValueError(f"Unknown resampling method '{method}'. Choose from {self.METHODS}")
+
+        # Chunk seeds are derived up front so results don't depend on worker count
+        chunk_sizes = [min(chunk_size, n_simulations - start)
+                       for start in range(0, n_simulations, chunk_size)]
+        seeds = np.random.SeedSequence(self.seed).spawn(len(chunk_sizes))
+        args = [(self.pnl, self.pnl_percent, self.initial_capital, n, method, s)
+                for n, s in zip(chunk_sizes, seeds)]
+
+        logger.info(f"🎲 Simulating {n_simulations:,} {method} paths "
+                    f"({len(chunk_sizes)} chunks, {workers} worker{'s' if workers > 1 else ''})")
+
+        if workers > 1 and len(args) > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                chunks = list(pool.map(_simulate_chunk, *zip(*args)))
+        else:
+            chunks = [_simulate_chunk(*a) for a in args]
+
+        stats = {name: np.concatenate([c[name] for c in chunks]) for name in PATH_STATS}
+        return self.summarize(stats, method, n_simulations)
+
+    def summarize(self, stats: Dict[str, np.ndarray], method: str, n_simulations: int) -> MonteCarloResults:
+        """Reduce per-path statistics to percentiles and probabilities"""
+
+        def percentiles(values: np.ndarray) -> Dict[str, float]:
+            summary = {f"p{p}": float(v) for p, v in zip(PERCENTILES, np.percentile(values, PERCENTILES))}
+            summary['mean'] = float(values.mean())
+            return summary
+
+        ruin_level = self.initial_capital * (1 - self.ruin_threshold_percent / 100)
+
+        results = MonteCarloResults(
+            method=method,
+            n_simulations=n_simulations,
+            n_trades=len(self.pnl),
+            initial_capital=self.initial_capital,
+            ruin_threshold_percent=self.ruin_threshold_percent,
+            ruin_probability=float((stats['min_equity'] <= ruin_level).mean()),
+            loss_probability=float((stats['final_capital'] < self.initial_capital).mean()),
+            final_capital=percentiles(stats['final_capital']),
+            max_drawdown_percent=percentiles(stats['max_drawdown_percent']),
+            max_consecutive_losses=percentiles(stats['max_consecutive_losses'].astype(np.float64)),
+            sharpe_ratio=percentiles(stats['sharpe_ratio'])
+        )
+
+        logger.info(f"✅ Monte Carlo complete: median final ₹{results.final_capital['p50']:,.2f}, "
+                    f"ruin probability {results.ruin_probability:.2%}")
+        return results
+
+    def generate_report(self, results: MonteCarloResults) -> str:
+        """Format confidence intervals for display"""
+
+        def row(label: str, values: Dict[str, float], fmt: str) -> str:
+            return f"{label:<22}" + "".join(f"{format(values[f'p{p}'], fmt):>12}" for p in PERCENTILES)
+
+        header = f"{'Metric':<22}" + "".join(f"{f'P{p}':>12}" for p in PERCENTILES)
+
+        return f"""
+🎲 MONTE CARLO ANALYSIS ({results.method}, {results.n_simulations:,} paths, {results.n_trades} trades)
+{'='*82}
+{header}
+{'-'*82}
+{row('Final Capital (₹)', results.final_capital, ',.0f')}
+{row('Max Drawdown (%)', results.max_drawdown_percent, '.1f')}
+{row('Max Consec. Losses', results.max_consecutive_losses, '.0f')}
+{row('Sharpe Ratio', results.sharpe_ratio, '.2f')}
+
+Probability of loss: {results.loss_probability:.1%}
+Probability of ruin (-{results.ruin_threshold_percent:.0f}% capital): {results.ruin_probability:.2%}
+"""
@@ -0,0 +1,346 @@
+# backtesting/optimizer.py
+
+import itertools
+import math
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from backtesting.backtest_engine import BacktestEngine, BacktestResults
+from config.registry import StrategyConfig
+from trading.enhanced_strategy import EnhancedTradingStrategy
+from trading.position_sizer import EnhancedPositionSizer
+from trading.risk_manager import EnhancedRiskManager
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Search space over STRATEGY_PROFILES keys: (kind, low, high, step)
+PARAMETER_SPACE = {
+    'supertrend_period': ('int', 7, 14, 1),
+    'supertrend_factor': ('float', 2.0, 4.5, 0.25),
+    'rsi_period': ('int', 9, 21, 1),
+    'rsi_oversold': ('int', 15, 35, 1),
+    'rsi_overbought': ('int', 65, 85, 1),
+    'volume_period': ('int', 10, 30, 5),
+    'volume_threshold': ('float', 1.2, 3.0, 0.1),
+    'min_confirmations': ('int', 2, 6, 1),
+    'max_risk_per_trade': ('float', 0.5, 3.0, 0.25),
+}
+
+# The original exhaustive grid, kept for reproducing older optimization runs
+GRID_SPACE = {
+    'supertrend_factor': [2.0, 2.5, 3.0, 3.5, 4.0],
+    'min_confirmations': [2, 3, 4, 5],
+    'max_risk_per_trade': [1.0, 1.5, 2.0, 2.5, 3.0],
+}
+
+SEARCH_METHODS = ['grid', 'random', 'tpe', 'halving', 'hyperband']
+
+# Smallest data prefix worth evaluating: warmup (50) plus room to trade
+MIN_EVAL_ROWS = 150
+
+
+def score_backtest_result(result: BacktestResults) -> float:
+    """Weighted optimization score used to rank parameter sets"""
+    if result.total_trades > 0:
+        return (
+            result.total_return_percent * 0.4 +  # 40% weight on returns
+            result.win_rate * 0.3 +              # 30% weight on win rate
+            (100 - result.max_drawdown_percent) * 0.2 +  # 20% weight on low drawdown
+            result.profit_factor * 10 * 0.1      # 10% weight on profit factor
+        )
+    return -1000  # Penalty for no trades
+
+
+def run_trial(data: pd.DataFrame, config: Mapping[str, Any], budget: float = 1.0) -> Tuple[BacktestResults, int]:
+    """Backtest config on the first `budget` fraction of data; returns (result, rows used)"""
+    rows = len(data)
+    n_rows = rows if budget >= 1.0 else min(rows, max(MIN_EVAL_ROWS, int(rows * budget)))
+    engine = BacktestEngine(
+        EnhancedTradingStrategy(config),
+        EnhancedPositionSizer(config),
+        EnhancedRiskManager(config),
+        config
+    )
+    return engine.run_backtest(data.iloc[:n_rows]), n_rows
+
+
+# A batch evaluator runs many parameter sets at one budget elsewhere (e.g. the
+# job queue's workers) and returns (result, rows used) per set, in order
+BatchEvaluator = Callable[[List[Dict[str, Any]], float], List[Tuple[Optional[BacktestResults], int]]]
+
+
+@dataclass
+class Trial:
+    """One evaluated parameter set"""
+    params: Dict[str, Any]
+    budget: float
+    score: float
+    result: Optional[BacktestResults] = None
+    pruned: bool = False
+
+
+@dataclass
+class OptimizationResult:
+    """Outcome of a parameter search"""
+    method: str
+    best_params: Dict[str, Any]
+    best_score: float
+    best_result: Optional[BacktestResults]
+    trials: List[Trial] = field(default_factory=list)
+    evaluations: int = 0
+    rows_evaluated: int = 0
+
+
+class StrategyOptimizer:
+    """
+    Parameter search engine for strategy profiles
+
+    Supports the original exhaustive grid plus random search, TPE-style
+    Bayesian optimization and successive halving / Hyperband. Budgets are
+    fractions of the dataset: weak configurations are scored on a short data
+    prefix and pruned before they are run over the full history.
+    """
+
+    def __init__(self,
+                 data: pd.DataFrame,
+                 base_config: Mapping[str, Any],
+                 space: Dict[str, Tuple] = None,
+                 score_fn: Callable[[BacktestResults], float] = score_backtest_result,
+                 seed: Optional[int] = None,
+                 evaluator: Optional[BatchEvaluator] = None):
+        self.data = data
+        self.base_config = base_config if isinstance(base_config, StrategyConfig) else StrategyConfig(base_config)
+        self.space = space or PARAMETER_SPACE
+        self.score_fn = score_fn
+        self.rng = np.random.default_rng(seed)
+        self.evaluator = evaluator
+
+        self.evaluations = 0
+        self.rows_evaluated = 0
+
+        logger.info(f"🔧 Optimizer initialized: {len(self.space)} parameters, {len(data)} data points")
+
+    # ------------------------------------------------------------------
+    # Evaluation
+    # ------------------------------------------------------------------
+
+    def build_config(self, params: Dict[str, Any]) -> StrategyConfig:
+        """Apply a parameter set on top of the base profile (validating only the changed keys)"""
+        return self.base_config.replace(**params)
+
+    def evaluate(self, params: Dict[str, Any], budget: float = 1.0) -> Trial:
+        """Backtest a parameter set on the first `budget` fraction of the data"""
+        result, n_rows = run_trial(self.data, self.build_config(params), budget)
+        self.evaluations += 1
+        self.rows_evaluated += n_rows
+        return Trial(params=params, budget=budget, score=self.score_fn(result), result=result)
+
+    def evaluate_batch(self, param_sets: List[Dict[str, Any]], budget: float = 1.0) -> List[Trial]:
+        """
+        Evaluate independent parameter sets, through the batch evaluator if set
+
+        Parameter sets that failed remotely come back as trials with no result
+        and a -inf score, so they never rank as best.
+        """
+        if self.evaluator is None:
+            trials = []
+            for i, params in enumerate(param_sets, 1):
+                trials.append(self.evaluate(params, budget))
+                if i % 10 == 0:
+                    logger.info(f"📊 Progress: {i}/{len(param_sets)}")
+            return trials
+
+        trials = []
+        for params, (result, n_rows) in zip(param_sets, self.evaluator(param_sets, budget)):
+            self.evaluations += 1
+            self.rows_evaluated += n_rows
+            score = self.score_fn(result) if result is not None else -float('inf')
+            trials.append(Trial(params=params, budget=budget, score=score, result=result))
+        return trials
+
+    # ------------------------------------------------------------------
+    # Sampling
+    # ------------------------------------------------------------------
+
+    def _grid_values(self, name: str) -> np.ndarray:
+        kind, low, high, step = self.space[name]
+        return np.round(np.arange(low, high + step / 2, step), 6)
+
+    def _cast(self, name: str, value: float) -> Any:
+        kind, low, high, step = self.space[name]
+        value = min(high, max(low, low + round((value - low) / step) * step))
+        return int(round(value)) if kind == 'int' else round(float(value), 6)
+
+    def sample_random(self) -> Dict[str, Any]:
+        """Draw one parameter set uniformly from the search space"""
+        return {name: self._cast(name, self.rng.choice(self._grid_values(name)))
+                for name in self.space}
+
+    def sample_tpe(self, trials: List[Trial], gamma: float = 0.25, n_candidates: int = 24) -> Dict[str, Any]:
+        """
+        Draw one parameter set with a Tree-structured Parzen Estimator
+
+        Completed trials are split into a good and a bad group by score. Each
+        parameter is modelled independently with a Gaussian Parzen window per
+        group, and the candidate maximizing l(x)/g(x) is returned.
+        """
+        ranked = sorted(trials, key=lambda t: t.score, reverse=True)
+        n_good = max(1, int(math.ceil(gamma * len(ranked))))
+        good, bad = ranked[:n_good], ranked[n_good:] or ranked[-1:]
+
+        params = {}
+        for name, (kind, low, high, step) in self.space.items():
+            width = max(high - low, step)
+            good_x = np.array([t.params[name] for t in good], dtype=float)
+            bad_x = np.array([t.params[name] for t in bad], dtype=float)
+            bandwidth = max(width / max(len(good_x), 1) ** 0.5 / 2, step)
+
+            # Candidates come from the good-group mixture
+            centers = self.rng.choice(good_x, size=n_candidates)
+            candidates = np.clip(centers + self.rng.normal(0, bandwidth, n_candidates), low, high)
+
+            def density(x, samples):
+                # Uniform prior component keeps the estimator from collapsing
+                z = (x[:, None] - samples[None, :]) / bandwidth
+                kernel = np.exp(-0.5 * z ** 2).sum(axis=1) / (bandwidth * math.sqrt(2 * math.pi))
+                return (kernel + 1.0 / width) / (len(samples) + 1)
+
+            ratio = density(candidates, good_x) / density(candidates, bad_x)
+            params[name] = self._cast(name, candidates[int(np.argmax(ratio))])
+
+        return params
+
+    # ------------------------------------------------------------------
+    # Search methods
+    # ------------------------------------------------------------------
+
+    def grid_search(self) -> List[Trial]:
+        """Exhaustive search over GRID_SPACE on the full dataset"""
+        names = list(GRID_SPACE)
+        combinations = list(itertools.product(*(GRID_SPACE[n] for n in names)))
+        logger.info(f"🔄 Grid search: {len(combinations)} combinations")
+        return self.evaluate_batch([dict(zip(names, values)) for values in combinations])
+
+    def sequential_search(self, n_trials: int, method: str = 'tpe',
+                          n_startup: int = 10, prune_budget: float = 1 / 3) -> List[Trial]:
+        """
+        Random or TPE search with median pruning
+
+        Each candidate is first scored on a `prune_budget` prefix of the data.
+        Candidates scoring below the median of earlier prefix scores are pruned;
+        the rest are evaluated on the full dataset. With a batch evaluator,
+        random search submits every candidate at once on the full dataset.
+        """
+        if self.evaluator is not None:
+            if method == 'tpe':
+                raise ValueError("TPE picks each trial from the previous ones; use random, grid, "
+                                 "halving or hyperband with a batch evaluator")
+            logger.info(f"🔄 RANDOM search: {n_trials} trials (batched, no pruning)")
+            return self.evaluate_batch([self.sample_random() for _ in range(n_trials)])
+
+        logger.info(f"🔄 {method.upper()} search: {n_trials} trials (prune budget {prune_budget:.0%})")
+
+        full_trials: List[Trial] = []
+        prefix_scores: List[float] = []
+        all_trials: List[Trial] = []
+
+        for i in range(n_trials):
+            if method == 'tpe' and len(full_trials) >= n_startup:
+                params = self.sample_tpe(full_trials)
+            else:
+                params = self.sample_random()
+
+            if 0 < prune_budget < 1:
+                probe = self.evaluate(params, prune_budget)
+                median = float(np.median(prefix_scores)) if len(prefix_scores) >= 3 else -float('inf')
+                prefix_scores.append(probe.score)
+                if probe.score < median:
+                    probe.pruned = True
+                    all_trials.append(probe)
+                    logger.info(f"✂️ Trial {i + 1}/{n_trials} pruned (prefix score {probe.score:.1f} < median {median:.1f})")
+                    continue
+
+            trial = self.evaluate(params)
+            full_trials.append(trial)
+            all_trials.append(trial)
+            logger.info(f"📊 Trial {i + 1}/{n_trials}: score {trial.score:.1f}")
+
+        return all_trials
+
+    def successive_halving(self, n_configs: int, min_budget: float = 1 / 9, eta: int = 3,
+                           configs: List[Dict[str, Any]] = None) -> List[Trial]:
+        """Evaluate many configs on a short prefix and keep the top 1/eta each rung"""
+        configs = configs or [self.sample_random() for _ in range(n_configs)]
+        budget = min_budget
+        all_trials: List[Trial] = []
+
+        while True:
+            logger.info(f"🪜 Successive halving rung: {len(configs)} configs at {budget:.0%} of data")
+            rung = self.evaluate_batch(configs, budget)
+            rung.sort(key=lambda t: t.score, reverse=True)
+            all_trials.extend(rung)
+
+            if budget >= 1.0:
+                break
+
+            keep = max(1, len(rung) // eta)
+            for trial in rung[keep:]:
+                trial.pruned = True
+            configs = [t.params for t in rung[:keep]]
+
+            # A lone survivor goes straight to the full dataset
+            budget = 1.0 if len(configs) == 1 else budget * eta
+            if budget > 1.0 - 1e-9:
+                budget = 1.0
+
+        return all_trials
+
+    def hyperband(self, max_configs: int = 27, eta: int = 3) -> List[Trial]:
+        """Run successive halving brackets trading config count against prefix length"""
+        s_max = max(0, int(math.floor(math.log(max_configs, eta))))
+        all_trials: List[Trial] = []
+
+        for s in range(s_max, -1, -1):
+            n_configs = int(math.ceil((s_max + 1) / (s + 1) * eta ** s))
+            min_budget = eta ** -s
+            logger.info(f"🎰 Hyperband bracket s={s}: {n_configs} configs from {min_budget:.0%} of data")
+            all_trials.extend(self.successive_halving(n_configs, min_budget, eta))
+
+        return all_trials
+
+    def optimize(self, method: str = 'tpe', n_trials: int = 40, eta: int = 3) -> OptimizationResult:
+        """Run a search and return the best full-data trial"""
+        if method not in SEARCH_METHODS:
+            raise ValueError(f"Unknown search method '{method}'. Choose from {SEARCH_METHODS}")
+
+        if method == 'grid':
+            trials = self.grid_search()
+        elif method in ('random', 'tpe'):
+            trials = self.sequential_search(n_trials, method)
+        elif method == 'halving':
+            trials = self.successive_halving(n_trials, eta=eta)
+        else:
+            trials = self.hyperband(n_trials, eta)
+
+        complete = [t for t in trials if t.budget >= 1.0 and not t.pruned and t.result is not None] or \
+            [t for t in trials if t.result is not None]
+        if not complete:
+            raise RuntimeError("Every trial failed - see the worker logs")
+        best = max(complete, key=lambda t: t.score)
+
+        logger.info(f"🏆 Best score {best.score:.1f} after {self.evaluations} evaluations "
+                    f"({self.rows_evaluated:,} candle-rows)")
+
+        return OptimizationResult(
+            method=method,
+            best_params=best.params,
+            best_score=best.score,
+            best_result=best.result,
+            trials=trials,
+            evaluations=self.evaluations,
+            rows_evaluated=self.rows_evaluated
+        )
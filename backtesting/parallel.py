@@ -0,0 +1,67 @@
+# backtesting/parallel.py
+
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Optional
+
+import pandas as pd
+
+from backtesting.dataset import is_dataset, open_dataset, write_dataset
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Per-worker frame set by _open_worker (the pool initializer)
+_worker_data: Optional[pd.DataFrame] = None
+
+
+def _open_worker(path: str):
+    global _worker_data
+    _worker_data = open_dataset(path)
+
+
+def _run_one(name: str, config: Dict[str, Any], use_cache: bool, data: Optional[pd.DataFrame] = None):
+    """One backtest; module level so it can be shipped to worker processes"""
+    from backtesting.backtest_engine import BacktestEngine
+    from trading.enhanced_strategy import EnhancedTradingStrategy
+    from trading.position_sizer import EnhancedPositionSizer
+    from trading.risk_manager import EnhancedRiskManager
+
+    cache = None
+    if use_cache:
+        from backtesting.result_cache import BacktestResultCache
+        cache = BacktestResultCache()
+
+    engine = BacktestEngine(EnhancedTradingStrategy(config), EnhancedPositionSizer(config),
+                            EnhancedRiskManager(config), config)
+    return name, engine.run_backtest(_worker_data if data is None else data, cache=cache)
+
+
+def run_backtests(data: pd.DataFrame, configs: Dict[str, Dict[str, Any]],
+                  workers: int = 1, use_cache: bool = True, dataset: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Backtest several configs on the same data; returns {name: BacktestResults}
+
+    With workers > 1 the data is written once as a temporary dataset and
+    each worker process memory-maps it at startup, so configs run
+    concurrently over one page-cache copy without pickling the frame per
+    task. Pass dataset when data was opened from one (--data) to map that
+    directly. Results keep the order of configs.
+    """
+    workers = min(workers, len(configs))
+    if workers <= 1:
+        results = {}
+        for name, config in configs.items():
+            logger.info(f"🔄 Testing {name} strategy...")
+            results[name] = _run_one(name, config, use_cache, data)[1]
+        return results
+
+    logger.info(f"🔀 Running {len(configs)} backtests on {workers} worker processes")
+    with tempfile.TemporaryDirectory(prefix='backtest_data_') as scratch:
+        path = dataset if dataset and is_dataset(dataset) else write_dataset(data, f"{scratch}/candles")
+        with ProcessPoolExecutor(max_workers=workers, initializer=_open_worker,
+                                 initargs=(str(path),)) as pool:
+            futures = [pool.submit(_run_one, name, config, use_cache) for name, config in configs.items()]
+            results = dict(future.result() for future in futures)
+    return {name: results[name] for name in configs}
+
@@ -0,0 +1,289 @@
+# backtesting/replay.py
+
+import tempfile
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from config.enhanced_settings import INSTRUMENTS, MARKET_CONFIG
+from trading.event_bus import RiskStop
+from utils.clock import SimulatedClock
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class ReplayResults:
+    """Trades booked by the live bot over a replayed period"""
+    profile: str
+    start: datetime
+    end: datetime
+    trades: List[Dict[str, Any]]
+    cycles: int
+    simulated_seconds: float
+    wall_seconds: float
+    total_pnl: float
+    broker_calls: Dict[str, Dict[str, float]] = field(default_factory=dict)
+
+    @property
+    def speedup(self) -> float:
+        return self.simulated_seconds / self.wall_seconds if self.wall_seconds else float('inf')
+
+
+# Live exit reasons -> the backtest engine's wording
+EXIT_CATEGORIES = (
+    ('Stop Loss', 'Stop Loss'),
+    ('Trailing Stop', 'Stop Loss'),
+    ('Take Profit', 'Take Profit'),
+    ('Strong Signal Reversal', 'Signal Reversal'),
+    ('Maximum Hold Time', 'Time Limit'),
+    ('Replay End', 'End of backtest'),
+)
+
+
+def exit_category(reason: str) -> str:
+    for prefix, category in EXIT_CATEGORIES:
+        if reason.startswith(prefix):
+            return category
+    return reason
+
+
+def next_session_open(moment: datetime) -> datetime:
+    """The next market open at or after moment"""
+    hour, minute = map(int, MARKET_CONFIG['market_open_time'].split(':'))
+    day = moment.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if day < moment:
+        day += timedelta(days=1)
+    while day.weekday() not in MARKET_CONFIG['trading_days']:
+        day += timedelta(days=1)
+    return day
+
+
+class ReplayDriver:
+    """
+    Paper-trade stored candles through EnhancedTradingBot's live code path
+
+    The bot runs on a SimulatedClock against a KiteSimulator that follows
+    the same clock, so trading_cycle(), handle_entry_signal(),
+    handle_position_management() and execute_exit() run unchanged - their
+    sleeps just move the clock. Between cycles the stop-loss monitor is fed
+    the intrabar price path the simulator walks, the way its LTP poll would
+    see it. Nothing sleeps, so months replay in minutes.
+
+    Differences from a live session, by design: no background threads
+    that act on the book (broker reconciliation, ATR refresh; event bus
+    subscribers still run and see simulated timestamps) - ATR scaling is
+    calibrated once from the warm-up bars; when a risk limit stops trading,
+    the replay resumes at the next session open (where an operator would
+    restart the bot) with fresh daily counters; bot state goes to a
+    throwaway journal.
+    """
+
+    def __init__(self, profile: str = 'balanced', warmup_bars: int = 50,
+                 check_interval: Optional[float] = None,
+                 signal_instrument: str = 'NIFTY_50', trading_instrument: str = 'NIFTYBEES',
+                 event_log: Optional[str] = None):
+        self.profile = profile
+        self.event_log = event_log
+        self.warmup_bars = warmup_bars
+        self.check_interval = check_interval
+        self.signal_token = INSTRUMENTS[signal_instrument]['token']
+        self.trading_token = INSTRUMENTS[trading_instrument]['token']
+        self.trading_symbol = INSTRUMENTS[trading_instrument]['symbol']
+        self.atr_calibrator = None
+
+    def run(self, data: pd.DataFrame) -> ReplayResults:
+        """Replay a backtest frame (signal OHLCV plus *_trading columns or trading_price)"""
+        from enhanced_main import EnhancedTradingBot
+        from trading.atr_calibration import ATRCalibrator
+        from trading.executor import OrderExecutor
+        from trading.kite_simulator import KITE_RATE_LIMITS, KiteSimulator
+        from trading.stop_monitor import StopLossMonitor
+
+        if len(data) <= self.warmup_bars:
+            raise ValueError(f"Insufficient data: {len(data)} rows. Need more than {self.warmup_bars}.")
+
+        start = pd.Timestamp(data.index[self.warmup_bars]).to_pydatetime()
+        clock = SimulatedClock(start)
+
+        with tempfile.TemporaryDirectory(prefix='replay_') as state_dir:
+            bot = EnhancedTradingBot(self.profile, restore_state=False, install_signal_handlers=False,
+                                     clock=clock, state_dir=state_dir, event_log=self.event_log)
+            kite = KiteSimulator.from_frame(
+                data, self.signal_token, self.trading_token,
+                warmup_bars=self.warmup_bars, clock=clock,
+                rate_limits={group: 0 for group in KITE_RATE_LIMITS},
+                account_balance=bot.config['account_balance']
+            )
+            executor = OrderExecutor(kite, clock)
+            bot.attach(kite, executor)
+
+            # One calibration from the warm-up history, kept out of the live table
+            self.atr_calibrator = ATRCalibrator(path=f"{state_dir}/atr_calibration.json")
+            calibration = self.atr_calibrator.calibrate_frame(data.iloc[:self.warmup_bars], self.trading_symbol)
+            if calibration:
+                self.atr_calibrator.update(calibration, persist=False)
+            bot.atr_calibrator = self.atr_calibrator
+            bot.position_sizer.calibrator = self.atr_calibrator
+
+            if bot.config.get('stop_monitor_enabled', True):
+                bot.stop_monitor = StopLossMonitor(
+                    executor, f"NSE:{self.trading_token}",
+                    latency_budget_ms=bot.config.get('stop_monitor_latency_budget_ms', 250),
+                    clock=clock
+                )
+                bot.stop_monitor.register(bot)
+
+            interval = self.check_interval or bot.config['check_interval']
+            bar_ns = kite.interval_ns
+            end = pd.Timestamp(int(kite.bars[self.signal_token].timestamp[-1]) + bar_ns).to_pydatetime()
+
+            logger.info(f"⏩ Replaying {self.profile} from {start} to {end} ({interval}s cycles)")
+            started = time.perf_counter()
+            cycles = self._loop(bot, kite, clock, interval, end)
+
+            if bot.current_position['quantity'] != 0:
+                price = executor.get_latest_price(f"NSE:{self.trading_token}")
+                if price:
+                    bot.update_position_pnl(price)
+                    bot.execute_exit(price, "Replay End")
+            wall_seconds = time.perf_counter() - started
+            trades = list(bot.journal.history('trade'))
+            bot.journal.close()
+            bot.close_events()
+
+        results = ReplayResults(
+            profile=self.profile,
+            start=start,
+            end=clock.now(),
+            trades=trades,
+            cycles=cycles,
+            simulated_seconds=(clock.now() - start).total_seconds(),
+            wall_seconds=wall_seconds,
+            total_pnl=bot.trade_stats.session.pnl,
+            broker_calls=kite.stats()
+        )
+        logger.info(f"✅ Replay finished: {len(results.trades)} trades, P&L ₹{results.total_pnl:.2f}, "
+                    f"{cycles} cycles in {wall_seconds:.1f}s ({results.speedup:,.0f}x real time)")
+        return results
+
+    def _loop(self, bot, kite, clock: SimulatedClock, interval: float, end: datetime) -> int:
+        """run_enhanced_trading's loop, with waits turned into clock moves"""
+        cycles = 0
+        while clock.now() < end:
+            now = clock.now()
+            if not bot.is_market_open():
+                clock.set(min(next_session_open(now), end))
+                continue
+
+            bot.roll_trading_day()
+            should_stop, reason = bot.risk_manager.should_stop_trading()
+            if should_stop:
+                logger.info(f"🛑 {now:%Y-%m-%d %H:%M} trading stopped: {reason} - resuming next session")
+                bot.publish(RiskStop, reason=reason)
+                clock.set(min(next_session_open(now.replace(hour=23, minute=59)), end))
+                continue
+
+            try:
+                bot.trading_cycle(self.signal_token, self.trading_token, self.trading_symbol)
+            except Exception as e:
+                logger.error(f"❌ Error in replayed cycle at {now}: {e}")
+            cycles += 1
+
+            next_cycle = min(now + timedelta(seconds=interval), end)
+            self._feed_stop_monitor(bot, kite, clock, next_cycle)
+            clock.set(next_cycle)
+        return cycles
+
+    def _feed_stop_monitor(self, bot, kite, clock: SimulatedClock, until: datetime):
+        """Show the monitor every price the instrument passes through until the next cycle"""
+        if not bot.stop_monitor or bot.current_position['quantity'] == 0:
+            return
+        after_ns = pd.Timestamp(clock.now()).value
+        for at_ns, price in kite.ticks_between(self.trading_token, after_ns, pd.Timestamp(until).value):
+            clock.set(pd.Timestamp(at_ns).to_pydatetime(warn=False))
+            bot.stop_monitor.on_tick(price, clock.monotonic())
+            if bot.current_position['quantity'] == 0:
+                break
+
+
+def compare_with_backtest(replay: ReplayResults, backtest, data: pd.DataFrame,
+                          tolerance_bars: int = 1) -> Dict[str, Any]:
+    """
+    Line up replayed (live-path) trades with BacktestEngine trades
+
+    Trades pair up when they enter in the same direction within
+    tolerance_bars candles of each other - the live bot acts on the forming
+    candle, the backtest on closed ones, so an entry one bar apart is the
+    same decision.
+    """
+    stamps = pd.DatetimeIndex(data.index)
+    if stamps.tz is not None:
+        stamps = stamps.tz_localize(None)
+
+    def bar_of(moment) -> int:
+        return int(np.searchsorted(stamps.asi8, pd.Timestamp(moment).value, side='right')) - 1
+
+    live = [(bar_of(t['entry_time']), 'BUY' if t['direction'] == 'LONG' else 'SELL', t) for t in replay.trades]
+    tested = [(bar_of(t.entry_time), t.direction, t) for t in backtest.trades]
+
+    matched, only_backtest = [], []
+    unmatched_live = list(live)
+    for bar, direction, trade in tested:
+        candidates = [entry for entry in unmatched_live
+                      if entry[1] == direction and abs(entry[0] - bar) <= tolerance_bars]
+        if not candidates:
+            only_backtest.append(trade)
+            continue
+        best = min(candidates, key=lambda entry: abs(entry[0] - bar))
+        unmatched_live.remove(best)
+        live_trade = best[2]
+        matched.append({
+            'entry_time': trade.entry_time,
+            'direction': direction,
+            'bar_offset': best[0] - bar,
+            'live_exit_reason': live_trade['exit_reason'],
+            'backtest_exit_reason': trade.exit_reason,
+            'same_exit': exit_category(live_trade['exit_reason']) == trade.exit_reason,
+            'live_pnl': live_trade['pnl'],
+            'backtest_pnl': trade.pnl,
+            'entry_price_diff': live_trade['entry_price'] - trade.entry_price,
+            'exit_price_diff': live_trade['exit_price'] - trade.exit_price
+        })
+
+    return {
+        'live_trades': len(live),
+        'backtest_trades': len(tested),
+        'matched': matched,
+        'only_live': [entry[2] for entry in unmatched_live],
+        'only_backtest': only_backtest,
+        'live_pnl': sum(t['pnl'] for t in replay.trades),
+        'backtest_pnl': sum(t.pnl for t in backtest.trades)
+    }
+
+
+def format_comparison(diff: Dict[str, Any]) -> str:
+    """Text report of compare_with_backtest output"""
+    lines = [
+        "LIVE PATH vs BACKTEST",
+        "=" * 40,
+        f"Trades: live {diff['live_trades']}, backtest {diff['backtest_trades']}, matched {len(diff['matched'])}",
+        f"P&L:    live ₹{diff['live_pnl']:,.2f}, backtest ₹{diff['backtest_pnl']:,.2f}",
+    ]
+    if diff['matched']:
+        same_exit = sum(1 for m in diff['matched'] if m['same_exit'])
+        pnl_gap = [m['live_pnl'] - m['backtest_pnl'] for m in diff['matched']]
+        lines.append(f"Matched: same exit reason {same_exit}/{len(diff['matched'])}, "
+                     f"mean P&L gap ₹{np.mean(pnl_gap):+.2f}, worst ₹{max(pnl_gap, key=abs):+.2f}")
+    for trade in diff['only_live'][:10]:
+        lines.append(f"  live only:     {trade['entry_time']:%Y-%m-%d %H:%M} {trade['direction']:<5} "
+                     f"{trade['exit_reason']} ₹{trade['pnl']:+.2f}")
+    for trade in diff['only_backtest'][:10]:
+        lines.append(f"  backtest only: {pd.Timestamp(trade.entry_time):%Y-%m-%d %H:%M} {trade.direction:<5} "
+                     f"{trade.exit_reason} ₹{trade.pnl:+.2f}")
+    return "\n".join(lines)
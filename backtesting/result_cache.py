@@ -0,0 +1,132 @@
+# backtesting/result_cache.py
+
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+import pandas as pd
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class BacktestResultCache:
+    """
+    Content-addressed on-disk cache for backtest results
+
+    Entries are keyed by a hash of the input data, the full strategy config
+    and the engine version, so an identical rerun is served straight from disk.
+    The cache directory is bounded in size and evicts least recently used
+    entries first (file mtime is bumped on every hit).
+    """
+
+    SUFFIX = '.pkl'
+
+    def __init__(self, cache_dir: Optional[str] = None, max_size_mb: Optional[float] = None):
+        from config.settings import Settings
+
+        self.cache_dir = Path(cache_dir) if cache_dir else Settings.BACKTEST_CACHE_DIR
+        max_size_mb = max_size_mb if max_size_mb is not None else Settings.BACKTEST_CACHE_MAX_MB
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def fingerprint_data(data: pd.DataFrame) -> str:
+        """Hash the DataFrame contents, index and column layout"""
+        digest = hashlib.sha256()
+        digest.update(json.dumps([str(c) for c in data.columns]).encode())
+        digest.update(json.dumps([str(t) for t in data.dtypes]).encode())
+        row_hashes = pd.util.hash_pandas_object(data, index=True).values
+        digest.update(row_hashes.tobytes())
+        return digest.hexdigest()
+
+    @staticmethod
+    def hash_config(config: Mapping[str, Any]) -> str:
+        """Hash a strategy config independent of key order"""
+        payload = json.dumps(dict(config), sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def make_key(self,
+                 data: pd.DataFrame,
+                 config: Mapping[str, Any],
+                 start_date: str = None,
+                 end_date: str = None) -> str:
+        """Build the cache key for one backtest run"""
+        from backtesting.backtest_engine import ENGINE_VERSION
+
+        parts = [
+            ENGINE_VERSION,
+            self.fingerprint_data(data),
+            self.hash_config(config),
+            str(start_date),
+            str(end_date),
+        ]
+        return hashlib.sha256('|'.join(parts).encode()).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}{self.SUFFIX}"
+
+    def get(self, key: str) -> Optional[Tuple[Any, List[Dict[str, Any]]]]:
+        """Return (results, equity_curve) for a key, or None on a miss"""
+        path = self._path(key)
+        if not path.exists():
+            return None
+
+        try:
+            with open(path, 'rb') as f:
+                entry = pickle.load(f)
+            os.utime(path, None)  # Mark as recently used
+            logger.info(f"⚡ Backtest cache hit: {key[:12]}")
+            return entry['results'], entry['equity_curve']
+        except Exception as e:
+            logger.warning(f"⚠️ Dropping unreadable cache entry {key[:12]}: {e}")
+            path.unlink(missing_ok=True)
+            return None
+
+    def put(self, key: str, results: Any, equity_curve: List[Dict[str, Any]]):
+        """Store results for a key and enforce the size bound"""
+        entry = {'results': results, 'equity_curve': equity_curve}
+
+        try:
+            fd, tmp_name = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_name, self._path(key))
+            logger.info(f"💾 Backtest cached: {key[:12]}")
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to write backtest cache entry: {e}")
+            return
+
+        self.evict()
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits its bound"""
+        entries = []
+        for path in self.cache_dir.glob(f"*{self.SUFFIX}"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total_size = sum(size for _, size, _ in entries)
+        if total_size <= self.max_size_bytes:
+            return
+
+        for _, size, path in sorted(entries):
+            path.unlink(missing_ok=True)
+            total_size -= size
+            logger.debug(f"🗑️ Evicted backtest cache entry {path.stem[:12]}")
+            if total_size <= self.max_size_bytes:
+                break
+
+    def clear(self):
+        """Remove every cached entry"""
+        for path in self.cache_dir.glob(f"*{self.SUFFIX}"):
+            path.unlink(missing_ok=True)
+        logger.info("🔄 Backtest cache cleared")
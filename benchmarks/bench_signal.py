@@ -0,0 +1,116 @@
+# benchmarks/bench_signal.py
+"""
+Time and memory profile of EnhancedTradingStrategy.get_signal
+
+Replays a sample candle series through get_signal the way the backtest
+engine does (growing history) and the live loop does (a fixed trailing
+window), and reports time per call and the tracemalloc peak above the
+baseline during each call (worst and mean). Then times score_history,
+which scores every bar of the series in one vectorized pass.
+
+    python benchmarks/bench_signal.py [--days 60] [--window 200] [--calls 300] [--dataframe] [--data PATH]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from backtesting.data_fetcher import HistoricalDataFetcher
+from backtesting.dataset import open_dataset
+from config.enhanced_settings import STRATEGY_PROFILES
+from trading.bars import Bars
+from trading.enhanced_strategy import EnhancedTradingStrategy
+
+
+def trailing_windows(data, bars, size, calls, use_frame):
+    """Windows of `size` bars ending at the last `calls` candles (live loop)"""
+    last = len(data)
+    for end in range(max(size, last - calls + 1), last + 1):
+        yield data.iloc[end - size:end] if use_frame else bars[end - size:end]
+
+
+def growing_windows(data, bars, calls, use_frame):
+    """History up to successive candles, spread over the series (backtest loop)"""
+    step = max(1, (len(data) - 50) // calls)
+    for end in range(50, len(data) + 1, step):
+        yield data.iloc[:end] if use_frame else bars[:end]
+
+
+def measure(strategy, inputs):
+    """Mean ms per call, and worst / mean per-call allocation peak in KiB"""
+    inputs = list(inputs)
+    for window in inputs[:5]:  # warm scratch buffers and caches
+        strategy.get_signal(window)
+
+    started = time.perf_counter()
+    for window in inputs:
+        strategy.get_signal(window)
+    elapsed_ms = (time.perf_counter() - started) * 1000 / len(inputs)
+
+    tracemalloc.start()
+    peaks = []
+    for window in inputs:
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        strategy.get_signal(window)
+        peaks.append(tracemalloc.get_traced_memory()[1] - before)
+    tracemalloc.stop()
+    return elapsed_ms, max(peaks) / 1024, float(np.mean(peaks)) / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description='get_signal time/memory benchmark')
+    parser.add_argument('--profile', default='balanced', choices=list(STRATEGY_PROFILES))
+    parser.add_argument('--days', type=int, default=60, help='Sample data days (default: 60)')
+    parser.add_argument('--window', type=int, default=200, help='Live window size in bars (default: 200)')
+    parser.add_argument('--calls', type=int, default=300, help='get_signal calls per case (default: 300)')
+    parser.add_argument('--dataframe', action='store_true', help='Pass DataFrame windows instead of Bars views')
+    parser.add_argument('--data', metavar='PATH', help='Benchmark a saved dataset instead of sample data')
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    if args.data:
+        started = time.perf_counter()
+        data = open_dataset(args.data)
+        print(f"opened {args.data} in {(time.perf_counter() - started) * 1000:.2f} ms (memory-mapped)")
+    else:
+        np.random.seed(42)
+        data = HistoricalDataFetcher().generate_sample_data(args.days)
+    bars = Bars.from_frame(data)
+    strategy = EnhancedTradingStrategy(STRATEGY_PROFILES[args.profile])
+
+    kind = 'DataFrame' if args.dataframe else 'Bars'
+    print(f"get_signal benchmark: {args.profile}, {len(data)} candles, {kind} input")
+    print(f"{'case':<28} {'ms/call':>9} {'max peak KiB':>13} {'mean peak KiB':>14}")
+
+    cases = [
+        (f"live window ({args.window} bars)", trailing_windows(data, bars, args.window, args.calls, args.dataframe)),
+        (f"backtest (50-{len(data)} bars)", growing_windows(data, bars, args.calls, args.dataframe)),
+    ]
+    for name, inputs in cases:
+        elapsed_ms, peak_kib, mean_kib = measure(strategy, inputs)
+        print(f"{name:<28} {elapsed_ms:>9.3f} {peak_kib:>13.1f} {mean_kib:>14.1f}")
+
+    if hasattr(strategy, 'score_history'):
+        source = data if args.dataframe else bars
+        strategy.score_history(source)
+        started = time.perf_counter()
+        strategy.score_history(source)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        name = f"score_history ({len(data)} bars)"
+        print(f"{name:<28} {elapsed_ms:>9.3f}   ({elapsed_ms * 1000 / len(data):.1f} us/bar)")
+
+    scratch = getattr(strategy, 'scratch', None)
+    if scratch is not None:
+        print(f"scratch buffers: {scratch.nbytes() / 1024:.1f} KiB (reused across calls)")
+
+
+if __name__ == '__main__':
+    main()
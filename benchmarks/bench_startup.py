@@ -0,0 +1,76 @@
+# benchmarks/bench_startup.py
+"""
+CLI startup time and per-module import cost
+
+Runs the CLI in a scratch working directory (no token file, so `status`
+stops at the login check instead of calling the broker, and no logs or
+data are written to the repo) and reports the best wall time of several
+runs, next to a bare interpreter. Then reports `python -X importtime`
+cumulative import cost for the main entry modules.
+
+    python benchmarks/bench_startup.py [--runs 5]
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CLI = os.path.join(ROOT, 'cli_enhanced.py')
+
+COMMANDS = [
+    ('python -c pass', ['-c', 'pass']),
+    ('cli --help', [CLI, '--help']),
+    ('cli compare', [CLI, 'compare']),
+    ('cli status (no token)', [CLI, 'status']),
+]
+
+MODULES = ['cli_enhanced', 'utils.logger', 'auth.kite_auth', 'backtesting.data_fetcher', 'enhanced_main']
+
+
+def best_wall_time(args, runs, cwd):
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    best = float('inf')
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable] + args, cwd=cwd, env=env,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def import_cost(module, cwd):
+    """Cumulative microseconds for `import module` in a fresh interpreter"""
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=cwd, env=env, capture_output=True, text=True, check=False)
+    pattern = re.compile(r'import time:\s+\d+ \|\s+(\d+) \| (\s*)' + re.escape(module) + r'$')
+    for line in result.stderr.splitlines():
+        match = pattern.match(line)
+        if match and not match.group(2):
+            return int(match.group(1))
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='CLI startup benchmark')
+    parser.add_argument('--runs', type=int, default=5, help='Runs per command, best is reported (default: 5)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as cwd:
+        print(f"{'command':<26} {'best ms':>9}")
+        for name, command in COMMANDS:
+            print(f"{name:<26} {best_wall_time(command, args.runs, cwd):>9.0f}")
+
+        print(f"\n{'module':<26} {'import ms':>9}")
+        for module in MODULES:
+            cost = import_cost(module, cwd)
+            print(f"{module:<26} {cost / 1000 if cost is not None else float('nan'):>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
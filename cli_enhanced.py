@@ -1,10 +1,12 @@
 # cli_enhanced.py - FINAL COMPLETE VERSION WITH BACKTESTING
+#
+# Commands import what they need (pandas, numpy, kiteconnect, the bot)
+# inside their own function, so `--help`, `compare` and friends start
+# without loading the trading stack. See benchmarks/bench_startup.py.
 
 import argparse
 import sys
 from datetime import datetime
-from enhanced_main import EnhancedTradingBot
-from auth.kite_auth import KiteAuth
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -15,6 +17,9 @@ def test_enhanced_connection():
     print("=" * 50)
     
     try:
+        from auth.kite_auth import KiteAuth
+        from enhanced_main import EnhancedTradingBot
+        
         # Test authentication
         print("1. Testing Kite Connect authentication...")
         auth = KiteAuth()
@@ -101,6 +106,8 @@ def auth_enhanced():
     print("=" * 40)
     
     try:
+        from auth.kite_auth import KiteAuth
+        
         auth = KiteAuth()
         
         # Check if we already have valid tokens
@@ -206,13 +213,17 @@ def auth_enhanced():
 def run_enhanced_trading(args):
     """Run enhanced trading with specified parameters"""
     print(f"🚀 Starting Enhanced Trading Bot")
-    print(f"📊 Profile: {args.profile}")
+    print(f"📊 Profile: {args.config or args.profile}")
     print(f"🎯 Signal: {args.signal}")
     print(f"💼 Trading: {args.trading}")
     print("=" * 50)
     
     try:
-        bot = EnhancedTradingBot(strategy_profile=args.profile)
+        from enhanced_main import EnhancedTradingBot
+        from config.registry import load_profile
+        
+        bot = EnhancedTradingBot(strategy_profile=load_profile(args.config) if args.config else args.profile,
+                                 event_log=args.event_log)
         bot.run_enhanced_trading(
             signal_instrument=args.signal,
             trading_instrument=args.trading
@@ -224,6 +235,29 @@ def run_enhanced_trading(args):
         import traceback
         traceback.print_exc()
 
+def run_multi_strategy_trading(args):
+    """Run several strategy profiles over one shared data feed"""
+    print(f"🚀 Starting Multi-Strategy Trading")
+    print(f"📊 Profiles: {', '.join(args.profiles)}")
+    print(f"🎯 Signal: {args.signal}")
+    print(f"💼 Trading: {args.trading}")
+    print("=" * 50)
+    
+    try:
+        from multi_strategy_main import MultiStrategyRunner
+        
+        runner = MultiStrategyRunner(args.profiles, event_log=args.event_log)
+        runner.run(
+            signal_instrument=args.signal,
+            trading_instrument=args.trading
+        )
+    except KeyboardInterrupt:
+        print("\n🛑 Trading stopped by user")
+    except Exception as e:
+        print(f"\n❌ Trading error: {e}")
+        import traceback
+        traceback.print_exc()
+
 def show_strategy_comparison():
     """Show comparison of different strategy profiles"""
     from config.enhanced_settings import STRATEGY_PROFILES
@@ -277,6 +311,8 @@ def show_account_status():
     print("=" * 30)
     
     try:
+        from auth.kite_auth import KiteAuth
+        
         auth = KiteAuth()
         kite = auth.get_kite_instance()
         
@@ -311,7 +347,7 @@ def show_account_status():
 def run_backtest(args):
     """Run backtest with specified parameters"""
     print(f"🎯 Starting Backtest")
-    print(f"📊 Profile: {args.profile}")
+    print(f"📊 Profile: {args.config or args.profile}")
     print(f"📅 Period: {args.days} days")
     print(f"⏱️ Interval: {args.interval}")
     print("=" * 50)
@@ -322,21 +358,20 @@ def run_backtest(args):
         from trading.enhanced_strategy import EnhancedTradingStrategy
         from trading.position_sizer import EnhancedPositionSizer
         from trading.risk_manager import EnhancedRiskManager
-        from config.enhanced_settings import STRATEGY_PROFILES
+        from config.registry import load_profile
         
-        # Load strategy configuration
-        if args.profile in STRATEGY_PROFILES:
-            config = STRATEGY_PROFILES[args.profile]
-        else:
-            config = STRATEGY_PROFILES['balanced']
-            print(f"⚠️ Unknown profile '{args.profile}', using balanced")
+        # Load strategy configuration (a profile, or a config file via --config)
+        config = load_profile(args.config or args.profile)
         
         # Override account balance if provided
         if args.capital:
-            config = config.copy()
-            config['account_balance'] = args.capital
+            config = config.replace(account_balance=args.capital)
             print(f"💰 Using custom capital: ₹{args.capital:,.2f}")
         
+        if args.no_costs:
+            config = config.replace(transaction_costs=False)
+            print("⚠️ Transaction costs disabled - results are gross")
+        
         # Initialize components
         strategy = EnhancedTradingStrategy(config)
         position_sizer = EnhancedPositionSizer(config)
@@ -348,7 +383,9 @@ def run_backtest(args):
         # Fetch historical data
         data_fetcher = HistoricalDataFetcher()
         
-        if args.sample:
+        if args.data:
+            data = data_fetcher.load_data(args.data)
+        elif args.sample:
             print("🔄 Using sample data for testing")
             data = data_fetcher.generate_sample_data(args.days)
         else:
@@ -362,9 +399,14 @@ def run_backtest(args):
             print("❌ No data available for backtesting")
             return
         
-        # Run backtest
+        # Run backtest (identical reruns are served from the result cache)
+        cache = None
+        if not args.no_cache:
+            from backtesting.result_cache import BacktestResultCache
+            cache = BacktestResultCache()
+        
         print(f"🚀 Running backtest on {len(data)} data points...")
-        results = backtest_engine.run_backtest(data)
+        results = backtest_engine.run_backtest(data, cache=cache)
         
         # Display results
         print("\n" + backtest_engine.generate_report(results))
@@ -372,7 +414,7 @@ def run_backtest(args):
         # Save results if requested
         if args.save:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"backtest_results_{args.profile}_{timestamp}.json"
+            filename = f"backtest_results_{config.name}_{timestamp}.json"
             backtest_engine.save_results(results, filename)
             print(f"💾 Results saved to {filename}")
         
@@ -386,7 +428,7 @@ def run_backtest(args):
         # Performance vs targets
         print("\n📈 VS TARGETS:")
         target_win_rates = {'conservative': 65, 'balanced': 70, 'aggressive': 75, 'scalping': 70}
-        target_win_rate = target_win_rates.get(args.profile, 70)
+        target_win_rate = target_win_rates.get(config.name, target_win_rates.get(config.base, 70))
         
         win_rate_status = "✅" if results.win_rate >= target_win_rate else "❌"
         return_status = "✅" if results.total_return_percent > 0 else "❌"
@@ -396,6 +438,13 @@ def run_backtest(args):
         print(f"{return_status} Return: {results.total_return_percent:+.1f}% (Target: >0%)")
         print(f"{drawdown_status} Drawdown: {results.max_drawdown_percent:.1f}% (Target: <10%)")
         
+        # Distribution of metrics across resampled trade sequences
+        if args.monte_carlo and results.trades:
+            from backtesting.monte_carlo import MonteCarloSimulator
+            simulator = MonteCarloSimulator.from_results(results)
+            mc_results = simulator.simulate(n_simulations=args.monte_carlo)
+            print(simulator.generate_report(mc_results))
+        
     except ImportError as e:
         print(f"❌ Missing dependencies for backtesting: {e}")
         print("💡 Make sure all backtesting files are in place")
@@ -412,15 +461,28 @@ def compare_strategies_backtest(args):
     try:
         from backtesting.backtest_engine import BacktestEngine
         from backtesting.data_fetcher import HistoricalDataFetcher
-        from trading.enhanced_strategy import EnhancedTradingStrategy
-        from trading.position_sizer import EnhancedPositionSizer
-        from trading.risk_manager import EnhancedRiskManager
-        from config.enhanced_settings import STRATEGY_PROFILES
+        from backtesting.parallel import run_backtests
+        from config.registry import PROFILES
+        
+        strategies_to_test = ['conservative', 'balanced', 'aggressive', 'scalping']
+        configs = {profile: PROFILES.get(profile) for profile in strategies_to_test}
+        for path in args.config_files or []:
+            config = PROFILES.load(path)
+            name = config.name if config.name not in configs else f"{config.name}_custom"
+            configs[name] = config
+        overrides = {}
+        if args.capital:
+            overrides['account_balance'] = args.capital
+        if args.no_costs:
+            overrides['transaction_costs'] = False
+        configs = {name: config.replace(**overrides) for name, config in configs.items()}
         
         # Fetch data once for all strategies
         data_fetcher = HistoricalDataFetcher()
         
-        if args.sample:
+        if args.data:
+            data = data_fetcher.load_data(args.data)
+        elif args.sample:
             data = data_fetcher.generate_sample_data(args.days)
         else:
             data = data_fetcher.prepare_backtest_data(days_back=args.days)
@@ -429,40 +491,22 @@ def compare_strategies_backtest(args):
             print("❌ No data available for backtesting")
             return
         
-        print(f"📊 Testing {len(data)} data points across all strategies...")
+        print(f"📊 Testing {len(data)} data points across {len(configs)} strategies...")
         
-        strategies_to_test = ['conservative', 'balanced', 'aggressive', 'scalping']
-        results = {}
-        
-        # Test each strategy
-        for profile in strategies_to_test:
-            print(f"\n🔄 Testing {profile} strategy...")
-            
-            config = STRATEGY_PROFILES[profile].copy()
-            if args.capital:
-                config['account_balance'] = args.capital
-            
-            strategy = EnhancedTradingStrategy(config)
-            position_sizer = EnhancedPositionSizer(config)
-            risk_manager = EnhancedRiskManager(config)
-            
-            backtest_engine = BacktestEngine(strategy, position_sizer, risk_manager, config)
-            result = backtest_engine.run_backtest(data)
-            results[profile] = result
+        results = run_backtests(data, configs, workers=args.workers, use_cache=not args.no_cache, dataset=args.data)
         
         # Display comparison
         print("\n" + "🏆 STRATEGY COMPARISON RESULTS")
         print("=" * 60)
         
-        headers = ["Strategy", "Trades", "Win%", "Return%", "Drawdown%", "Profit Factor"]
-        print(f"{headers[0]:<12} {headers[1]:<7} {headers[2]:<6} {headers[3]:<8} {headers[4]:<10} {headers[5]:<12}")
-        print("-" * 60)
+        headers = ["Strategy", "Trades", "Win%", "Return%", "Drawdown%", "Profit Factor", "Costs"]
+        print(f"{headers[0]:<12} {headers[1]:<7} {headers[2]:<6} {headers[3]:<8} {headers[4]:<10} {headers[5]:<14} {headers[6]:<10}")
+        print("-" * 72)
         
-        for profile in strategies_to_test:
-            result = results[profile]
+        for profile, result in results.items():
             print(f"{profile:<12} {result.total_trades:<7} {result.win_rate:<6.1f} "
                   f"{result.total_return_percent:<8.1f} {result.max_drawdown_percent:<10.1f} "
-                  f"{result.profit_factor:<12.2f}")
+                  f"{result.profit_factor:<14.2f} ₹{result.total_costs:<9,.0f}")
         
         # Find best performing strategy
         best_return = max(results.items(), key=lambda x: x[1].total_return_percent)
@@ -494,86 +538,69 @@ def optimize_strategy(args):
     print("🔧 STRATEGY OPTIMIZATION")
     print("=" * 30)
     
+    if args.queue and args.method == 'tpe':
+        print("❌ TPE picks each trial from the previous ones - use --method random, grid, halving or hyperband with --queue")
+        return
+    
     try:
         from backtesting.backtest_engine import BacktestEngine
         from backtesting.data_fetcher import HistoricalDataFetcher
-        from trading.enhanced_strategy import EnhancedTradingStrategy
-        from trading.position_sizer import EnhancedPositionSizer
-        from trading.risk_manager import EnhancedRiskManager
-        from config.enhanced_settings import STRATEGY_PROFILES
+        from backtesting.optimizer import StrategyOptimizer
+        from config.registry import PROFILES
         
         # Fetch data
         data_fetcher = HistoricalDataFetcher()
-        data = data_fetcher.prepare_backtest_data(days_back=args.days) if not args.sample else data_fetcher.generate_sample_data(args.days)
+        if args.data:
+            data = data_fetcher.load_data(args.data)
+        else:
+            data = data_fetcher.prepare_backtest_data(days_back=args.days) if not args.sample else data_fetcher.generate_sample_data(args.days)
         
         if data.empty:
             print("❌ No data available for optimization")
             return
         
-        base_config = STRATEGY_PROFILES[args.profile].copy()
+        base_config = PROFILES.get(args.profile)
         if args.capital:
-            base_config['account_balance'] = args.capital
+            base_config = base_config.replace(account_balance=args.capital)
+        if args.no_costs:
+            base_config = base_config.replace(transaction_costs=False)
         
         print(f"🎯 Optimizing {args.profile} strategy parameters...")
         print(f"📊 Using {len(data)} data points")
         
-        # Parameters to optimize
-        supertrend_factors = [2.0, 2.5, 3.0, 3.5, 4.0]
-        min_confirmations = [2, 3, 4, 5]
-        risk_levels = [1.0, 1.5, 2.0, 2.5, 3.0]
-        
-        best_result = None
-        best_params = None
-        best_score = -float('inf')
-        
-        total_combinations = len(supertrend_factors) * len(min_confirmations) * len(risk_levels)
-        current_combination = 0
-        
-        print(f"🔄 Testing {total_combinations} parameter combinations...")
-        
-        for st_factor in supertrend_factors:
-            for min_conf in min_confirmations:
-                for risk_level in risk_levels:
-                    current_combination += 1
-                    
-                    # Create modified config
-                    test_config = base_config.copy()
-                    test_config['supertrend_factor'] = st_factor
-                    test_config['min_confirmations'] = min_conf
-                    test_config['max_risk_per_trade'] = risk_level
-                    
-                    # Run backtest
-                    strategy = EnhancedTradingStrategy(test_config)
-                    position_sizer = EnhancedPositionSizer(test_config)
-                    risk_manager = EnhancedRiskManager(test_config)
-                    
-                    backtest_engine = BacktestEngine(strategy, position_sizer, risk_manager, test_config)
-                    result = backtest_engine.run_backtest(data)
-                    
-                    # Calculate optimization score (weighted combination of metrics)
-                    if result.total_trades > 0:
-                        score = (
-                            result.total_return_percent * 0.4 +  # 40% weight on returns
-                            result.win_rate * 0.3 +              # 30% weight on win rate
-                            (100 - result.max_drawdown_percent) * 0.2 +  # 20% weight on low drawdown
-                            result.profit_factor * 10 * 0.1      # 10% weight on profit factor
-                        )
-                    else:
-                        score = -1000  # Penalty for no trades
-                    
-                    if score > best_score:
-                        best_score = score
-                        best_result = result
-                        best_params = {
-                            'supertrend_factor': st_factor,
-                            'min_confirmations': min_conf,
-                            'max_risk_per_trade': risk_level
-                        }
-                    
-                    # Progress update
-                    if current_combination % 10 == 0:
-                        progress = current_combination / total_combinations * 100
-                        print(f"📊 Progress: {progress:.0f}% ({current_combination}/{total_combinations})")
+        # With --queue, trials run on optimize-worker processes instead of here
+        evaluator, local_workers, stop_workers = None, [], None
+        if args.queue:
+            import multiprocessing
+            from backtesting.job_queue import QueueEvaluator, TrialQueue, run_worker
+            
+            evaluator = QueueEvaluator(TrialQueue(args.queue), data, base_config)
+            print(f"📮 Trials go to queue {args.queue}")
+            print(f"💡 Add workers on any machine sharing it: python3 cli_enhanced.py optimize-worker --queue {args.queue}")
+            if args.workers:
+                stop_workers = multiprocessing.Event()
+                local_workers = [multiprocessing.Process(target=run_worker, args=(args.queue,),
+                                                         kwargs={'stop_event': stop_workers}, daemon=True)
+                                 for _ in range(args.workers)]
+                for worker in local_workers:
+                    worker.start()
+                print(f"👷 Started {args.workers} local workers")
+        
+        # Search the parameter space (weak configs are pruned on a data prefix)
+        optimizer = StrategyOptimizer(data, base_config, seed=args.seed, evaluator=evaluator)
+        print(f"🔄 Searching with {args.method} ({args.trials} trials)...")
+        try:
+            outcome = optimizer.optimize(method=args.method, n_trials=args.trials)
+        finally:
+            if stop_workers is not None:
+                stop_workers.set()
+                for worker in local_workers:
+                    worker.join()
+        
+        best_params = outcome.best_params
+        best_result = outcome.best_result
+        best_score = outcome.best_score
+        print(f"📊 {outcome.evaluations} backtests over {outcome.rows_evaluated:,} candle-rows")
         
         # Display results
         print("\n🏆 OPTIMIZATION RESULTS")
@@ -598,23 +625,170 @@ def optimize_strategy(args):
             filename = f"optimized_{args.profile}_{timestamp}.json"
             BacktestEngine(None, None, None, {}).save_results(best_result, filename)
             
-            # Save optimized config
+            # Save optimized config (loadable with --config)
             config_filename = f"optimized_config_{args.profile}_{timestamp}.json"
-            optimized_config = base_config.copy()
-            optimized_config.update(best_params)
-            
-            import json
-            with open(config_filename, 'w') as f:
-                json.dump(optimized_config, f, indent=2)
+            optimized_config = base_config.replace(name=f"optimized_{args.profile}", **best_params)
+            PROFILES.save(optimized_config, config_filename, base=args.profile)
             
             print(f"\n💾 Results saved to {filename}")
-            print(f"⚙️ Optimized config saved to {config_filename}")
+            print(f"⚙️ Optimized config saved to {config_filename} (use with --config)")
         
     except Exception as e:
         print(f"❌ Optimization error: {e}")
         import traceback
         traceback.print_exc()
 
+def run_optimize_worker(args):
+    """Serve optimization trials from a job queue"""
+    print("👷 OPTIMIZATION WORKER")
+    print("=" * 30)
+    print(f"📮 Queue: {args.queue}")
+    
+    try:
+        from backtesting.job_queue import run_worker
+        
+        options = {'idle_timeout': args.idle_timeout, 'max_trials': args.max_trials, 'lease_seconds': args.lease}
+        if args.processes <= 1:
+            completed = run_worker(args.queue, **options)
+        else:
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=args.processes) as pool:
+                futures = [pool.submit(run_worker, args.queue, **options) for _ in range(args.processes)]
+                completed = sum(future.result() for future in futures)
+        print(f"✅ Completed {completed} trials")
+    except KeyboardInterrupt:
+        print("\n🛑 Worker stopped by user (its leased trial will be retried elsewhere)")
+    except Exception as e:
+        print(f"❌ Worker error: {e}")
+        import traceback
+        traceback.print_exc()
+
+def run_monte_carlo(args):
+    """Run Monte Carlo resampling on a saved backtest trade ledger"""
+    print("🎲 MONTE CARLO ANALYSIS")
+    print("=" * 30)
+    
+    try:
+        from backtesting.monte_carlo import MonteCarloSimulator
+        
+        simulator = MonteCarloSimulator.from_results_file(
+            args.results,
+            ruin_threshold_percent=args.ruin_threshold,
+            seed=args.seed
+        )
+        mc_results = simulator.simulate(
+            n_simulations=args.simulations,
+            method=args.method,
+            chunk_size=args.chunk_size,
+            workers=args.workers
+        )
+        print(simulator.generate_report(mc_results))
+        
+    except Exception as e:
+        print(f"❌ Monte Carlo error: {e}")
+        import traceback
+        traceback.print_exc()
+
+def calibrate_atr(args):
+    """Calibrate NIFTY → ETF ATR scaling from historical data"""
+    print(f"🔧 ATR CALIBRATION: NIFTY 50 → {args.trading}")
+    print("=" * 40)
+    
+    try:
+        from backtesting.data_fetcher import HistoricalDataFetcher
+        from trading.atr_calibration import ATRCalibrator
+        from config.enhanced_settings import INSTRUMENTS
+        
+        data_fetcher = HistoricalDataFetcher()
+        if args.sample:
+            data = data_fetcher.generate_sample_data(args.days)
+        else:
+            data = data_fetcher.prepare_backtest_data(
+                trading_instrument=INSTRUMENTS[args.trading]['token'],
+                days_back=args.days
+            )
+        
+        if data.empty:
+            print("❌ No data available for calibration")
+            return
+        
+        calibrator = ATRCalibrator(window=args.window)
+        previous = calibrator.get(args.trading)
+        calibration = calibrator.calibrate_frame(data, args.trading)
+        if not calibration:
+            print("❌ Calibration failed")
+            return
+        
+        calibrator.update(calibration)
+        
+        print(f"📊 Bars used: {calibration.samples}")
+        print(f"💱 Price ratio: {calibration.price_ratio:.5f}")
+        print(f"📈 Volatility beta: {calibration.vol_beta:.3f}")
+        print(f"🎯 500-pt NIFTY ATR → ₹{calibration.scale(500):.2f} {args.trading} ATR")
+        if previous:
+            print(f"🔄 Previous: ratio {previous.price_ratio:.5f}, beta {previous.vol_beta:.3f} "
+                  f"({previous.calibrated_at[:16]})")
+        print(f"💾 Saved to {calibrator.path}")
+        
+    except Exception as e:
+        print(f"❌ Calibration error: {e}")
+
+def replay_trading(args):
+    """Paper-trade stored candles through the live bot code path on a simulated clock"""
+    print(f"⏩ LIVE-PATH REPLAY: {args.profile.upper()}")
+    print("=" * 40)
+    
+    try:
+        from backtesting.data_fetcher import HistoricalDataFetcher
+        from backtesting.replay import ReplayDriver, compare_with_backtest, format_comparison
+        
+        data_fetcher = HistoricalDataFetcher()
+        if args.data:
+            data = data_fetcher.load_data(args.data)
+        elif args.sample:
+            print("🔄 Using sample data for testing")
+            data = data_fetcher.generate_sample_data(args.days)
+        else:
+            print("📊 Fetching real historical data...")
+            data = data_fetcher.prepare_backtest_data(days_back=args.days, interval=args.interval)
+        
+        if data.empty:
+            print("❌ No data available for replay")
+            return
+        
+        driver = ReplayDriver(args.profile, check_interval=args.check_interval, trading_instrument=args.trading,
+                              event_log=args.event_log)
+        results = driver.run(data)
+        
+        wins = [t for t in results.trades if t['pnl'] > 0]
+        print(f"\n📅 Period: {results.start:%Y-%m-%d %H:%M} → {results.end:%Y-%m-%d %H:%M}")
+        print(f"🔁 Cycles: {results.cycles:,} in {results.wall_seconds:.1f}s ({results.speedup:,.0f}x real time)")
+        print(f"📊 Trades: {len(results.trades)}, win rate "
+              f"{len(wins) / len(results.trades) * 100 if results.trades else 0:.1f}%")
+        print(f"💰 P&L: ₹{results.total_pnl:+,.2f}")
+        
+        if args.compare:
+            from backtesting.backtest_engine import BacktestEngine
+            from trading.enhanced_strategy import EnhancedTradingStrategy
+            from trading.position_sizer import EnhancedPositionSizer
+            from trading.risk_manager import EnhancedRiskManager
+            from config.enhanced_settings import STRATEGY_PROFILES
+            
+            config = dict(STRATEGY_PROFILES[args.profile], trading_symbol=driver.trading_symbol)
+            engine = BacktestEngine(
+                EnhancedTradingStrategy(config),
+                EnhancedPositionSizer(config, calibrator=driver.atr_calibrator),
+                EnhancedRiskManager(config),
+                config
+            )
+            backtest = engine.run_backtest(data)
+            print("\n" + format_comparison(compare_with_backtest(results, backtest, data)))
+        
+    except Exception as e:
+        print(f"❌ Replay error: {e}")
+        import traceback
+        traceback.print_exc()
+
 def fetch_and_save_data(args):
     """Fetch and save historical data"""
     print("📊 FETCHING HISTORICAL DATA")
@@ -640,44 +814,141 @@ def fetch_and_save_data(args):
     except Exception as e:
         print(f"❌ Data fetch error: {e}")
 
-def reset_position():
-    """Reset position tracking"""
+def convert_data(args):
+    """Convert a saved CSV into a memory-mapped dataset"""
+    print("🔄 CONVERTING HISTORICAL DATA")
+    print("=" * 30)
+    
+    try:
+        from backtesting.dataset import load_frame, write_dataset
+        
+        data = load_frame(args.source)
+        write_dataset(data, args.output)
+        print(f"✅ {len(data)} records from {args.source} saved as dataset {args.output}")
+        print(f"💡 Use it with --data {args.output}")
+    except Exception as e:
+        print(f"❌ Conversion error: {e}")
+
+def reset_position(args):
+    """Reset persisted position tracking for one or all profiles"""
     print("🔄 Position Reset")
     print("=" * 20)
-    print("This would reset any stuck position tracking.")
-    print("(Implementation depends on your specific setup)")
-    print("✅ Position tracking reset completed")
+    
+    try:
+        from enhanced_main import EnhancedTradingBot
+        from trading.state_journal import StateJournal
+        from config.enhanced_settings import STRATEGY_PROFILES
+        
+        profiles = [args.profile] if args.profile else list(STRATEGY_PROFILES)
+        
+        for profile in profiles:
+            journal = StateJournal(profile)
+            state = journal.load()
+            position = state.get('current_position') or {}
+            
+            if position.get('quantity', 0):
+                print(f"⚠️ {profile}: clearing tracked position of {position['quantity']} "
+                      f"{position.get('tradingsymbol')} @ ₹{position.get('entry_price', 0):.2f}")
+            else:
+                print(f"✅ {profile}: no open position tracked")
+            
+            state['current_position'] = EnhancedTradingBot.empty_position()
+            journal.snapshot(state)
+            journal.close()
+        
+        print("✅ Position tracking reset completed")
+        print("💡 Check your broker positions - this does not place any orders")
+        
+    except Exception as e:
+        print(f"❌ Reset error: {e}")
+
+def apply_broker_options(args):
+    """Select the broker backend (and simulator settings) for every KiteAuth in this run"""
+    if not getattr(args, 'broker', None):
+        return
+    
+    from config.settings import Settings
+    
+    Settings.BROKER = args.broker
+    overrides = {
+        'data_file': args.sim_data,
+        'ticks_file': args.sim_ticks,
+        'latency_ms': args.sim_latency_ms,
+        'latency_jitter_ms': args.sim_jitter_ms,
+        'error_rate': args.sim_error_rate,
+        'seed': args.sim_seed
+    }
+    Settings.SIMULATOR_CONFIG.update({key: value for key, value in overrides.items() if value is not None})
+    if args.broker == 'sim':
+        print(f"🧪 Broker: offline simulator ({Settings.SIMULATOR_CONFIG['data_file'] or 'sample data'})")
 
 def main():
     """Enhanced CLI main function with backtesting"""
+    from config.settings import Settings
+    
     parser = argparse.ArgumentParser(description='Enhanced Multi-Indicator Trading Bot CLI with Backtesting')
     subparsers = parser.add_subparsers(dest='command', help='Available commands')
     
+    # Broker selection, shared by every command that talks to Kite
+    broker_parser = argparse.ArgumentParser(add_help=False)
+    broker_parser.add_argument('--broker', choices=['kite', 'sim'],
+                               help='Broker backend: live Kite API or the offline simulator (default: kite)')
+    broker_parser.add_argument('--sim-data', metavar='PATH',
+                               help='Simulator candles: a dataset (or CSV) saved by `data fetch` (default: sample data)')
+    broker_parser.add_argument('--sim-ticks', metavar='CSV',
+                               help='Simulator ticks: timestamp, instrument_token, last_price')
+    broker_parser.add_argument('--sim-latency-ms', type=float,
+                               help='Simulator latency per request in ms')
+    broker_parser.add_argument('--sim-jitter-ms', type=float,
+                               help='Simulator random extra latency, up to this many ms')
+    broker_parser.add_argument('--sim-error-rate', type=float,
+                               help='Simulator probability of a failed request (0-1)')
+    broker_parser.add_argument('--sim-seed', type=int,
+                               help='Simulator random seed')
+    
     # Authentication command
     subparsers.add_parser('auth', help='Authenticate with Kite Connect')
     
     # Test command
-    subparsers.add_parser('test', help='Test all components')
+    subparsers.add_parser('test', help='Test all components', parents=[broker_parser])
     
     # Strategy comparison command
     subparsers.add_parser('compare', help='Compare strategy profiles')
     
     # Account status command
-    subparsers.add_parser('status', help='Show account and system status')
+    subparsers.add_parser('status', help='Show account and system status', parents=[broker_parser])
     
     # Trading command
-    trade_parser = subparsers.add_parser('trade', help='Start enhanced trading')
+    trade_parser = subparsers.add_parser('trade', help='Start enhanced trading', parents=[broker_parser])
     trade_parser.add_argument('--profile', choices=['conservative', 'balanced', 'aggressive', 'scalping'],
                             default='balanced', help='Strategy profile (default: balanced)')
+    trade_parser.add_argument('--config', metavar='PATH',
+                            help='Strategy config file (JSON/YAML/TOML); overrides --profile')
     trade_parser.add_argument('--signal', choices=['NIFTY_50'], default='NIFTY_50',
                             help='Signal source (default: NIFTY_50)')
     trade_parser.add_argument('--trading', choices=['NIFTYBEES', 'JUNIORBEES', 'BANKBEES'],
                             default='NIFTYBEES', help='Trading instrument (default: NIFTYBEES)')
+    trade_parser.add_argument('--event-log', metavar='PATH',
+                            help='Append every trading event (bars, signals, orders, fills, exits) to a JSON-lines file')
+    
+    # Multi-strategy trading command
+    multi_parser = subparsers.add_parser('trade-multi', help='Trade several profiles over one shared data feed',
+                                         parents=[broker_parser])
+    multi_parser.add_argument('--profiles', nargs='+', choices=['conservative', 'balanced', 'aggressive', 'scalping'],
+                            default=['conservative', 'aggressive'], help='Strategy profiles to run (default: conservative aggressive)')
+    multi_parser.add_argument('--signal', choices=['NIFTY_50'], default='NIFTY_50',
+                            help='Signal source (default: NIFTY_50)')
+    multi_parser.add_argument('--trading', choices=['NIFTYBEES', 'JUNIORBEES', 'BANKBEES'],
+                            default='NIFTYBEES', help='Trading instrument (default: NIFTYBEES)')
+    multi_parser.add_argument('--event-log', metavar='PATH',
+                            help='Append every profile\'s trading events to one JSON-lines file')
     
     # Backtesting command
     backtest_parser = subparsers.add_parser('backtest', help='Run strategy backtest')
     backtest_parser.add_argument('--profile', choices=['conservative', 'balanced', 'aggressive', 'scalping'],
                                default='balanced', help='Strategy profile to test (default: balanced)')
+    backtest_parser.add_argument('--config', metavar='PATH',
+                               help='Strategy config file (JSON/YAML/TOML); overrides --profile')
     backtest_parser.add_argument('--days', type=int, default=30,
                                help='Number of days of historical data (default: 30)')
     backtest_parser.add_argument('--interval', choices=['5minute', '15minute', '30minute', '60minute'],
@@ -686,8 +957,16 @@ def main():
                                help='Starting capital (overrides config)')
     backtest_parser.add_argument('--sample', action='store_true',
                                help='Use sample data instead of real historical data')
+    backtest_parser.add_argument('--data', metavar='PATH',
+                               help='Use a dataset (or CSV) saved by `data fetch` instead of fetching')
     backtest_parser.add_argument('--save', action='store_true',
                                help='Save backtest results to file')
+    backtest_parser.add_argument('--no-cache', action='store_true',
+                               help='Ignore cached results and rerun the backtest')
+    backtest_parser.add_argument('--no-costs', action='store_true',
+                               help='Ignore slippage and charges (gross results)')
+    backtest_parser.add_argument('--monte-carlo', type=int, metavar='N',
+                               help='Run N Monte Carlo resamples of the trade ledger')
     
     # Strategy comparison backtest
     compare_bt_parser = subparsers.add_parser('compare-backtest', help='Compare all strategies using backtesting')
@@ -697,8 +976,18 @@ def main():
                                  help='Starting capital for all strategies')
     compare_bt_parser.add_argument('--sample', action='store_true',
                                  help='Use sample data instead of real historical data')
+    compare_bt_parser.add_argument('--data', metavar='PATH',
+                                 help='Use a dataset (or CSV) saved by `data fetch` instead of fetching')
     compare_bt_parser.add_argument('--save', action='store_true',
                                  help='Save all backtest results to files')
+    compare_bt_parser.add_argument('--no-cache', action='store_true',
+                                 help='Ignore cached results and rerun every backtest')
+    compare_bt_parser.add_argument('--no-costs', action='store_true',
+                                 help='Ignore slippage and charges (gross results)')
+    compare_bt_parser.add_argument('--workers', type=int, default=1,
+                                 help='Worker processes; the data is shared, not copied (default: 1)')
+    compare_bt_parser.add_argument('--config-files', nargs='+', metavar='PATH',
+                                 help='Strategy config files (JSON/YAML/TOML) to compare alongside the profiles')
     
     # Strategy optimization
     optimize_parser = subparsers.add_parser('optimize', help='Optimize strategy parameters')
@@ -710,24 +999,110 @@ def main():
                                help='Starting capital (overrides config)')
     optimize_parser.add_argument('--sample', action='store_true',
                                help='Use sample data instead of real historical data')
+    optimize_parser.add_argument('--data', metavar='PATH',
+                               help='Use a dataset (or CSV) saved by `data fetch` instead of fetching')
     optimize_parser.add_argument('--save', action='store_true',
                                help='Save optimization results and config')
+    optimize_parser.add_argument('--method', choices=['grid', 'random', 'tpe', 'halving', 'hyperband'],
+                               default='tpe', help='Search method (default: tpe)')
+    optimize_parser.add_argument('--trials', type=int, default=40,
+                               help='Trials to run, or configs per bracket for halving/hyperband (default: 40)')
+    optimize_parser.add_argument('--seed', type=int,
+                               help='Random seed for reproducible searches')
+    optimize_parser.add_argument('--no-costs', action='store_true',
+                               help='Rank parameters on gross instead of net-of-cost results')
+    optimize_parser.add_argument('--queue', nargs='?', const=str(Settings.OPTIMIZER_QUEUE), metavar='PATH',
+                               help=f'Run trials through a job queue served by optimize-worker processes '
+                                    f'(default path: {Settings.OPTIMIZER_QUEUE})')
+    optimize_parser.add_argument('--workers', type=int, default=0,
+                               help='With --queue, also start N local worker processes (default: 0)')
+    
+    # Optimization queue worker
+    worker_parser = subparsers.add_parser('optimize-worker', help='Run optimization trials from a job queue')
+    worker_parser.add_argument('--queue', default=str(Settings.OPTIMIZER_QUEUE), metavar='PATH',
+                             help=f'Queue database (default: {Settings.OPTIMIZER_QUEUE})')
+    worker_parser.add_argument('--processes', type=int, default=1,
+                             help='Worker processes to run (default: 1)')
+    worker_parser.add_argument('--idle-timeout', type=float, metavar='SECONDS',
+                             help='Exit after this long with no trials to run (default: run until stopped)')
+    worker_parser.add_argument('--max-trials', type=int,
+                             help='Exit after completing this many trials')
+    worker_parser.add_argument('--lease', type=float, default=300,
+                             help='Seconds a trial stays leased without a heartbeat (default: 300)')
+    
+    # Live-path replay
+    replay_parser = subparsers.add_parser('replay', help='Replay stored candles through the live bot on a simulated clock')
+    replay_parser.add_argument('--profile', choices=['conservative', 'balanced', 'aggressive', 'scalping'],
+                             default='balanced', help='Strategy profile (default: balanced)')
+    replay_parser.add_argument('--trading', choices=['NIFTYBEES', 'JUNIORBEES', 'BANKBEES'],
+                             default='NIFTYBEES', help='Trading instrument (default: NIFTYBEES)')
+    replay_parser.add_argument('--days', type=int, default=30,
+                             help='Number of days of historical data (default: 30)')
+    replay_parser.add_argument('--interval', choices=['5minute', '15minute', '30minute', '60minute'],
+                             default='30minute', help='Data interval (default: 30minute)')
+    replay_parser.add_argument('--data', metavar='PATH',
+                             help='Replay a dataset (or CSV) saved by `data fetch` instead of fetching')
+    replay_parser.add_argument('--sample', action='store_true',
+                             help='Use sample data instead of real historical data')
+    replay_parser.add_argument('--check-interval', type=float,
+                             help='Seconds between bot cycles (default: the profile\'s check_interval)')
+    replay_parser.add_argument('--compare', action='store_true',
+                             help='Also run the backtest engine on the same data and diff the trades')
+    replay_parser.add_argument('--event-log', metavar='PATH',
+                             help='Write the replayed trading events (simulated timestamps) to a JSON-lines file')
+    
+    # ATR calibration
+    calib_parser = subparsers.add_parser('calibrate-atr', help='Calibrate NIFTY → ETF ATR scaling from history',
+                                         parents=[broker_parser])
+    calib_parser.add_argument('--trading', choices=['NIFTYBEES', 'JUNIORBEES', 'BANKBEES'],
+                            default='NIFTYBEES', help='Trading instrument (default: NIFTYBEES)')
+    calib_parser.add_argument('--days', type=int, default=30,
+                            help='Number of days of historical data (default: 30)')
+    calib_parser.add_argument('--window', type=int, default=500,
+                            help='Most recent bars to calibrate on (default: 500)')
+    calib_parser.add_argument('--sample', action='store_true',
+                            help='Use sample data instead of real historical data')
+    
+    # Monte Carlo analysis
+    mc_parser = subparsers.add_parser('montecarlo', help='Monte Carlo analysis of saved backtest results')
+    mc_parser.add_argument('--results', required=True,
+                         help='Backtest results JSON file (from --save)')
+    mc_parser.add_argument('--simulations', type=int, default=10000,
+                         help='Number of simulated trade sequences (default: 10000)')
+    mc_parser.add_argument('--method', choices=['bootstrap', 'shuffle'], default='bootstrap',
+                         help='Resampling method (default: bootstrap)')
+    mc_parser.add_argument('--chunk-size', type=int, default=5000,
+                         help='Paths simulated per chunk (default: 5000)')
+    mc_parser.add_argument('--workers', type=int, default=1,
+                         help='Worker processes (default: 1)')
+    mc_parser.add_argument('--ruin-threshold', type=float, default=50.0,
+                         help='Capital loss percent counted as ruin (default: 50)')
+    mc_parser.add_argument('--seed', type=int,
+                         help='Random seed for reproducible simulations')
     
     # Data management
     data_parser = subparsers.add_parser('data', help='Data management commands')
     data_subparsers = data_parser.add_subparsers(dest='data_command', help='Data commands')
     
     # Fetch data
-    fetch_parser = data_subparsers.add_parser('fetch', help='Fetch and save historical data')
+    fetch_parser = data_subparsers.add_parser('fetch', help='Fetch and save historical data',
+                                             parents=[broker_parser])
     fetch_parser.add_argument('--days', type=int, default=90,
                             help='Number of days to fetch (default: 90)')
     fetch_parser.add_argument('--interval', choices=['5minute', '15minute', '30minute', '60minute'],
                             default='30minute', help='Data interval (default: 30minute)')
-    fetch_parser.add_argument('--output', default='historical_data.csv',
-                            help='Output filename (default: historical_data.csv)')
+    fetch_parser.add_argument('--output', default='historical_data',
+                            help='Dataset directory, or a .csv file (default: historical_data)')
+    
+    # Convert a saved CSV into a dataset
+    convert_parser = data_subparsers.add_parser('convert', help='Convert a saved CSV into a memory-mapped dataset')
+    convert_parser.add_argument('source', help='CSV file saved by an older `data fetch`')
+    convert_parser.add_argument('output', help='Dataset directory to create')
     
     # Reset command
-    subparsers.add_parser('reset', help='Reset position tracking')
+    reset_parser = subparsers.add_parser('reset', help='Reset position tracking')
+    reset_parser.add_argument('--profile', choices=['conservative', 'balanced', 'aggressive', 'scalping'],
+                            help='Profile to reset (default: all profiles)')
     
     args = parser.parse_args()
     
@@ -740,20 +1115,27 @@ def main():
         print("  test              - Test all components")
         print("  status            - Show account and system status")
         print("  trade             - Start enhanced trading")
+        print("  trade-multi       - Trade several profiles over one data feed")
         print("  reset             - Reset position tracking")
         print("\n🎯 BACKTESTING:")
         print("  backtest          - Run strategy backtest")
         print("  compare-backtest  - Compare all strategies using backtesting")
         print("  optimize          - Optimize strategy parameters")
+        print("  optimize-worker   - Run optimization trials from a job queue")
+        print("  montecarlo        - Monte Carlo analysis of saved results")
+        print("  replay            - Replay candles through the live bot (simulated clock)")
         print("\n📈 ANALYSIS:")
         print("  compare           - Compare strategy profiles")
         print("  data fetch        - Fetch and save historical data")
+        print("  calibrate-atr     - Calibrate NIFTY → ETF ATR scaling")
         print("\nExample usage:")
         print("  python3 cli_enhanced.py auth")
         print("  python3 cli_enhanced.py backtest --profile balanced --days 30")
         print("  python3 cli_enhanced.py compare-backtest --days 60")
         print("  python3 cli_enhanced.py optimize --profile balanced --days 90")
         print("  python3 cli_enhanced.py trade --profile balanced")
+        print("  python3 cli_enhanced.py trade-multi --profiles conservative aggressive")
+        print("  python3 cli_enhanced.py trade --broker sim --sim-latency-ms 150")
         print("\nStrategy Profiles:")
         print("  conservative - Lower risk, 60-65% win rate target")
         print("  balanced     - Optimal risk/reward, 65-70% win rate")
@@ -762,6 +1144,8 @@ def main():
         print("\n🎯 Backtesting allows you to test strategies on historical data before live trading!")
         return
     
+    apply_broker_options(args)
+    
     # Execute commands
     if args.command == 'auth':
         auth_enhanced()
@@ -778,6 +1162,9 @@ def main():
     elif args.command == 'trade':
         run_enhanced_trading(args)
     
+    elif args.command == 'trade-multi':
+        run_multi_strategy_trading(args)
+    
     elif args.command == 'backtest':
         run_backtest(args)
     
@@ -787,14 +1174,28 @@ def main():
     elif args.command == 'optimize':
         optimize_strategy(args)
     
+    elif args.command == 'optimize-worker':
+        run_optimize_worker(args)
+    
+    elif args.command == 'montecarlo':
+        run_monte_carlo(args)
+    
+    elif args.command == 'replay':
+        replay_trading(args)
+    
+    elif args.command == 'calibrate-atr':
+        calibrate_atr(args)
+    
     elif args.command == 'data':
         if args.data_command == 'fetch':
             fetch_and_save_data(args)
+        elif args.data_command == 'convert':
+            convert_data(args)
         else:
-            print("Available data commands: fetch")
+            print("Available data commands: fetch, convert")
     
     elif args.command == 'reset':
-        reset_position()
+        reset_position(args)
     
     else:
         parser.print_help()
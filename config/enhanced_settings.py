@@ -127,6 +127,12 @@ MARKET_CONFIG = {
     'trading_days': [0, 1, 2, 3, 4],
 }
 
+# Exit levels as multiples of the instrument-scaled ATR (live bot and backtests)
+EXIT_ATR_MULTIPLES = {
+    'stop_loss': 2.5,
+    'take_profit': 3.0
+}
+
 # Instruments configuration (unchanged)
 INSTRUMENTS = {
     'NIFTY_50': {
@@ -0,0 +1,376 @@
+# config/registry.py
+
+import json
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from config.enhanced_settings import STRATEGY_PROFILES
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+CONFIG_SUFFIXES = ('.json', '.yaml', '.yml', '.toml')
+
+
+class ConfigError(ValueError):
+    """A strategy config that failed to load or validate"""
+
+
+# Known settings: key -> (kind, low, high). Bounds are inclusive; None is open.
+# Keys not listed here are still accepted (components read them with
+# config.get defaults) but must be plain scalars.
+CONFIG_SCHEMA = {
+    'supertrend_period': ('int', 1, None),
+    'supertrend_factor': ('number', 0.1, None),
+    'rsi_period': ('int', 2, None),
+    'rsi_oversold': ('number', 0, 100),
+    'rsi_overbought': ('number', 0, 100),
+    'macd_fast': ('int', 1, None),
+    'macd_slow': ('int', 2, None),
+    'macd_signal': ('int', 1, None),
+    'bb_period': ('int', 2, None),
+    'bb_std': ('number', 0.1, None),
+    'volume_period': ('int', 1, None),
+    'volume_threshold': ('number', 0, None),
+    'sr_period': ('int', 1, None),
+    'min_confirmations': ('int', 1, 11),
+    'max_risk_per_trade': ('number', 0.01, 100),
+    'max_daily_loss': ('number', 0.01, 100),
+    'stop_loss_atr_multiple': ('number', 0.1, None),
+    'take_profit_risk_ratio': ('number', 0.1, None),
+    'max_drawdown_limit': ('number', 0.01, 100),
+    'max_position_value': ('number', 0.01, 100),
+    'max_trades_per_day': ('int', 1, None),
+    'base_position_size': ('number', 0.01, None),
+    'confidence_multiplier': ('bool', None, None),
+    'volatility_adjustment': ('bool', None, None),
+    'account_balance': ('number', 1, None),
+    'check_interval': ('number', 1, None),
+    'regime_filter_enabled': ('bool', None, None),
+    'min_hold_time_hours': ('number', 0, None),
+    'signal_reversal_threshold': ('number', 0, 1),
+    'transaction_costs': ('bool', None, None),
+}
+
+# (low key, high key): low must be strictly below high
+ORDERED_PAIRS = (
+    ('rsi_oversold', 'rsi_overbought'),
+    ('macd_fast', 'macd_slow'),
+)
+
+
+def _plain(value: Any) -> Any:
+    """numpy scalars -> Python scalars, lists -> tuples (hashable)"""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, list):
+        return tuple(_plain(v) for v in value)
+    return value
+
+
+def _compile_check(key: str, kind: str, low, high) -> Callable[[Any], Any]:
+    """One validator per schema entry, built once at import"""
+
+    def check(value):
+        value = _plain(value)
+        if kind == 'bool':
+            if not isinstance(value, bool):
+                raise ConfigError(f"{key} must be true/false, got {value!r}")
+            return value
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ConfigError(f"{key} must be a number, got {value!r}")
+        if kind == 'int':
+            if value != int(value):
+                raise ConfigError(f"{key} must be a whole number, got {value!r}")
+            value = int(value)
+        if (low is not None and value < low) or (high is not None and value > high):
+            raise ConfigError(f"{key} must be in [{low if low is not None else '-inf'}, "
+                              f"{high if high is not None else 'inf'}], got {value!r}")
+        return value
+
+    return check
+
+
+def _check_extra(key: str, value: Any) -> Any:
+    value = _plain(value)
+    if value is not None and not isinstance(value, (bool, int, float, str, tuple)):
+        raise ConfigError(f"{key} must be a scalar or list, got {type(value).__name__}")
+    try:
+        hash(value)
+    except TypeError:
+        raise ConfigError(f"{key} must hold only scalars, got {value!r}")
+    return value
+
+
+_CHECKS: Dict[str, Callable[[Any], Any]] = {key: _compile_check(key, *spec) for key, spec in CONFIG_SCHEMA.items()}
+
+
+def validate_config(values: Mapping, base: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Validate values (merged over an already-valid base); returns a new dict
+
+    Only the keys in values are checked, so deriving a config from a
+    validated one costs O(changed keys). All problems are reported together.
+    """
+    merged = dict(base) if base else {}
+    errors = []
+    for key, value in values.items():
+        if not isinstance(key, str):
+            errors.append(f"setting names must be strings, got {key!r}")
+            continue
+        check = _CHECKS.get(key)
+        try:
+            merged[key] = check(value) if check else _check_extra(key, value)
+        except ConfigError as e:
+            errors.append(str(e))
+    for low, high in ORDERED_PAIRS:
+        if low in merged and high in merged and not merged[low] < merged[high]:
+            errors.append(f"{low} ({merged[low]}) must be below {high} ({merged[high]})")
+    if errors:
+        raise ConfigError("; ".join(errors))
+    return merged
+
+
+class StrategyConfig(Mapping):
+    """
+    Frozen, validated strategy settings
+
+    Reads like the profile dicts (config['key'], config.get(...), **config)
+    so every component takes it unchanged. Equality and hash cover the
+    settings only - not the name - so equal configs share cache entries
+    and can key dicts. Derive variants with replace().
+    """
+
+    __slots__ = ('name', 'base', '_values', '_hash')
+
+    def __init__(self, values: Mapping, name: str = 'custom', base: Optional[str] = None):
+        self._init(validate_config(values), name, base)
+
+    def _init(self, values: Dict[str, Any], name: str, base: Optional[str]):
+        object.__setattr__(self, '_values', values)
+        object.__setattr__(self, 'name', name)
+        object.__setattr__(self, 'base', base)
+        object.__setattr__(self, '_hash', None)
+
+    @classmethod
+    def _trusted(cls, values: Dict[str, Any], name: str, base: Optional[str]) -> 'StrategyConfig':
+        config = cls.__new__(cls)
+        config._init(values, name, base)
+        return config
+
+    def __setattr__(self, key, value):
+        raise AttributeError("StrategyConfig is frozen; use replace()")
+
+    def __delattr__(self, key):
+        raise AttributeError("StrategyConfig is frozen")
+
+    def __getitem__(self, key: str) -> Any:
+        return self._values[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._values)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __contains__(self, key) -> bool:
+        return key in self._values
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self._values.get(key, default)
+
+    def __hash__(self) -> int:
+        if self._hash is None:
+            object.__setattr__(self, '_hash', hash(frozenset(self._values.items())))
+        return self._hash
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, StrategyConfig):
+            return hash(self) == hash(other) and self._values == other._values
+        return Mapping.__eq__(self, other)
+
+    def __reduce__(self):
+        return StrategyConfig._trusted, (self._values, self.name, self.base)
+
+    def __repr__(self) -> str:
+        base = f", base={self.base!r}" if self.base else ""
+        return f"StrategyConfig({self.name!r}{base}, {len(self._values)} settings)"
+
+    def replace(self, name: Optional[str] = None, **changes) -> 'StrategyConfig':
+        """A copy with changes applied (only the changed keys are re-validated)"""
+        if not changes:
+            return self if name is None else StrategyConfig._trusted(self._values, name, self.base)
+        return StrategyConfig._trusted(validate_config(changes, self._values), name or self.name, self.base)
+
+    def diff(self, other: Mapping) -> Dict[str, Any]:
+        """Settings whose value differs from other (or that other lacks)"""
+        return {key: value for key, value in self._values.items()
+                if key not in other or other[key] != value}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {key: list(value) if isinstance(value, tuple) else value for key, value in self._values.items()}
+
+
+def _read_file(path: Path) -> Dict[str, Any]:
+    suffix = path.suffix.lower()
+    if suffix not in CONFIG_SUFFIXES:
+        raise ConfigError(f"{path}: unsupported config format (use {', '.join(CONFIG_SUFFIXES)})")
+    try:
+        if suffix == '.json':
+            with open(path, 'r') as f:
+                document = json.load(f)
+        elif suffix == '.toml':
+            try:
+                import tomllib
+            except ImportError:  # Python < 3.11
+                import tomli as tomllib
+            with open(path, 'rb') as f:
+                document = tomllib.load(f)
+        else:
+            import yaml
+            with open(path, 'r') as f:
+                document = yaml.safe_load(f) or {}
+    except ImportError as e:
+        raise ConfigError(f"{path}: reading {suffix} configs needs an extra package ({e.name})")
+    except OSError as e:
+        raise ConfigError(f"{path}: {e.strerror}")
+    except ValueError as e:  # JSON/TOML decode errors
+        raise ConfigError(f"{path}: {e}")
+    if not isinstance(document, dict):
+        raise ConfigError(f"{path}: expected a mapping of settings at the top level")
+    return document
+
+
+def _toml_value(value: Any) -> str:
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, (list, tuple)):
+        return '[' + ', '.join(_toml_value(v) for v in value) + ']'
+    if isinstance(value, str):
+        return json.dumps(value)
+    return repr(value)
+
+
+def _write_file(path: Path, document: Dict[str, Any]):
+    suffix = path.suffix.lower()
+    if suffix not in CONFIG_SUFFIXES:
+        raise ConfigError(f"{path}: unsupported config format (use {', '.join(CONFIG_SUFFIXES)})")
+    if suffix == '.toml':
+        # Configs are flat scalars, so no TOML writer dependency is needed
+        missing = [key for key, value in document.items() if value is None]
+        if missing:
+            raise ConfigError(f"{path}: TOML cannot store empty values ({', '.join(missing)})")
+        text = ''.join(f"{key} = {_toml_value(value)}\n" for key, value in document.items())
+    elif suffix == '.json':
+        text = json.dumps(document, indent=2) + '\n'
+    else:
+        try:
+            import yaml
+        except ImportError as e:
+            raise ConfigError(f"{path}: writing {suffix} configs needs an extra package ({e.name})")
+        text = yaml.safe_dump(document, sort_keys=False)
+    with open(path, 'w') as f:
+        f.write(text)
+
+
+class ProfileRegistry:
+    """
+    Named strategy configs: the built-in profiles plus any loaded from files
+
+    A config file (JSON, YAML or TOML) holds setting overrides plus two
+    optional keys: "extends" - a registered profile name or another config
+    file, relative to this one (default balanced) - and "name" (default the
+    file name). Inheritance chains are resolved and the result validated
+    once, into a StrategyConfig.
+    """
+
+    def __init__(self, profiles: Optional[Mapping[str, Mapping]] = None):
+        self._profiles: Dict[str, StrategyConfig] = {}
+        for name, values in (profiles if profiles is not None else STRATEGY_PROFILES).items():
+            self.register(StrategyConfig(values, name=name))
+
+    def __contains__(self, name) -> bool:
+        return name in self._profiles
+
+    def names(self) -> List[str]:
+        return list(self._profiles)
+
+    def register(self, config: StrategyConfig) -> StrategyConfig:
+        self._profiles[config.name] = config
+        return config
+
+    def get(self, name: str) -> StrategyConfig:
+        try:
+            return self._profiles[name]
+        except KeyError:
+            raise ConfigError(f"Unknown profile '{name}'. Choose from {self.names()}") from None
+
+    def resolve(self, name_or_path: str) -> StrategyConfig:
+        """A registered profile by name, else a config file by path"""
+        if name_or_path in self._profiles:
+            return self._profiles[name_or_path]
+        if Path(name_or_path).suffix.lower() in CONFIG_SUFFIXES:
+            return self.load(name_or_path)
+        raise ConfigError(f"'{name_or_path}' is neither a profile ({', '.join(self.names())}) nor a config file")
+
+    def load(self, path: str, register: bool = False) -> StrategyConfig:
+        """Read, resolve 'extends' and validate a config file"""
+        config = self._load(Path(path).resolve(), ())
+        if register:
+            self.register(config)
+        logger.info(f"⚙️ Loaded {config.name} config from {path}"
+                    + (f" (extends {config.base})" if config.base else ""))
+        return config
+
+    def _load(self, path: Path, chain: Tuple[Path, ...]) -> StrategyConfig:
+        if path in chain:
+            raise ConfigError(f"Circular extends: {' -> '.join(str(p) for p in chain + (path,))}")
+        document = _read_file(path)
+        base_ref = document.pop('extends', 'balanced')
+        name = document.pop('name', path.stem)
+        if not isinstance(base_ref, str) or not isinstance(name, str):
+            raise ConfigError(f"{path}: 'extends' and 'name' must be strings")
+
+        if base_ref in self._profiles:
+            parent = self._profiles[base_ref]
+        elif Path(base_ref).suffix.lower() in CONFIG_SUFFIXES:
+            parent = self._load((path.parent / base_ref).resolve(), chain + (path,))
+        else:
+            raise ConfigError(f"{path}: cannot extend '{base_ref}' - not a profile ({', '.join(self.names())}) "
+                              f"or a config file")
+        try:
+            return StrategyConfig._trusted(validate_config(document, parent._values), name, base_ref)
+        except ConfigError as e:
+            raise ConfigError(f"{path}: {e}") from None
+
+    def save(self, config: StrategyConfig, path: str, base: Optional[str] = None) -> Path:
+        """
+        Write config to path (format from the suffix)
+
+        With a registered base (default config.base) only the settings that
+        differ from it are written, under "extends", so the file stays
+        readable and picks up later changes to the base profile.
+        """
+        path = Path(path)
+        base = base or config.base
+        document = {'name': config.name}
+        if base in self._profiles:
+            document['extends'] = base
+            document.update(config.diff(self._profiles[base]))
+        else:
+            document.update(config)
+        _write_file(path, {key: list(v) if isinstance(v, tuple) else v for key, v in document.items()})
+        logger.info(f"💾 Saved {config.name} config to {path}")
+        return path
+
+
+# Built-in profiles; file configs resolve against these
+PROFILES = ProfileRegistry()
+
+
+def load_profile(name_or_path: str) -> StrategyConfig:
+    """A built-in profile by name, or a config file by path"""
+    return PROFILES.resolve(name_or_path)
@@ -20,6 +20,10 @@ class Settings:
     CONFIG_FILE = Path('saved_trading_config.json')
     DATA_DIR = Path('data')
     LOGS_DIR = Path('logs')
+    BACKTEST_CACHE_DIR = Path('data/backtest_cache')
+    BACKTEST_CACHE_MAX_MB = 256
+    OPTIMIZER_QUEUE = Path('data/optimizer_queue.db')
+    STATE_DIR = Path('data/state')
     
     # API Configuration
     API_CONFIG = {
@@ -43,6 +47,25 @@ class Settings:
         'max_trade_amount': 4000
     }
     
+    # Broker backend: 'kite' for the live API, 'sim' for the offline simulator
+    BROKER = os.getenv('BROKER', 'kite')
+    
+    # Offline Kite simulator (trading/kite_simulator.py); no data_file means sample data
+    SIMULATOR_CONFIG = {
+        'data_file': os.getenv('SIM_DATA_FILE'),
+        'ticks_file': os.getenv('SIM_TICKS_FILE'),
+        'sample_days': 30,
+        'warmup_bars': 200,
+        'speed': 1.0,
+        'latency_ms': float(os.getenv('SIM_LATENCY_MS', '0')),
+        'latency_jitter_ms': 0.0,
+        'error_rate': float(os.getenv('SIM_ERROR_RATE', '0')),
+        'rate_limits': None,            # Kite's limits unless overridden per endpoint group
+        'rate_limit_mode': 'raise',
+        'account_balance': 100000.0,
+        'seed': 42
+    }
+    
     # Safety Configuration
     SAFETY_CONFIG = {
         'dry_run_mode': os.getenv('DRY_RUN_MODE', 'false').lower() == 'true',
@@ -1,52 +1,132 @@
 # enhanced_main.py - FIXED VERSION WITH IMPROVED POSITION MANAGEMENT
 
-import time
 import signal
 import sys
+import threading
 from datetime import datetime, timedelta
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+
+import pandas as pd
 
 # Import existing components
 from auth.kite_auth import KiteAuth
-from trading.executor import OrderExecutor
+from trading.executor import OrderExecutor, TERMINAL_STATUSES
+from utils.clock import SYSTEM_CLOCK
 from utils.logger import get_logger
 
 # Import new enhanced components
 from trading.enhanced_strategy import EnhancedTradingStrategy
 from trading.position_sizer import EnhancedPositionSizer
 from trading.risk_manager import EnhancedRiskManager
-from config.enhanced_settings import STRATEGY_PROFILES, MARKET_CONFIG, INSTRUMENTS
+from trading.state_journal import StateJournal
+from trading.trade_stats import TradeStats
+from trading.valuation import MarkToMarket
+from trading.reconciler import BrokerReconciler
+from trading.market_feed import MarketDataFeed
+from trading.stop_monitor import StopLossMonitor
+from trading.atr_calibration import ATRCalibrator
+from trading.event_bus import (BarClosed, Fill, OrderPlaced, PositionExit, RiskStop, SignalComputed,
+                               create_event_bus)
+from config.enhanced_settings import MARKET_CONFIG, INSTRUMENTS, EXIT_ATR_MULTIPLES
+from config.registry import PROFILES, StrategyConfig
 
 logger = get_logger(__name__)
 
 class EnhancedTradingBot:
     """Enhanced trading bot with improved position management and regime filtering"""
     
-    def __init__(self, strategy_profile='balanced'):
-        # Load strategy configuration
-        if strategy_profile in STRATEGY_PROFILES:
-            self.config = STRATEGY_PROFILES[strategy_profile]
+    def __init__(self, strategy_profile='balanced', restore_state=True, install_signal_handlers=True,
+                 broker=None, clock=None, state_dir=None, events=None, event_log=None):
+        # Load strategy configuration: a profile name or a loaded StrategyConfig
+        if isinstance(strategy_profile, StrategyConfig):
+            self.config = strategy_profile
+            strategy_profile = strategy_profile.name
+            logger.info(f"✅ Using {strategy_profile} strategy config")
+        elif strategy_profile in PROFILES:
+            self.config = PROFILES.get(strategy_profile)
             logger.info(f"✅ Loaded {strategy_profile} strategy profile")
         else:
-            self.config = STRATEGY_PROFILES['balanced']
+            self.config = PROFILES.get('balanced')
             logger.warning(f"⚠️ Unknown profile '{strategy_profile}', using balanced")
         
         # Store profile name
         self.strategy_profile = strategy_profile
         
+        # Wall clock when live; a SimulatedClock when replaying stored candles
+        self.clock = clock or SYSTEM_CLOCK
+        
         # Initialize trading components
-        self.auth = KiteAuth()
+        self.auth = KiteAuth(broker)
         self.kite = None
         self.executor = None
+        self.reconciler = None
+        self.stop_monitor = None
+        # Reconciler whose latest poll stands in for order fetches (a multi-profile runner sets its own)
+        self.snapshot_source = None
         
         # Initialize enhanced components
         self.strategy = EnhancedTradingStrategy(self.config)
-        self.position_sizer = EnhancedPositionSizer(self.config)
-        self.risk_manager = EnhancedRiskManager(self.config)
+        self.atr_calibrator = ATRCalibrator(
+            refresh_interval=self.config.get('atr_calibration_refresh_hours', 6) * 3600
+        )
+        self.position_sizer = EnhancedPositionSizer(self.config, calibrator=self.atr_calibrator)
+        self.risk_manager = EnhancedRiskManager(self.config, clock=self.clock)
+        self.valuation = MarkToMarket(self.risk_manager, self.config['account_balance'])
         
         # Trading state
         self.is_running = False
-        self.current_position = {
+        self.current_position = self.empty_position()
+        # Held by anything that reads-then-changes the position (slow loop, stop monitor, reconciler)
+        self.position_lock = threading.RLock()
+        
+        # Performance tracking: running totals plus the most recent trade records
+        self.trade_stats = TradeStats(max_recent=self.config.get('trade_history_size', 200))
+        
+        # Market data: incrementally refreshed candles plus latest price
+        self.feed = MarketDataFeed(history_days=2, clock=self.clock)
+        self.last_signal = "HOLD"
+        self.last_bar_time = None
+        # Orders placed but not yet reported complete: order id -> 'entry' or 'exit'
+        self.pending_fills: Dict[str, str] = {}
+        
+        # Bars, signals, orders, fills, exits and risk stops go out on an event bus;
+        # a multi-profile runner passes one shared bus and closes it itself
+        self.owns_events = events is None
+        self.events = create_event_bus(event_log) if events is None else events
+        
+        # NEW: Enhanced settings
+        self.min_hold_time_hours = self.config.get('min_hold_time_hours', 2)
+        self.signal_reversal_threshold = self.config.get('signal_reversal_threshold', 0.65)
+        
+        # Exchange-resident SL-M stop + LIMIT target placed after each entry fill
+        self.use_native_exits = self.config.get('use_native_exits', False)
+        
+        # Crash-safe state journal (position, risk counters, bar window)
+        self.journal = StateJournal(
+            strategy_profile,
+            state_dir=state_dir,
+            snapshot_interval=self.config.get('state_snapshot_interval', 300)
+        )
+        self.risk_manager.event_sink = lambda event: self.journal.archive('risk_event', event)
+        if restore_state:
+            self.restore_state()
+        
+        # Signal handlers for graceful shutdown (a multi-profile runner installs its own)
+        if install_signal_handlers:
+            signal.signal(signal.SIGTERM, self.shutdown_handler)
+            signal.signal(signal.SIGINT, self.shutdown_handler)
+        
+        logger.info("🚀 Enhanced Trading Bot initialized with improved position management")
+        logger.info(f"📊 Strategy: {strategy_profile}")
+        logger.info(f"🎯 Min confirmations: {self.config['min_confirmations']}")
+        logger.info(f"💰 Account balance: ₹{self.config['account_balance']:,.2f}")
+        logger.info(f"⏰ Min hold time: {self.min_hold_time_hours} hours")
+        logger.info(f"🔄 Reversal threshold: {self.signal_reversal_threshold:.1%}")
+    
+    @staticmethod
+    def empty_position() -> Dict[str, Any]:
+        """Flat position record"""
+        return {
             "quantity": 0,
             "entry_price": 0,
             "entry_time": None,
@@ -56,27 +136,207 @@ class EnhancedTradingBot:
             "symbol": None,
             "tradingsymbol": None,
             "confidence": 0,
+            "quality_score": 0,
             "atr": 0
         }
+    
+    @property
+    def daily_trades(self):
+        """Trade records of the current trading day"""
+        return self.trade_stats.today_trades()
+    
+    @property
+    def total_pnl(self) -> float:
+        """Realized P&L of the current trading day"""
+        return self.trade_stats.today.pnl
+    
+    def roll_trading_day(self):
+        """Start a new trading day: archive yesterday's stats and reset daily risk counters"""
+        today = self.clock.now().date()
+        if self.trade_stats.day == today:
+            return
+        with self.position_lock:  # the stop monitor books exits from its own thread
+            new_session = self.trade_stats.day is None
+            closed = self.trade_stats.roll(today)
+            if closed:
+                self.journal.archive('day', closed)
+                logger.info(f"📅 [{self.strategy_profile}] {closed['day']} closed: {closed['trades']} trades, "
+                            f"P&L ₹{closed['pnl']:.2f}, {closed['win_rate']:.1f}% win rate")
+            if not new_session:
+                self.risk_manager.reset_daily_counters()
+            # The broker's order book starts empty each day - unconfirmed orders won't show up again
+            self.pending_fills.clear()
+    
+    def get_state(self) -> Dict[str, Any]:
+        """Full bot state for a journal snapshot"""
+        state = {
+            'current_position': self.current_position,
+            'daily_trades': self.daily_trades,
+            'total_pnl': self.total_pnl,
+            'risk': self.risk_manager.get_state()
+        }
+        bar_window = self.feed.get_state()
+        if bar_window:
+            state['bar_window'] = bar_window
+        return state
+    
+    def save_snapshot(self):
+        """Fold the journal into a snapshot"""
+        try:
+            self.journal.snapshot(self.get_state())
+        except Exception as e:
+            logger.error(f"❌ Failed to write state snapshot: {e}")
+    
+    def restore_state(self):
+        """Warm restart: restore position, risk counters and bar window from the journal"""
+        try:
+            state = self.journal.load()
+        except Exception as e:
+            logger.error(f"❌ Failed to load state journal: {e}")
+            return
         
-        # Performance tracking
-        self.daily_trades = []
-        self.total_pnl = 0
+        if not state:
+            return
         
-        # NEW: Enhanced settings
-        self.min_hold_time_hours = self.config.get('min_hold_time_hours', 2)
-        self.signal_reversal_threshold = self.config.get('signal_reversal_threshold', 0.65)
+        position = state.get('current_position')
+        if position:
+            self.current_position = {**self.empty_position(), **position}
         
-        # Signal handlers for graceful shutdown
-        signal.signal(signal.SIGTERM, self.shutdown_handler)
-        signal.signal(signal.SIGINT, self.shutdown_handler)
+        # Daily stats only carry over within the same trading day
+        today = self.clock.now().date()
+        self.trade_stats.roll(today)
+        for trade in state.get('daily_trades', []):
+            if isinstance(trade.get('exit_time'), datetime) and trade['exit_time'].date() == today:
+                self.trade_stats.record(trade)
         
-        logger.info("🚀 Enhanced Trading Bot initialized with improved position management")
-        logger.info(f"📊 Strategy: {strategy_profile}")
-        logger.info(f"🎯 Min confirmations: {self.config['min_confirmations']}")
-        logger.info(f"💰 Account balance: ₹{self.config['account_balance']:,.2f}")
-        logger.info(f"⏰ Min hold time: {self.min_hold_time_hours} hours")
-        logger.info(f"🔄 Reversal threshold: {self.signal_reversal_threshold:.1%}")
+        if state.get('risk'):
+            self.risk_manager.restore_state(state['risk'])
+        
+        if state.get('bar_window'):
+            self.feed.restore_state(state['bar_window'])
+        
+        if self.current_position['quantity'] != 0:
+            logger.info(f"♻️ Restored open position: {self.current_position['quantity']} "
+                        f"{self.current_position['tradingsymbol']} @ ₹{self.current_position['entry_price']:.2f}")
+    
+    def on_position_changed(self):
+        """Persist a position change and publish it to the broker reconciler"""
+        self.journal.record_position(self.current_position)
+        if self.reconciler:
+            self.reconciler.watch(self.current_position)
+    
+    def start_reconciler(self):
+        """Start background broker reconciliation for the live loop"""
+        self.reconciler = BrokerReconciler(
+            self.executor,
+            poll_interval=self.config.get('reconcile_interval', 15)
+        )
+        self.reconciler.watch(self.current_position)
+        self.reconciler.start()
+        self.snapshot_source = self.reconciler
+    
+    def process_reconciliation_events(self):
+        """Apply broker mismatches raised by the reconciler"""
+        if not self.reconciler:
+            return
+        
+        for event in self.reconciler.drain_events():
+            with self.position_lock:
+                self.apply_reconciliation_event(event)
+    
+    def apply_reconciliation_event(self, event):
+        """Bring the tracked position in line with one broker mismatch"""
+        # Ignore events raised against a position we have since changed
+        if event.version != self.reconciler.version:
+            return
+        
+        if event.status == "CLOSED_EXTERNALLY":
+            # Our own native stop/target closing the position is not an external close
+            if self.sync_native_exits():
+                return
+            logger.warning(f"📉 {event.tradingsymbol} closed at broker (auto square-off?) - "
+                           f"booking {event.expected_quantity} shares")
+            self.risk_manager.log_risk_event(
+                "EXTERNAL_CLOSE",
+                f"{event.tradingsymbol} position of {event.expected_quantity} closed outside the bot"
+            )
+            snapshot = self.reconciler.snapshot
+            self.book_external_close(snapshot.orders, snapshot.positions)
+        elif event.status == "SYNCED" and event.broker_quantity is not None:
+            logger.warning(f"🔄 Position resynced from broker: {event.expected_quantity} → {event.broker_quantity}")
+            self.current_position['quantity'] = event.broker_quantity
+            self.on_position_changed()
+    
+    def start_stop_monitor(self, trading_token: str):
+        """Check stop/target/trail levels on every LTP instead of every check_interval"""
+        if not self.config.get('stop_monitor_enabled', True):
+            return
+        
+        self.stop_monitor = StopLossMonitor(
+            self.executor,
+            f"NSE:{trading_token}",
+            poll_interval=self.config.get('stop_monitor_interval', 0.5),
+            latency_budget_ms=self.config.get('stop_monitor_latency_budget_ms', 250),
+            clock=self.clock
+        )
+        self.stop_monitor.register(self)
+        self.stop_monitor.start()
+    
+    def refresh_atr_calibration(self, signal_token: str, trading_token: str, trading_symbol: str):
+        """Fetch recent history for both instruments and recalibrate ATR scaling"""
+        end_date = self.clock.now()
+        start_date = end_date - timedelta(days=self.config.get('atr_calibration_days', 30))
+        
+        signal_df = self.executor.get_historical_data(signal_token, start_date, end_date)
+        trading_df = self.executor.get_historical_data(trading_token, start_date, end_date)
+        if signal_df.empty or trading_df.empty:
+            logger.warning("⚠️ No history for ATR calibration, keeping previous values")
+            return []
+        
+        calibration = self.atr_calibrator.calibrate(
+            signal_df.set_index('timestamp'), trading_df.set_index('timestamp'), trading_symbol
+        )
+        return [calibration] if calibration else []
+    
+    def start_atr_calibration(self, signal_token: str, trading_token: str, trading_symbol: str):
+        """Keep ATR scaling calibrated in the background; sizing only reads the table"""
+        self.atr_calibrator.start(
+            lambda: self.refresh_atr_calibration(signal_token, trading_token, trading_symbol)
+        )
+    
+    def stop_stop_monitor(self):
+        """Stop the fast-path monitor and log its latency metrics"""
+        if not self.stop_monitor:
+            return
+        
+        self.stop_monitor.stop()
+        exit_latency = self.stop_monitor.get_metrics()['exit_latency']
+        if exit_latency.get('count'):
+            logger.info(f"⏱️ Fast-path exits: {exit_latency['count']}, breach to order "
+                        f"mean {exit_latency['mean_ms']:.0f}ms / max {exit_latency['max_ms']:.0f}ms")
+        self.stop_monitor = None
+    
+    def wait_for_next_cycle(self, timeout: float):
+        """Sleep until the next check, waking early for reconciliation events"""
+        if self.reconciler and self.reconciler.wait_for_event(timeout):
+            self.process_reconciliation_events()
+        elif not self.reconciler:
+            self.clock.sleep(timeout)
+    
+    def reconcile_restored_position(self):
+        """Check a restored position against the broker before trading on it"""
+        if self.current_position['quantity'] == 0:
+            return
+        
+        sync_needed, status = self.executor.sync_position_with_broker(self.current_position)
+        if status == "CLOSED_EXTERNALLY" or (sync_needed and self.current_position['quantity'] == 0):
+            logger.warning("⚠️ Restored position no longer exists at broker - clearing it")
+            self.current_position = self.empty_position()
+            self.on_position_changed()
+        elif sync_needed:
+            self.on_position_changed()
+        else:
+            logger.info(f"✅ Restored position confirmed with broker ({status})")
     
     def setup_connections(self) -> bool:
         """Setup Kite connection and executor"""
@@ -86,7 +346,7 @@ class EnhancedTradingBot:
                 logger.error("❌ Failed to get Kite instance")
                 return False
             
-            self.executor = OrderExecutor(self.kite)
+            self.attach(self.kite, OrderExecutor(self.kite, self.clock))
             logger.info("✅ Trading connections established")
             return True
             
@@ -94,9 +354,15 @@ class EnhancedTradingBot:
             logger.error(f"❌ Connection setup failed: {e}")
             return False
     
+    def attach(self, kite, executor):
+        """Use an existing broker session (shared between profiles by the multi-strategy runner)"""
+        self.kite = kite
+        self.executor = executor
+        self.feed.executor = executor
+    
     def is_market_open(self) -> bool:
         """Check if market is currently open"""
-        now = datetime.now()
+        now = self.clock.now()
         
         # Check if it's a trading day (Monday to Friday)
         if now.weekday() not in MARKET_CONFIG['trading_days']:
@@ -118,11 +384,21 @@ class EnhancedTradingBot:
             logger.error("❌ Failed to setup connections")
             return
         
+        # A warm restart may carry an open position - confirm it with the broker
+        self.reconcile_restored_position()
+        
+        # Positions/orders are polled in the background from here on
+        self.start_reconciler()
+        
         # Get instrument tokens
         signal_token = INSTRUMENTS.get(signal_instrument, {}).get('token', '256265')
         trading_token = INSTRUMENTS.get(trading_instrument, {}).get('token', '2707457')
         trading_symbol = INSTRUMENTS.get(trading_instrument, {}).get('symbol', 'NIFTYBEES')
         
+        # Protective exits are checked on every LTP from here on
+        self.start_stop_monitor(trading_token)
+        self.start_atr_calibration(signal_token, trading_token, trading_symbol)
+        
         logger.info(f"🔍 Signal Token: {signal_token} ({signal_instrument})")
         logger.info(f"💼 Trading Token: {trading_token} ({trading_symbol})")
         
@@ -130,80 +406,45 @@ class EnhancedTradingBot:
         logger.info("🛑 Press Ctrl+C to stop")
         
         self.is_running = True
-        last_signal = "HOLD"
+        risk_stop_day = None
         
         try:
             while self.is_running:
                 # Check if market is open
                 if not self.is_market_open():
                     logger.info("📅 Market is closed, waiting...")
-                    time.sleep(60)  # Check every minute when market closed
+                    self.clock.sleep(60)  # Check every minute when market closed
                     continue
                 
                 # Check risk management - stop trading if limits hit
+                self.roll_trading_day()
                 should_stop, reason = self.risk_manager.should_stop_trading()
                 if should_stop:
-                    logger.warning(f"🛑 Trading stopped: {reason}")
-                    break
+                    if self.risk_manager.drawdown_exceeded():
+                        logger.warning(f"🛑 Trading stopped: {reason}")
+                        self.publish(RiskStop, reason=reason)
+                        break
+                    # Daily limits clear when roll_trading_day sees the next date
+                    today = self.clock.now().date()
+                    if risk_stop_day != today:
+                        risk_stop_day = today
+                        logger.warning(f"🛑 Trading paused until the next trading day: {reason}")
+                        self.publish(RiskStop, reason=reason)
+                    self.clock.sleep(60)
+                    continue
                 
                 try:
-                    # Step 1: Get historical data for SIGNAL analysis (NIFTY 50)
-                    end_date = datetime.now()
-                    start_date = end_date - timedelta(days=2)
-                    
-                    signal_df = self.executor.get_historical_data(signal_token, start_date, end_date)
-                    
-                    if signal_df.empty:
-                        logger.warning("⚠️ No signal data received, retrying...")
-                        time.sleep(self.config['check_interval'])
+                    if not self.trading_cycle(signal_token, trading_token, trading_symbol):
+                        self.clock.sleep(self.config['check_interval'])
                         continue
                     
-                    # Step 2: Get current TRADING instrument price (NIFTYBEES)
-                    trading_price = self.executor.get_latest_price(f"NSE:{trading_token}")
-                    
-                    if not trading_price:
-                        # Fallback: get from historical data
-                        trading_df = self.executor.get_historical_data(trading_token, start_date, end_date)
-                        if not trading_df.empty:
-                            trading_price = trading_df['close'].iloc[-1]
-                        else:
-                            logger.warning("⚠️ Could not get trading price, retrying...")
-                            time.sleep(self.config['check_interval'])
-                            continue
-                    
-                    # Step 3: Generate trading signal using NIFTY 50 data
-                    signal, signal_data = self.strategy.get_signal(signal_df)
-                    
-                    # Step 4: Use NIFTYBEES price for actual trading calculations
-                    current_price = trading_price
-                    
-                    # Step 5: Log current market status
-                    if signal != last_signal:
-                        logger.info(f"📊 Signal Change: {last_signal} → {signal}")
-                        logger.info(f"📈 NIFTY 50: ₹{signal_df['close'].iloc[-1]:.2f}")
-                        logger.info(f"💰 NIFTYBEES: ₹{current_price:.2f}")
-                        if signal != "HOLD":
-                            logger.info(f"🎯 Confidence: {signal_data.get('confidence', 0):.1%}")
-                            logger.info(f"⭐ Quality: {signal_data.get('quality_score', 0):.1%}")
-                            logger.info(f"✅ Confirmations: {', '.join(signal_data.get('confirmations', []))}")
-                        last_signal = signal
-                    
-                    # Step 6: Execute trading logic using correct prices
-                    if self.current_position['quantity'] == 0:
-                        # No position - look for entry signals
-                        if signal in ["BUY", "SELL"]:
-                            self.handle_entry_signal(signal, signal_data, current_price, trading_symbol)
-                    else:
-                        # Have position - manage existing trade
-                        self.handle_position_management(signal, signal_data, current_price, signal_df)
-                    
                 except Exception as e:
                     logger.error(f"❌ Error in trading loop: {e}")
                     import traceback
                     traceback.print_exc()
                 
-                # Wait before next check
-                time.sleep(self.config['check_interval'])
+                # Wait before next check (reconciliation events wake us early)
+                self.wait_for_next_cycle(self.config['check_interval'])
                 
         except KeyboardInterrupt:
             logger.info("🛑 Keyboard interrupt received")
@@ -212,6 +453,96 @@ class EnhancedTradingBot:
         finally:
             logger.info("📅 Enhanced trading session ended")
             self.is_running = False
+            self.stop_stop_monitor()
+            self.atr_calibrator.stop()
+            if self.reconciler:
+                self.reconciler.stop()
+            self.save_snapshot()
+            self.journal.close()
+            self.close_events()
+    
+    def trading_cycle(self, signal_token: str, trading_token: str, trading_symbol: str) -> bool:
+        """One pass of the trading loop; False when market data was missing (retry after a pause)"""
+        # Apply any broker mismatches before acting on our position
+        self.process_reconciliation_events()
+        
+        # Step 1: Get historical data for SIGNAL analysis (NIFTY 50)
+        signal_df = self.feed.refresh_bars(signal_token)
+        
+        if signal_df.empty:
+            logger.warning("⚠️ No signal data received, retrying...")
+            return False
+        
+        # Step 2: Get current TRADING instrument price (NIFTYBEES)
+        trading_price = self.feed.latest_price(trading_token)
+        
+        if not trading_price:
+            logger.warning("⚠️ Could not get trading price, retrying...")
+            return False
+        
+        # Steps 3-6: Signal and trade on this bar
+        self.process_market_data(signal_df, trading_price, trading_symbol)
+        return True
+    
+    def publish(self, event_type, **fields):
+        """Put an event on the bus, stamped with this profile and the bot's clock"""
+        self.events.publish(event_type(profile=self.strategy_profile, timestamp=self.clock.now(), **fields))
+    
+    def publish_closed_bar(self, bars):
+        """Publish the candle before the forming one once the feed has moved past it"""
+        timestamps = bars['timestamp']
+        last_bar_time = int(timestamps[-1])
+        if self.last_bar_time is not None and last_bar_time != self.last_bar_time and len(bars) > 1:
+            self.publish(BarClosed,
+                         bar_time=pd.Timestamp(int(timestamps[-2])).to_pydatetime(),
+                         open=float(bars['open'][-2]), high=float(bars['high'][-2]),
+                         low=float(bars['low'][-2]), close=float(bars['close'][-2]),
+                         volume=float(bars['volume'][-2]))
+        self.last_bar_time = last_bar_time
+    
+    def process_market_data(self, signal_df, current_price: float, trading_symbol: str):
+        """Generate a signal from the latest candles and act on it (one trading-loop step)"""
+        self.publish_closed_bar(signal_df)
+        
+        # Step 3: Generate trading signal using NIFTY 50 data
+        signal, signal_data = self.strategy.get_signal(signal_df)
+        
+        # Step 4/5: Report it (signal changes are logged by a bus subscriber, off this thread)
+        self.publish(SignalComputed,
+                     signal=signal, previous=self.last_signal, changed=signal != self.last_signal,
+                     signal_price=float(signal_df['close'][-1]), trading_price=float(current_price),
+                     symbol=trading_symbol,
+                     confidence=signal_data.get('confidence', 0), quality_score=signal_data.get('quality_score', 0),
+                     confirmation_flags=getattr(signal_data.get('confirmations'), 'flags', 0))
+        self.last_signal = signal
+        
+        # Step 6: Execute trading logic using correct prices
+        entry_order_id = None
+        with self.position_lock:
+            # Drawdown tracking from the quote we already have
+            self.mark_to_market(current_price)
+            
+            # A native stop/target may have filled since the last bar (seen by the reconciler's poll)
+            orders = self.recent_orders()
+            self.sync_native_exits(orders)
+            self.publish_confirmed_fills(orders)
+            
+            if self.current_position['quantity'] == 0:
+                # No position - look for entry signals
+                if signal in ["BUY", "SELL"]:
+                    self.handle_entry_signal(signal, signal_data, current_price, trading_symbol)
+                    if self.use_native_exits and self.current_position['quantity'] != 0:
+                        entry_order_id = self.current_position['order_id']
+            else:
+                # Have position - manage existing trade
+                self.handle_position_management(signal, signal_data, current_price, signal_df)
+        
+        # Outside the lock, so the stop monitor guards the new position while the fill is awaited
+        if entry_order_id:
+            self.arm_native_exits(entry_order_id)
+        
+        if self.journal.snapshot_due():
+            self.save_snapshot()
     
     def handle_entry_signal(self, signal: str, signal_data: Dict, current_price: float, trading_symbol: str):
         """Handle entry signals for new positions - IMPROVED VERSION"""
@@ -232,7 +563,8 @@ class EnhancedTradingBot:
             trading_atr = sizing['scaled_atr']
             
             # Calculate stop loss using scaled ATR
-            stop_loss_price = current_price - (trading_atr * 2.5) if signal == "BUY" else current_price + (trading_atr * 2.5)
+            stop_distance = trading_atr * EXIT_ATR_MULTIPLES['stop_loss']
+            stop_loss_price = current_price - stop_distance if signal == "BUY" else current_price + stop_distance
             
             # Risk assessment using NIFTYBEES parameters
             risk_assessment = self.risk_manager.assess_trade_risk(
@@ -253,7 +585,8 @@ class EnhancedTradingBot:
                 logger.info(f"📉 Position size reduced to {sizing['quantity']} shares")
             
             # Calculate take profit
-            take_profit_price = current_price + (trading_atr * 3.0) if signal == "BUY" else current_price - (trading_atr * 3.0)
+            target_distance = trading_atr * EXIT_ATR_MULTIPLES['take_profit']
+            take_profit_price = current_price + target_distance if signal == "BUY" else current_price - target_distance
             
             # Log trade details
             logger.info(f"🟢 {signal} ENTRY SIGNAL DETECTED")
@@ -279,7 +612,7 @@ class EnhancedTradingBot:
                 self.current_position.update({
                     "quantity": sizing['quantity'] if signal == "BUY" else -sizing['quantity'],
                     "entry_price": current_price,
-                    "entry_time": datetime.now(),
+                    "entry_time": self.clock.now(),
                     "stop_loss": stop_loss_price,
                     "take_profit": take_profit_price,
                     "symbol": trading_symbol,
@@ -289,10 +622,18 @@ class EnhancedTradingBot:
                     "confidence": signal_data.get('confidence', 0),
                     "quality_score": signal_data.get('quality_score', 0)
                 })
+                self.publish(OrderPlaced, order_id=order_id, symbol=trading_symbol,
+                             transaction_type=transaction_type, quantity=sizing['quantity'],
+                             price=current_price, purpose='entry')
+                self.pending_fills[order_id] = 'entry'
                 
                 # Update risk management
                 self.risk_manager.increment_trade_count()
                 
+                # Persist before anything else can go wrong
+                self.on_position_changed()
+                self.journal.record_risk(self.risk_manager.get_state())
+                
                 logger.info(f"✅ POSITION OPENED: {sizing['quantity']} {trading_symbol} at ₹{current_price:.2f}")
                 logger.info(f"📋 Order ID: {order_id}")
             else:
@@ -303,6 +644,158 @@ class EnhancedTradingBot:
             import traceback
             traceback.print_exc()
     
+    def arm_native_exits(self, entry_order_id: str):
+        """
+        Place the SL-M stop and LIMIT target once the entry order has filled
+        
+        Call without position_lock: the fill is awaited unlocked and the lock
+        is taken only to place and attach the exits.
+        """
+        fill = self.executor.wait_for_fill(entry_order_id, timeout=self.config.get('entry_fill_timeout', 5))
+        if not fill:
+            logger.warning("⚠️ Entry fill not confirmed - exits stay client-side for this trade")
+            return
+        
+        with self.position_lock:
+            if entry_order_id in self.pending_fills:
+                self.publish_fill(dict(fill, order_id=entry_order_id), self.pending_fills.pop(entry_order_id))
+            
+            # The stop monitor may have closed the position while we waited
+            if self.current_position['quantity'] == 0 or self.current_position.get('order_id') != entry_order_id:
+                logger.info("ℹ️ Position closed before its exits were armed - nothing to place")
+                return
+            
+            exit_orders = self.executor.place_exit_orders(
+                self.current_position['tradingsymbol'],
+                abs(self.current_position['quantity']),
+                self.current_position['quantity'] > 0,
+                self.current_position['stop_loss'],
+                self.current_position['take_profit']
+            )
+            if not exit_orders['stop']:
+                logger.warning("⚠️ Native stop-loss rejected - stop stays client-side")
+            
+            self.current_position['exit_orders'] = exit_orders
+            self.on_position_changed()
+        logger.info(f"🛡️ Native exits armed: SL-M {exit_orders['stop']}, target {exit_orders['target']}")
+    
+    def move_native_stop(self, trigger_price: float):
+        """Trail the exchange-resident stop along with trail_stop"""
+        exit_orders = self.current_position.get('exit_orders')
+        if exit_orders and exit_orders.get('stop'):
+            self.executor.modify_order(exit_orders['stop'], trigger_price=trigger_price)
+    
+    def recent_orders(self) -> Optional[list]:
+        """Orders from the reconciler's last poll when it is recent enough, else None (fetch instead)"""
+        if self.snapshot_source is None:
+            return None
+        snapshot = self.snapshot_source.snapshot
+        # Allow one late poll before falling back to a broker call
+        if snapshot.age > 2 * self.snapshot_source.poll_interval:
+            return None
+        return snapshot.orders
+    
+    def sync_native_exits(self, orders: Optional[list] = None) -> Optional[str]:
+        """
+        Book a native stop/target fill (cancelling its sibling); returns the filled order id
+        
+        orders is an already fetched order list to check; None asks the broker.
+        """
+        exit_orders = self.current_position.get('exit_orders')
+        if not exit_orders or self.current_position['quantity'] == 0:
+            return None
+        
+        fill = self.executor.check_exit_orders(exit_orders, orders)
+        if not fill:
+            return None
+        return self.book_native_exit(fill)
+    
+    def book_native_exit(self, fill: Dict[str, Any]) -> str:
+        """Record a position closed by one of its native exit orders"""
+        if fill['both_filled']:
+            # Both legs executed before the OCO cancel landed - the broker now holds the opposite side
+            logger.error("❌ Both native exits filled - broker position is reversed, check manually")
+            self.risk_manager.log_risk_event("OCO_DOUBLE_FILL", f"Stop and target both filled ({fill['order_id']})")
+        
+        if fill['leg'] == 'stop':
+            reason = "Trailing Stop Hit" if self.current_position.get('trail_stop') else "Stop Loss Hit"
+            level = self.current_position.get('trail_stop') or self.current_position['stop_loss']
+        else:
+            reason = "Take Profit Hit"
+            level = self.current_position['take_profit']
+        
+        exit_price = fill['average_price'] or level
+        self.publish_fill(fill['order'], 'exit')
+        self.update_position_pnl(exit_price)
+        self.book_exit(exit_price, f"{reason} (native)", fill['order_id'])
+        return fill['order_id']
+    
+    def book_external_close(self, orders: Optional[list] = None, positions: Optional[Dict[str, Any]] = None):
+        """
+        Book a position the broker closed without us (auto square-off, manual exit)
+        
+        The exit is priced from the closing order's average price, else the
+        broker position's last price, so its P&L reaches the daily loss limit
+        and the valuation like any other exit.
+        """
+        is_long = self.current_position['quantity'] > 0
+        symbol = self.current_position['tradingsymbol']
+        if orders is None:
+            orders = self.executor.get_orders()
+        
+        order = self.executor.find_closing_order(orders, symbol, is_long, since=self.current_position['entry_time'])
+        price = float(order.get('average_price') or 0) if order else 0.0
+        if not price:
+            for row in (positions or {}).get('day', []):
+                if row.get('tradingsymbol') == symbol and row.get('last_price'):
+                    price = float(row['last_price'])
+                    break
+        if not price:
+            price = self.current_position['entry_price']
+            logger.warning(f"⚠️ No broker price for the external close of {symbol} - booking it at entry")
+        
+        if order:
+            self.publish_fill(order, 'exit')
+        self.update_position_pnl(price)
+        self.book_exit(price, "Closed Externally", order['order_id'] if order else "external")
+    
+    def publish_fill(self, order: Dict[str, Any], purpose: str):
+        """Publish a Fill from the broker's state of a completed order"""
+        self.publish(Fill, order_id=order['order_id'], symbol=order.get('tradingsymbol', ''),
+                     transaction_type=order.get('transaction_type', ''),
+                     quantity=int(order.get('filled_quantity') or order.get('quantity') or 0),
+                     price=float(order.get('average_price') or 0), purpose=purpose)
+    
+    def publish_confirmed_fills(self, orders: Optional[list] = None):
+        """Publish fills for placed orders the broker now reports complete (None fetches orders)"""
+        if not self.pending_fills:
+            return
+        if orders is None:
+            orders = self.executor.get_orders()
+        for order in orders or []:
+            order_id = order.get('order_id')
+            if order_id not in self.pending_fills or order.get('status') not in TERMINAL_STATUSES:
+                continue
+            purpose = self.pending_fills.pop(order_id)
+            if order['status'] == 'COMPLETE':
+                self.publish_fill(order, purpose)
+    
+    def mark_to_market(self, current_price: float) -> float:
+        """Value the book at current_price (drawdown tracking); O(1), no broker call - hold position_lock"""
+        return self.valuation.mark(self.current_position, current_price)
+    
+    def update_position_pnl(self, current_price: float):
+        """Mark the open position to current_price; returns (pnl, pnl_percent)"""
+        entry_price = self.current_position['entry_price']
+        quantity = self.current_position['quantity']
+        direction = 1 if quantity > 0 else -1
+        
+        pnl = (current_price - entry_price) * abs(quantity) * direction
+        pnl_percent = (current_price - entry_price) / entry_price * 100 * direction
+        
+        self.current_position['pnl'] = pnl
+        return pnl, pnl_percent
+    
     def handle_position_management(self, signal: str, signal_data: Dict, current_price: float, df):
         """IMPROVED position management with better hold logic"""
         try:
@@ -316,17 +809,10 @@ class EnhancedTradingBot:
             take_profit = self.current_position['take_profit']
             
             # Calculate position age in hours
-            position_age = (datetime.now() - entry_time).total_seconds() / 3600
+            position_age = (self.clock.now() - entry_time).total_seconds() / 3600
             
             # Calculate current P&L
-            if is_long:
-                pnl = (current_price - entry_price) * abs(self.current_position['quantity'])
-                pnl_percent = (current_price - entry_price) / entry_price * 100
-            else:
-                pnl = (entry_price - current_price) * abs(self.current_position['quantity'])
-                pnl_percent = (entry_price - current_price) / entry_price * 100
-            
-            self.current_position['pnl'] = pnl
+            pnl, pnl_percent = self.update_position_pnl(current_price)
             
             should_exit = False
             exit_reason = ""
@@ -392,6 +878,8 @@ class EnhancedTradingBot:
                     trail_stop = current_price - trail_stop_distance
                     if trail_stop > self.current_position.get('trail_stop', 0):
                         self.current_position['trail_stop'] = trail_stop
+                        self.move_native_stop(trail_stop)
+                        self.journal.record_position(self.current_position)
                         logger.info(f"📈 Trailing stop updated to ₹{trail_stop:.2f}")
                     
                     if current_price <= self.current_position.get('trail_stop', 0):
@@ -401,6 +889,8 @@ class EnhancedTradingBot:
                     trail_stop = current_price + trail_stop_distance
                     if trail_stop < self.current_position.get('trail_stop', float('inf')):
                         self.current_position['trail_stop'] = trail_stop
+                        self.move_native_stop(trail_stop)
+                        self.journal.record_position(self.current_position)
                         logger.info(f"📈 Trailing stop updated to ₹{trail_stop:.2f}")
                     
                     if current_price >= self.current_position.get('trail_stop', float('inf')):
@@ -420,14 +910,26 @@ class EnhancedTradingBot:
             logger.error(f"❌ Error in position management: {e}")
     
     def execute_exit(self, current_price: float, reason: str):
-        """Execute position exit with improved logging"""
+        """Execute position exit with improved logging; returns the exit order id"""
+        with self.position_lock:
+            return self._execute_exit(current_price, reason)
+    
+    def _execute_exit(self, current_price: float, reason: str):
         try:
+            # Resting exits must go before a market exit, or they could fire later and open a new position
+            exit_orders = self.current_position.get('exit_orders')
+            if exit_orders:
+                fill = self.executor.cancel_exit_orders(exit_orders)
+                if fill:
+                    return self.book_native_exit(fill)
+                self.current_position.pop('exit_orders', None)
+            
             quantity = abs(self.current_position['quantity'])
             is_long = self.current_position['quantity'] > 0
             trading_symbol = self.current_position['tradingsymbol']
             entry_price = self.current_position['entry_price']
             entry_time = self.current_position['entry_time']
-            position_age = (datetime.now() - entry_time).total_seconds() / 3600
+            position_age = (self.clock.now() - entry_time).total_seconds() / 3600
             
             # Determine transaction type for exit
             transaction_type = "SELL" if is_long else "BUY"
@@ -445,63 +947,88 @@ class EnhancedTradingBot:
             order_id = self.executor.place_order(trading_symbol, transaction_type, quantity)
             
             if order_id:
-                # Create trade record for analysis
-                trade_record = {
-                    'entry_time': entry_time,
-                    'exit_time': datetime.now(),
-                    'symbol': trading_symbol,
-                    'direction': 'LONG' if is_long else 'SHORT',
-                    'quantity': quantity,
-                    'entry_price': entry_price,
-                    'exit_price': current_price,
-                    'pnl': self.current_position['pnl'],
-                    'pnl_percent': (self.current_position['pnl'] / (entry_price * quantity)) * 100,
-                    'hold_time_hours': position_age,
-                    'exit_reason': reason,
-                    'confidence': self.current_position.get('confidence', 0),
-                    'quality_score': self.current_position.get('quality_score', 0),
-                    'strategy_profile': self.strategy_profile
-                }
-                
-                self.daily_trades.append(trade_record)
-                
-                # Update P&L tracking
-                self.risk_manager.update_daily_pnl(self.current_position['pnl'])
-                self.total_pnl += self.current_position['pnl']
-                
-                # Calculate performance metrics
-                winning_trades = [t for t in self.daily_trades if t['pnl'] > 0]
-                win_rate = len(winning_trades) / len(self.daily_trades) * 100 if self.daily_trades else 0
-                
-                logger.info(f"✅ POSITION CLOSED: {reason}")
-                logger.info(f"📋 Exit Order ID: {order_id}")
-                logger.info(f"💰 Total P&L Today: ₹{self.total_pnl:.2f}")
-                logger.info(f"📊 Today's Stats: {len(self.daily_trades)} trades, {win_rate:.1f}% win rate")
-                
-                # Reset position
-                self.current_position = {
-                    "quantity": 0,
-                    "entry_price": 0,
-                    "entry_time": None,
-                    "stop_loss": 0,
-                    "take_profit": 0,
-                    "pnl": 0,
-                    "symbol": None,
-                    "tradingsymbol": None,
-                    "confidence": 0,
-                    "quality_score": 0
-                }
-                
+                self.publish(OrderPlaced, order_id=order_id, symbol=trading_symbol,
+                             transaction_type=transaction_type, quantity=quantity,
+                             price=current_price, purpose='exit', reason=reason)
+                self.pending_fills[order_id] = 'exit'
+                self.book_exit(current_price, reason, order_id)
+                return order_id
             else:
                 logger.error("❌ Exit order placement failed")
                 
         except Exception as e:
             logger.error(f"❌ Error executing exit: {e}")
+        return None
+    
+    def book_exit(self, exit_price: float, reason: str, order_id: str):
+        """Record a completed exit and flatten the position"""
+        quantity = abs(self.current_position['quantity'])
+        is_long = self.current_position['quantity'] > 0
+        trading_symbol = self.current_position['tradingsymbol']
+        entry_price = self.current_position['entry_price']
+        entry_time = self.current_position['entry_time']
+        position_age = (self.clock.now() - entry_time).total_seconds() / 3600
+        
+        # Create trade record for analysis
+        trade_record = {
+            'entry_time': entry_time,
+            'exit_time': self.clock.now(),
+            'symbol': trading_symbol,
+            'direction': 'LONG' if is_long else 'SHORT',
+            'quantity': quantity,
+            'entry_price': entry_price,
+            'exit_price': exit_price,
+            'pnl': self.current_position['pnl'],
+            'pnl_percent': (self.current_position['pnl'] / (entry_price * quantity)) * 100,
+            'hold_time_hours': position_age,
+            'exit_reason': reason,
+            'confidence': self.current_position.get('confidence', 0),
+            'quality_score': self.current_position.get('quality_score', 0),
+            'strategy_profile': self.strategy_profile
+        }
+        
+        # Update P&L tracking (running totals - no scan of past trades)
+        self.roll_trading_day()
+        self.trade_stats.record(trade_record)
+        self.risk_manager.update_daily_pnl(self.current_position['pnl'])
+        self.valuation.mark(self.empty_position(), exit_price)
+        today = self.trade_stats.today
+        
+        logger.info(f"✅ POSITION CLOSED: {reason}")
+        logger.info(f"📋 Exit Order ID: {order_id}")
+        logger.info(f"💰 Total P&L Today: ₹{today.pnl:.2f}")
+        logger.info(f"📊 Today's Stats: {today.trades} trades, {today.win_rate:.1f}% win rate")
+        
+        self.publish(PositionExit, reason=reason, pnl=trade_record['pnl'], trade=trade_record)
+        
+        # Reset position
+        self.current_position = self.empty_position()
+        
+        self.journal.record_trade(trade_record)
+        self.journal.archive('trade', trade_record, sync=True)
+        self.on_position_changed()
+        self.journal.record_risk(self.risk_manager.get_state())
+    
+    def close_events(self):
+        """Publish outstanding fills, then stop the bot's own event bus (a shared one is closed by its owner)"""
+        if self.executor:
+            self.publish_confirmed_fills()
+        if self.owns_events:
+            self.events.close()
     
     def shutdown_handler(self, signum, frame):
         """Handle shutdown signals gracefully"""
         logger.info("🛑 Shutdown signal received")
+        self.shutdown()
+        sys.exit(0)
+    
+    def shutdown(self):
+        """Close any open position, persist state and log the session summary"""
         self.is_running = False
+        self.stop_stop_monitor()
+        self.atr_calibrator.stop()
+        if self.reconciler:
+            self.reconciler.stop()
         
         # Close any open positions if needed
         if self.current_position['quantity'] != 0:
@@ -510,22 +1037,23 @@ class EnhancedTradingBot:
                 trading_token = INSTRUMENTS['NIFTYBEES']['token']
                 current_price = self.executor.get_latest_price(f"NSE:{trading_token}")
                 if current_price:
+                    self.update_position_pnl(current_price)
                     self.execute_exit(current_price, "System Shutdown")
             except Exception as e:
                 logger.error(f"Error closing position on shutdown: {e}")
         
-        # Print session summary
-        if self.daily_trades:
-            logger.info("📊 SESSION SUMMARY:")
-            logger.info(f"   Total Trades: {len(self.daily_trades)}")
-            logger.info(f"   Total P&L: ₹{self.total_pnl:.2f}")
-            winning_trades = [t for t in self.daily_trades if t['pnl'] > 0]
-            win_rate = len(winning_trades) / len(self.daily_trades) * 100
-            logger.info(f"   Win Rate: {win_rate:.1f}%")
-            avg_hold_time = sum(t['hold_time_hours'] for t in self.daily_trades) / len(self.daily_trades)
-            logger.info(f"   Avg Hold Time: {avg_hold_time:.1f} hours")
+        self.save_snapshot()
+        self.journal.close()
+        self.close_events()
         
-        sys.exit(0)
+        # Print session summary
+        session = self.trade_stats.session
+        if session.trades:
+            logger.info(f"📊 SESSION SUMMARY ({self.strategy_profile}):")
+            logger.info(f"   Total Trades: {session.trades}")
+            logger.info(f"   Total P&L: ₹{session.pnl:.2f}")
+            logger.info(f"   Win Rate: {session.win_rate:.1f}%")
+            logger.info(f"   Avg Hold Time: {session.avg_hold_hours:.1f} hours")
 
 def main():
     """Main function to run the enhanced trading bot"""
@@ -538,11 +1066,15 @@ def main():
                        help='Signal source instrument')
     parser.add_argument('--trading', choices=['NIFTYBEES', 'JUNIORBEES', 'BANKBEES'], 
                        default='NIFTYBEES', help='Trading instrument')
+    parser.add_argument('--broker', choices=['kite', 'sim'],
+                       help='Broker backend: live Kite API or the offline simulator')
+    parser.add_argument('--event-log', metavar='PATH',
+                       help='Append every trading event to this JSON-lines file')
     
     args = parser.parse_args()
     
     # Create and run bot
-    bot = EnhancedTradingBot(strategy_profile=args.profile)
+    bot = EnhancedTradingBot(strategy_profile=args.profile, broker=args.broker, event_log=args.event_log)
     bot.run_enhanced_trading(signal_instrument=args.signal, trading_instrument=args.trading)
 
 if __name__ == "__main__":
@@ -0,0 +1,331 @@
+# multi_strategy_main.py - SEVERAL STRATEGY PROFILES IN ONE PROCESS OVER A SHARED DATA FEED
+
+import signal
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from auth.kite_auth import KiteAuth
+from trading.event_bus import RiskStop, create_event_bus
+from trading.executor import OrderExecutor
+from trading.market_feed import MarketDataFeed
+from trading.reconciler import BrokerReconciler
+from trading.stop_monitor import StopLossMonitor
+from enhanced_main import EnhancedTradingBot
+from config.enhanced_settings import INSTRUMENTS
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+class MultiStrategyRunner:
+    """
+    Run several strategy profiles side by side in one live process
+
+    One broker session and one MarketDataFeed serve every profile: candles
+    and the traded price are fetched once per cycle and fanned out to each
+    profile's EnhancedTradingBot (strategy, position sizer, risk manager and
+    position book) on a thread pool. Each profile keeps its own check_interval,
+    position book, risk limits and state journal.
+
+    Every profile sizes against its own 'account_balance', which acts as the
+    capital allocated to that book. The broker only sees the net position per
+    symbol, so reconciliation works on the sum of all books.
+
+    All profiles publish to one event bus (events carry the profile name),
+    so a single subscriber or event log sees every book.
+    """
+
+    def __init__(self, profiles: List[str], broker: Optional[str] = None, event_log: Optional[str] = None):
+        if len(set(profiles)) != len(profiles):
+            raise ValueError(f"Duplicate profiles: {profiles}")
+
+        self.profiles = profiles
+        self.events = create_event_bus(event_log)
+        self.bots: Dict[str, EnhancedTradingBot] = {
+            profile: EnhancedTradingBot(profile, install_signal_handlers=False, broker=broker, events=self.events)
+            for profile in profiles
+        }
+
+        # One ATR calibration table serves every profile's position sizer
+        self.atr_calibrator = next(iter(self.bots.values())).atr_calibrator
+        for bot in self.bots.values():
+            bot.atr_calibrator = self.atr_calibrator
+            bot.position_sizer.calibrator = self.atr_calibrator
+
+        # Shared broker session and market data
+        self.auth = KiteAuth(broker)
+        self.kite = None
+        self.executor = None
+        self.feed = MarketDataFeed(history_days=2)
+        self.reconciler = None
+        self.stop_monitor = None
+        self.published_quantity = None
+
+        self.pool = ThreadPoolExecutor(max_workers=len(profiles), thread_name_prefix="profile")
+        self.is_running = False
+        self.stopped_profiles = set()  # drawdown stops, for the session
+        self.paused_profiles = {}  # profile -> day its daily limits were hit
+        self.next_due = {profile: 0.0 for profile in profiles}
+
+        signal.signal(signal.SIGTERM, self.shutdown_handler)
+        signal.signal(signal.SIGINT, self.shutdown_handler)
+
+        logger.info(f"🚀 Multi-strategy runner initialized: {', '.join(profiles)}")
+
+    def setup_connections(self) -> bool:
+        """Authenticate once and share the session with every profile"""
+        try:
+            self.kite = self.auth.get_kite_instance()
+            if not self.kite:
+                logger.error("❌ Failed to get Kite instance")
+                return False
+
+            self.executor = OrderExecutor(self.kite)
+            self.feed.executor = self.executor
+            for bot in self.bots.values():
+                bot.attach(self.kite, self.executor)
+                # Reuse a restored bar window so the first cycle fetches incrementally
+                if self.feed.bars.empty and not bot.feed.bars.empty:
+                    self.feed.bars = bot.feed.bars
+                bot.feed = self.feed
+
+            logger.info("✅ Shared trading connection established")
+            return True
+
+        except Exception as e:
+            logger.error(f"❌ Connection setup failed: {e}")
+            return False
+
+    def net_position(self, tradingsymbol: str) -> Dict[str, object]:
+        """Combined position across all profile books for one symbol"""
+        quantity = sum(bot.current_position['quantity'] for bot in self.bots.values()
+                       if bot.current_position.get('tradingsymbol') == tradingsymbol)
+        return {'tradingsymbol': tradingsymbol, 'quantity': quantity}
+
+    def reconcile_restored_positions(self, tradingsymbol: str):
+        """Confirm restored books against the broker's net position"""
+        expected = self.net_position(tradingsymbol)
+        if expected['quantity'] == 0:
+            return
+
+        positions = self.executor.get_positions()
+        if not positions:
+            logger.warning("⚠️ Could not fetch broker positions to confirm restored books")
+            return
+
+        _, status, broker_qty = self.executor.compare_position(expected, positions)
+        if status == "CLOSED_EXTERNALLY":
+            self.flatten_books(tradingsymbol, "Restored positions no longer exist at broker")
+        elif status == "SYNCED":
+            logger.warning(f"⚠️ Restored books net {expected['quantity']} but broker holds {broker_qty} - check manually")
+        else:
+            logger.info(f"✅ Restored books confirmed with broker ({expected['quantity']} net)")
+
+    def flatten_books(self, tradingsymbol: str, reason: str):
+        """Book every profile's position in a symbol as closed after an external close"""
+        # The poll that saw the close also fetched the orders and positions that price it
+        snapshot = self.reconciler.snapshot if self.reconciler else None
+        orders = snapshot.orders if snapshot else self.executor.get_orders()
+        positions = snapshot.positions if snapshot else self.executor.get_positions()
+
+        for profile, bot in self.bots.items():
+            with bot.position_lock:
+                if bot.current_position.get('tradingsymbol') != tradingsymbol or bot.current_position['quantity'] == 0:
+                    continue
+                # The book's own native stop/target closing it is not an external close
+                # (booking it also cancels the resting sibling order)
+                if bot.sync_native_exits():
+                    continue
+                logger.warning(f"📉 [{profile}] {reason} - booking {bot.current_position['quantity']} shares")
+                bot.risk_manager.log_risk_event("EXTERNAL_CLOSE", reason)
+                bot.book_external_close(orders, positions)
+
+    def process_reconciliation_events(self, tradingsymbol: str):
+        """Apply broker mismatches against the combined books"""
+        if not self.reconciler:
+            return
+
+        for event in self.reconciler.drain_events():
+            if event.version != self.reconciler.version:
+                continue
+
+            if event.status == "CLOSED_EXTERNALLY":
+                self.flatten_books(tradingsymbol, "Position closed at broker (auto square-off?)")
+                self.publish_net_position(tradingsymbol)
+            else:
+                # A partial change can't be attributed to a single book
+                logger.warning(f"⚠️ Broker net {event.broker_quantity} vs books {event.expected_quantity} - check manually")
+                for bot in self.bots.values():
+                    bot.risk_manager.log_risk_event(
+                        "NET_POSITION_MISMATCH",
+                        f"Broker {event.broker_quantity}, books {event.expected_quantity}"
+                    )
+
+    def run(self, signal_instrument='NIFTY_50', trading_instrument='NIFTYBEES'):
+        """Shared trading loop: fetch once, fan out to every due profile"""
+        logger.info(f"🚀 Starting multi-strategy trading: {', '.join(self.profiles)}")
+
+        if not self.setup_connections():
+            logger.error("❌ Failed to setup connections")
+            return
+
+        signal_token = INSTRUMENTS.get(signal_instrument, {}).get('token', '256265')
+        trading_token = INSTRUMENTS.get(trading_instrument, {}).get('token', '2707457')
+        trading_symbol = INSTRUMENTS.get(trading_instrument, {}).get('symbol', 'NIFTYBEES')
+
+        self.reconcile_restored_positions(trading_symbol)
+
+        self.reconciler = BrokerReconciler(self.executor)
+        self.publish_net_position(trading_symbol)
+        self.reconciler.start()
+        for bot in self.bots.values():
+            bot.snapshot_source = self.reconciler
+
+        # One LTP poll checks protective exits for every book
+        configs = [bot.config for bot in self.bots.values()]
+        self.stop_monitor = StopLossMonitor(
+            self.executor,
+            f"NSE:{trading_token}",
+            poll_interval=min(c.get('stop_monitor_interval', 0.5) for c in configs),
+            latency_budget_ms=min(c.get('stop_monitor_latency_budget_ms', 250) for c in configs),
+            on_exit=lambda bot: self.publish_net_position(trading_symbol)
+        )
+        for bot in self.bots.values():
+            self.stop_monitor.register(bot)
+        self.stop_monitor.start()
+        next(iter(self.bots.values())).start_atr_calibration(signal_token, trading_token, trading_symbol)
+
+        logger.info("✅ Multi-strategy runner is now running (LIVE MODE)...")
+        logger.info("🛑 Press Ctrl+C to stop")
+
+        market_clock = next(iter(self.bots.values()))
+        self.is_running = True
+
+        try:
+            while self.is_running:
+                if not market_clock.is_market_open():
+                    logger.info("📅 Market is closed, waiting...")
+                    time.sleep(60)
+                    continue
+
+                self.process_reconciliation_events(trading_symbol)
+
+                # Profiles that hit their own risk limits stop; the rest carry on
+                now = time.monotonic()
+                due = []
+                for profile, bot in self.bots.items():
+                    if profile in self.stopped_profiles or now < self.next_due[profile]:
+                        continue
+                    bot.roll_trading_day()
+                    should_stop, reason = bot.risk_manager.should_stop_trading()
+                    if should_stop:
+                        if bot.risk_manager.drawdown_exceeded():
+                            logger.warning(f"🛑 [{profile}] Trading stopped: {reason}")
+                            bot.publish(RiskStop, reason=reason)
+                            self.stopped_profiles.add(profile)
+                            continue
+                        # Daily limits clear when roll_trading_day sees the next date
+                        today = bot.clock.now().date()
+                        if self.paused_profiles.get(profile) != today:
+                            self.paused_profiles[profile] = today
+                            logger.warning(f"🛑 [{profile}] Trading paused until the next trading day: {reason}")
+                            bot.publish(RiskStop, reason=reason)
+                        self.next_due[profile] = now + 60
+                        continue
+                    due.append(profile)
+
+                if len(self.stopped_profiles) == len(self.bots):
+                    logger.warning("🛑 All profiles stopped")
+                    break
+
+                if due:
+                    self.run_cycle(due, signal_token, trading_token, trading_symbol)
+
+                # Sleep until the next profile is due (reconciliation events wake us early)
+                active = [self.next_due[p] for p in self.profiles if p not in self.stopped_profiles]
+                timeout = max(1.0, min(active) - time.monotonic()) if active else 1.0
+                if self.reconciler.wait_for_event(timeout):
+                    self.process_reconciliation_events(trading_symbol)
+
+        except KeyboardInterrupt:
+            logger.info("🛑 Keyboard interrupt received")
+        except Exception as e:
+            logger.error(f"❌ Fatal error in multi-strategy loop: {e}")
+        finally:
+            logger.info("📅 Multi-strategy session ended")
+            self.shutdown()
+
+    def run_cycle(self, due: List[str], signal_token: str, trading_token: str, trading_symbol: str):
+        """Fetch market data once and hand the bar to every due profile"""
+        now = time.monotonic()
+
+        signal_df = self.feed.refresh_bars(signal_token)
+        trading_price = self.feed.latest_price(trading_token) if not signal_df.empty else None
+        if signal_df.empty or not trading_price:
+            logger.warning("⚠️ No market data this cycle, retrying...")
+            for profile in due:
+                self.next_due[profile] = now + self.bots[profile].config['check_interval']
+            return
+
+        futures = {
+            profile: self.pool.submit(self.bots[profile].process_market_data, signal_df, trading_price, trading_symbol)
+            for profile in due
+        }
+        for profile, future in futures.items():
+            try:
+                future.result()
+            except Exception as e:
+                logger.error(f"❌ [{profile}] Error in trading step: {e}")
+            self.next_due[profile] = now + self.bots[profile].config['check_interval']
+
+        self.publish_net_position(trading_symbol)
+
+    def publish_net_position(self, tradingsymbol: str):
+        """Re-arm the reconciler when the combined books changed"""
+        net = self.net_position(tradingsymbol)
+        if net['quantity'] != self.published_quantity:
+            self.published_quantity = net['quantity']
+            self.reconciler.watch(net)
+
+    def shutdown(self):
+        """Stop every profile, closing open positions and saving state"""
+        self.is_running = False
+        if self.stop_monitor:
+            self.stop_monitor.stop()
+        if self.reconciler:
+            self.reconciler.stop()
+        for bot in self.bots.values():
+            bot.shutdown()
+        self.events.close()
+        self.pool.shutdown(wait=False)
+
+    def shutdown_handler(self, signum, frame):
+        """Handle shutdown signals gracefully"""
+        logger.info("🛑 Shutdown signal received")
+        self.shutdown()
+        sys.exit(0)
+
+def main():
+    """Run several strategy profiles over one shared data feed"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Run multiple strategy profiles in one live process')
+    parser.add_argument('--profiles', nargs='+', choices=['conservative', 'balanced', 'aggressive', 'scalping'],
+                       default=['conservative', 'aggressive'], help='Strategy profiles to run side by side')
+    parser.add_argument('--signal', choices=['NIFTY_50'], default='NIFTY_50',
+                       help='Signal source instrument')
+    parser.add_argument('--trading', choices=['NIFTYBEES', 'JUNIORBEES', 'BANKBEES'],
+                       default='NIFTYBEES', help='Trading instrument')
+    parser.add_argument('--broker', choices=['kite', 'sim'],
+                       help='Broker backend: live Kite API or the offline simulator')
+    parser.add_argument('--event-log', metavar='PATH',
+                       help='Append every trading event to this JSON-lines file')
+
+    args = parser.parse_args()
+
+    runner = MultiStrategyRunner(args.profiles, broker=args.broker, event_log=args.event_log)
+    runner.run(signal_instrument=args.signal, trading_instrument=args.trading)
+
+if __name__ == "__main__":
+    main()
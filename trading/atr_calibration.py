@@ -0,0 +1,195 @@
+# trading/atr_calibration.py
+
+import json
+import os
+import tempfile
+import threading
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class ATRCalibration:
+    """
+    How signal-instrument ATR maps onto one traded instrument
+
+    scaled_atr = signal_atr * price_ratio * vol_beta
+    """
+    symbol: str
+    price_ratio: float   # traded close / signal close (rolling median)
+    vol_beta: float      # traded volatility / signal volatility, in percent terms
+    samples: int
+    calibrated_at: str   # ISO timestamp
+
+    def scale(self, signal_atr: float) -> float:
+        return signal_atr * self.price_ratio * self.vol_beta
+
+
+def _true_range_pct(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    """True range as a fraction of the previous close"""
+    prev_close = close[:-1]
+    true_range = np.maximum.reduce([
+        high[1:] - low[1:],
+        np.abs(high[1:] - prev_close),
+        np.abs(low[1:] - prev_close)
+    ])
+    return true_range / prev_close
+
+
+class ATRCalibrator:
+    """
+    Empirical ATR scaling between the signal and traded instruments
+
+    Calibrations are computed off the trading path (on startup, on a refresh
+    schedule, or from the CLI) from stored history, kept in an in-memory
+    dict for O(1) lookup by the position sizer, and persisted to JSON so a
+    restart starts from the last calibration.
+    """
+
+    def __init__(self, path: Optional[str] = None, window: int = 500,
+                 refresh_interval: float = 6 * 3600, max_age_hours: float = 72):
+        from config.settings import Settings
+
+        self.path = Path(path) if path else Settings.DATA_DIR / 'atr_calibration.json'
+        self.window = window
+        self.refresh_interval = refresh_interval
+        self.max_age_hours = max_age_hours
+
+        self._table: Dict[str, ATRCalibration] = {}
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.load()
+
+    # ------------------------------------------------------------------
+    # Lookup (hot path)
+    # ------------------------------------------------------------------
+
+    def get(self, symbol: str) -> Optional[ATRCalibration]:
+        return self._table.get(symbol)
+
+    # ------------------------------------------------------------------
+    # Calibration
+    # ------------------------------------------------------------------
+
+    def calibrate(self, signal_df: pd.DataFrame, trading_df: pd.DataFrame, symbol: str) -> Optional[ATRCalibration]:
+        """Fit price ratio and volatility beta over the last `window` aligned bars"""
+        signal_df, trading_df = signal_df.align(trading_df, join='inner', axis=0)
+        signal_df = signal_df.iloc[-self.window:]
+        trading_df = trading_df.iloc[-self.window:]
+
+        if len(signal_df) < 30:
+            logger.warning(f"⚠️ Not enough aligned history to calibrate {symbol}: {len(signal_df)} bars")
+            return None
+
+        signal_close = signal_df['close'].to_numpy(dtype=np.float64)
+        trading_close = trading_df['close'].to_numpy(dtype=np.float64)
+        price_ratio = float(np.median(trading_close / signal_close))
+
+        has_ranges = all(col in df.columns for df in (signal_df, trading_df) for col in ('high', 'low'))
+        if has_ranges:
+            signal_vol = _true_range_pct(signal_df['high'].to_numpy(dtype=np.float64),
+                                         signal_df['low'].to_numpy(dtype=np.float64), signal_close)
+            trading_vol = _true_range_pct(trading_df['high'].to_numpy(dtype=np.float64),
+                                          trading_df['low'].to_numpy(dtype=np.float64), trading_close)
+            vol_beta = float(np.mean(trading_vol) / np.mean(signal_vol))
+        else:
+            signal_vol = np.diff(np.log(signal_close))
+            trading_vol = np.diff(np.log(trading_close))
+            vol_beta = float(np.std(trading_vol) / np.std(signal_vol))
+
+        if not np.isfinite(price_ratio) or not np.isfinite(vol_beta) or price_ratio <= 0 or vol_beta <= 0:
+            logger.warning(f"⚠️ Calibration for {symbol} produced invalid values - keeping previous")
+            return None
+
+        return ATRCalibration(
+            symbol=symbol,
+            price_ratio=price_ratio,
+            vol_beta=vol_beta,
+            samples=len(signal_df),
+            calibrated_at=datetime.now().isoformat()
+        )
+
+    def calibrate_frame(self, data: pd.DataFrame, symbol: str) -> Optional[ATRCalibration]:
+        """Calibrate from a combined backtest frame (signal OHLC + *_trading columns or trading_price)"""
+        signal_df = data[['high', 'low', 'close']]
+        if all(f"{col}_trading" in data.columns for col in ('high', 'low', 'close')):
+            trading_df = data[['high_trading', 'low_trading', 'close_trading']]
+            trading_df.columns = ['high', 'low', 'close']
+        elif 'trading_price' in data.columns:
+            trading_df = data[['trading_price']].rename(columns={'trading_price': 'close'})
+            signal_df = data[['close']]
+        else:
+            logger.error("❌ No traded-instrument prices in data")
+            return None
+        return self.calibrate(signal_df, trading_df, symbol)
+
+    def update(self, calibration: ATRCalibration, persist: bool = True):
+        """Publish a calibration (single dict assignment, safe for concurrent readers)"""
+        self._table[calibration.symbol] = calibration
+        logger.info(f"🔧 ATR calibration for {calibration.symbol}: price ratio {calibration.price_ratio:.5f}, "
+                    f"vol beta {calibration.vol_beta:.3f} ({calibration.samples} bars)")
+        if persist:
+            self.save()
+
+    def is_stale(self, symbol: str) -> bool:
+        calibration = self._table.get(symbol)
+        if calibration is None:
+            return True
+        age = datetime.now() - datetime.fromisoformat(calibration.calibrated_at)
+        return age.total_seconds() > self.max_age_hours * 3600
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def load(self):
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+            self._table = {symbol: ATRCalibration(**entry) for symbol, entry in entries.items()}
+            logger.info(f"📂 Loaded ATR calibrations: {', '.join(self._table) or 'none'}")
+        except Exception as e:
+            logger.error(f"❌ Unreadable ATR calibration file, ignoring: {e}")
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=self.path.parent, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({symbol: asdict(c) for symbol, c in self._table.items()}, f, indent=2)
+        os.replace(tmp_name, self.path)
+
+    # ------------------------------------------------------------------
+    # Scheduled refresh
+    # ------------------------------------------------------------------
+
+    def start(self, refresh_fn: Callable[[], List[ATRCalibration]]):
+        """Run refresh_fn now (if stale) and then every refresh_interval on a daemon thread"""
+        def loop():
+            delay = 0 if any(self.is_stale(symbol) for symbol in self._table) or not self._table else self.refresh_interval
+            while not self._stop_event.wait(delay):
+                started = time.monotonic()
+                try:
+                    for calibration in refresh_fn():
+                        self.update(calibration)
+                except Exception as e:
+                    logger.warning(f"⚠️ ATR calibration refresh failed: {e}")
+                delay = max(0.0, self.refresh_interval - (time.monotonic() - started))
+
+        self._thread = threading.Thread(target=loop, name="ATRCalibrator", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
@@ -0,0 +1,249 @@
+# trading/bars.py
+
+from typing import Iterator, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+PRICE_COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+
+
+class Bars:
+    """
+    Compact OHLCV candle window backed by contiguous arrays
+
+    Prices and volume are float64, timestamps int64 nanoseconds (naive,
+    exchange-local wall clock - the same convention as the live feed, which
+    drops Kite's +05:30 offset). Columns are stored row-major in one
+    (5, capacity) block, so every column is a contiguous 1-D view.
+
+    The bars that own their buffer can append, extend and drop old bars.
+    Slicing (bars[-200:], bars.window(200)) returns a read-only view that
+    shares the buffer: no column data is copied. Existing views never change
+    underneath their reader: the owner only writes past their end, and a
+    full buffer - or a replaced, still-forming last bar - goes to a fresh
+    allocation rather than being overwritten in place.
+    """
+
+    __slots__ = ('_prices', '_timestamps', '_start', '_stop', '_owner')
+
+    def __init__(self, capacity: int = 256):
+        self._prices = np.empty((len(PRICE_COLUMNS), max(1, capacity)), dtype=np.float64)
+        self._timestamps = np.empty(max(1, capacity), dtype=np.int64)
+        self._start = 0
+        self._stop = 0
+        self._owner = True
+
+    # ------------------------------------------------------------------
+    # Construction
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def from_arrays(cls, timestamp, open, high, low, close, volume,
+                    capacity: Optional[int] = None) -> 'Bars':
+        timestamp = np.asarray(timestamp)
+        if timestamp.dtype.kind == 'M':
+            timestamp = timestamp.astype('datetime64[ns]').view(np.int64)
+        n = len(timestamp)
+
+        bars = cls(capacity=max(n, capacity or 0, 1))
+        bars._timestamps[:n] = timestamp
+        for row, values in enumerate((open, high, low, close, volume)):
+            bars._prices[row, :n] = values
+        bars._stop = n
+        return bars
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, capacity: Optional[int] = None) -> 'Bars':
+        """
+        Bars from a candle DataFrame
+
+        Timestamps come from a 'timestamp' column, else a 'date' column, else
+        the index. A missing volume column is read as zeros.
+        """
+        if 'timestamp' in df.columns:
+            stamps = df['timestamp']
+        elif 'date' in df.columns:
+            stamps = df['date']
+        else:
+            stamps = df.index
+        stamps = pd.DatetimeIndex(pd.to_datetime(stamps))
+        if stamps.tz is not None:
+            stamps = stamps.tz_localize(None)
+
+        volume = df['volume'].to_numpy(dtype=np.float64) if 'volume' in df.columns else np.zeros(len(df))
+        return cls.from_arrays(
+            stamps.as_unit('ns').asi8,
+            df['open'].to_numpy(dtype=np.float64),
+            df['high'].to_numpy(dtype=np.float64),
+            df['low'].to_numpy(dtype=np.float64),
+            df['close'].to_numpy(dtype=np.float64),
+            volume,
+            capacity=capacity
+        )
+
+    def to_frame(self) -> pd.DataFrame:
+        """Copy into a DataFrame indexed by timestamp"""
+        frame = pd.DataFrame({col: self[col].copy() for col in PRICE_COLUMNS},
+                             index=pd.DatetimeIndex(self.timestamp.astype('datetime64[ns]'), name='timestamp'))
+        return frame
+
+    # ------------------------------------------------------------------
+    # Columns
+    # ------------------------------------------------------------------
+
+    def _column(self, row: int) -> np.ndarray:
+        column = self._prices[row, self._start:self._stop]
+        if not self._owner:
+            column.flags.writeable = False
+        return column
+
+    @property
+    def timestamp(self) -> np.ndarray:
+        column = self._timestamps[self._start:self._stop]
+        if not self._owner:
+            column.flags.writeable = False
+        return column
+
+    @property
+    def open(self) -> np.ndarray:
+        return self._column(0)
+
+    @property
+    def high(self) -> np.ndarray:
+        return self._column(1)
+
+    @property
+    def low(self) -> np.ndarray:
+        return self._column(2)
+
+    @property
+    def close(self) -> np.ndarray:
+        return self._column(3)
+
+    @property
+    def volume(self) -> np.ndarray:
+        return self._column(4)
+
+    @property
+    def last_timestamp(self) -> Optional[pd.Timestamp]:
+        if not len(self):
+            return None
+        return pd.Timestamp(int(self._timestamps[self._stop - 1]))
+
+    @property
+    def empty(self) -> bool:
+        return self._stop == self._start
+
+    def __len__(self) -> int:
+        return self._stop - self._start
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(('timestamp',) + PRICE_COLUMNS)
+
+    def __getitem__(self, key: Union[str, slice]) -> Union[np.ndarray, 'Bars']:
+        if isinstance(key, str):
+            if key == 'timestamp':
+                return self.timestamp
+            try:
+                return self._column(PRICE_COLUMNS.index(key))
+            except ValueError:
+                raise KeyError(key) from None
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            if step != 1:
+                raise ValueError("Bars views must be contiguous")
+            return self._view(self._start + start, self._start + max(start, stop))
+        raise TypeError(f"Bars indices must be column names or slices, not {type(key).__name__}")
+
+    def __repr__(self) -> str:
+        if self.empty:
+            return "Bars(empty)"
+        first = pd.Timestamp(int(self._timestamps[self._start]))
+        return f"Bars({len(self)} bars, {first} → {self.last_timestamp})"
+
+    # ------------------------------------------------------------------
+    # Views
+    # ------------------------------------------------------------------
+
+    def _view(self, start: int, stop: int) -> 'Bars':
+        view = Bars.__new__(Bars)
+        view._prices = self._prices
+        view._timestamps = self._timestamps
+        view._start = start
+        view._stop = stop
+        view._owner = False
+        return view
+
+    def window(self, length: int) -> 'Bars':
+        """Read-only view of the most recent `length` bars"""
+        return self._view(max(self._start, self._stop - length), self._stop)
+
+    def view(self) -> 'Bars':
+        """Read-only snapshot of the current bars (unaffected by later appends)"""
+        return self._view(self._start, self._stop)
+
+    # ------------------------------------------------------------------
+    # Mutation (owner only)
+    # ------------------------------------------------------------------
+
+    def _check_owner(self):
+        if not self._owner:
+            raise ValueError("Bars view is read-only")
+
+    def _reserve(self, extra: int, replace_last: bool = False):
+        """
+        Make room for `extra` bars past the end, compacting into a new buffer
+        when full or when the last bar (which a view may hold) is replaced
+        """
+        if replace_last:
+            self._stop -= 1
+        elif self._stop + extra <= self._timestamps.shape[0]:
+            return
+        length = len(self)
+        capacity = max(2 * (length + extra), 64)
+        prices = np.empty((len(PRICE_COLUMNS), capacity), dtype=np.float64)
+        timestamps = np.empty(capacity, dtype=np.int64)
+        prices[:, :length] = self._prices[:, self._start:self._stop]
+        timestamps[:length] = self._timestamps[self._start:self._stop]
+        self._prices, self._timestamps = prices, timestamps
+        self._start, self._stop = 0, length
+
+    def append(self, timestamp, open: float, high: float, low: float, close: float, volume: float = 0.0):
+        """Add one bar; a bar with the last bar's timestamp replaces it (a still-forming candle)"""
+        self._check_owner()
+        timestamp = pd.Timestamp(timestamp).value if not isinstance(timestamp, (int, np.integer)) else int(timestamp)
+        replace_last = bool(len(self)) and timestamp == self._timestamps[self._stop - 1]
+        if len(self) and timestamp < self._timestamps[self._stop - 1]:
+            raise ValueError("Bars must be appended in time order")
+        self._reserve(1, replace_last)
+        i = self._stop
+        self._timestamps[i] = timestamp
+        self._prices[:, i] = (open, high, low, close, volume)
+        self._stop += 1
+
+    def extend(self, other: 'Bars'):
+        """Append bars newer than our last one (the overlapping last bar is replaced)"""
+        self._check_owner()
+        if other.empty:
+            return
+        incoming = other.timestamp
+        first = 0
+        replace_last = False
+        if len(self):
+            last = self._timestamps[self._stop - 1]
+            first = int(np.searchsorted(incoming, last, side='left'))
+            replace_last = first < len(incoming) and incoming[first] == last
+        count = len(incoming) - first
+        if count <= 0:
+            return
+        self._reserve(count, replace_last)
+        self._timestamps[self._stop:self._stop + count] = incoming[first:]
+        self._prices[:, self._stop:self._stop + count] = other._prices[:, other._start + first:other._stop]
+        self._stop += count
+
+    def drop_before(self, timestamp):
+        """Forget bars older than timestamp (no copy - the start of the window moves)"""
+        self._check_owner()
+        cutoff = pd.Timestamp(timestamp).value
+        self._start += int(np.searchsorted(self._timestamps[self._start:self._stop], cutoff, side='left'))
@@ -2,14 +2,40 @@
 
 import pandas as pd
 import numpy as np
-from typing import Tuple, Dict, Any
+from typing import Tuple, Dict, Any, Union
+from trading.bars import Bars
+from trading.indicators import (ScratchBuffers, true_range, rolling_mean, rolling_std,
+                                ewm_mean, rsi_last, rsi_series, last_mean, rolling_max, rolling_min)
+from trading.signal_scoring import Confirmations, bar_quality, score_bar, score_bars
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+Candles = Union[pd.DataFrame, Bars]
+
+def _array(data: Candles, column: str) -> np.ndarray:
+    """Column values as float64 without copying"""
+    if isinstance(data, Bars):
+        return data[column]
+    return data[column].to_numpy(dtype=np.float64)
+
+def _series(data: Candles, column: str) -> pd.Series:
+    """Column as a Series for rolling/ewm; wraps Bars arrays without copying"""
+    if isinstance(data, Bars):
+        return pd.Series(data[column], copy=False)
+    return data[column]
+
+def _index(data: Candles) -> pd.Index:
+    return pd.RangeIndex(len(data)) if isinstance(data, Bars) else data.index
+
 class EnhancedTradingStrategy:
     """
     Enhanced multi-indicator trading strategy with market regime filtering
+
+    get_signal reads the candle columns as arrays and computes indicators into
+    scratch buffers owned by the instance, so repeated calls (live loop,
+    backtests) neither copy the input nor allocate per-call work columns.
+    Use one instance per thread.
     """
     
     def __init__(self, config: Dict[str, Any]):
@@ -44,6 +70,16 @@ class EnhancedTradingStrategy:
         # NEW: Market regime filter settings
         self.regime_filter_enabled = config.get('regime_filter_enabled', True)
         
+        # Thresholds the scoring kernel reads
+        self.scoring_config = {
+            'rsi_oversold': self.rsi_oversold,
+            'rsi_overbought': self.rsi_overbought,
+            'volume_threshold': self.volume_threshold
+        }
+        
+        # Reusable work arrays for the array indicator path
+        self.scratch = ScratchBuffers()
+        
         logger.info("✅ Enhanced multi-indicator strategy initialized with regime filter")
         logger.info(f"   SuperTrend: {self.st_period}/{self.st_factor}")
         logger.info(f"   RSI: {self.rsi_period} ({self.rsi_oversold}/{self.rsi_overbought})")
@@ -51,34 +87,39 @@ class EnhancedTradingStrategy:
         logger.info(f"   Volume threshold: {self.volume_threshold}")
         logger.info(f"   Regime filter: {'ENABLED' if self.regime_filter_enabled else 'DISABLED'}")
     
-    def detect_market_regime(self, df: pd.DataFrame) -> Dict[str, Any]:
+    def detect_market_regime(self, df: Candles) -> Dict[str, Any]:
         """Detect market regime to filter poor trading conditions"""
+        return self._market_regime(_array(df, 'high'), _array(df, 'low'), _array(df, 'close'))
+    
+    def _market_regime(self, high: np.ndarray, low: np.ndarray, close: np.ndarray) -> Dict[str, Any]:
         try:
-            if len(df) < 50:
+            n = len(close)
+            if n < 50:
                 return {'skip_trading': False, 'regime': 'INSUFFICIENT_DATA'}
             
             # Calculate volatility regime
-            returns = df['close'].pct_change().dropna()
-            if len(returns) < 20:
-                return {'skip_trading': False, 'regime': 'INSUFFICIENT_DATA'}
+            returns = self.scratch.get('returns', n - 1)
+            np.divide(close[1:], close[:-1], out=returns)
+            returns -= 1
             
-            vol_20 = returns.rolling(20).std() * np.sqrt(252)  # Annualized volatility
-            vol_current = vol_20.iloc[-1] if not vol_20.empty else 0.15
-            vol_median = vol_20.median() if not vol_20.empty else 0.15
+            vol_20 = rolling_std(returns, 20, self.scratch.get('vol_20', n - 1), self.scratch.get('vol_sq', n - 1))
+            vol_20 *= np.sqrt(252)  # Annualized volatility
+            vol_current = vol_20[-1]
+            vol_median = np.median(vol_20[19:])
             
             # Calculate trend strength
-            highs = df['high'].rolling(14).max()
-            lows = df['low'].rolling(14).min()
-            range_size = highs - lows
+            range_high = high[-14:].max()
+            range_low = low[-14:].min()
+            range_size = range_high - range_low
             
             # Avoid division by zero
-            range_size = range_size.replace(0, df['close'].iloc[-1] * 0.01)
+            if range_size == 0:
+                range_size = close[-1] * 0.01
             
-            trend_position = (df['close'] - lows) / range_size
-            trend_current = trend_position.iloc[-1] if not trend_position.empty else 0.5
+            trend_current = (close[-1] - range_low) / range_size
             
             # Calculate price momentum
-            price_change_5 = df['close'].pct_change(5).iloc[-1] if len(df) >= 5 else 0
+            price_change_5 = close[-1] / close[-6] - 1
             price_momentum = abs(price_change_5)
             
             # Determine regime
@@ -111,142 +152,102 @@ class EnhancedTradingStrategy:
             return {'skip_trading': False, 'regime': 'ERROR'}
     
     def calculate_signal_quality(self, signal_data: Dict) -> float:
-        """Calculate overall signal quality score (0-1)"""
+        """Calculate overall signal quality score (0-1) from get_signal's signal_data"""
         try:
             indicators = signal_data.get('indicators', {})
             confirmations = signal_data.get('confirmations', [])
             
-            quality_score = 0
-            max_score = 10
-            
-            # 1. RSI quality (2 points)
-            rsi = indicators.get('rsi', 50)
-            if rsi < 20 or rsi > 80:  # Extreme levels
-                quality_score += 2
-            elif rsi < 30 or rsi > 70:  # Strong levels
-                quality_score += 1
-            
-            # 2. Volume confirmation (2 points)
-            volume_data = indicators.get('volume', {})
-            volume_ratio = volume_data.get('ratio', 1)
-            if volume_ratio > 2.5:  # Very high volume
-                quality_score += 2
-            elif volume_ratio > 2.0:
-                quality_score += 1.5
-            elif volume_ratio > 1.5:
-                quality_score += 1
-            
-            # 3. Trend alignment (3 points)
             supertrend_data = indicators.get('supertrend', {})
-            price = supertrend_data.get('price', 0)
-            supertrend_value = supertrend_data.get('value', 0)
-            
-            if price and supertrend_value:
-                trend_strength = abs(price - supertrend_value) / price
-                if trend_strength > 0.03:  # Very strong trend (>3%)
-                    quality_score += 3
-                elif trend_strength > 0.02:  # Strong trend (>2%)
-                    quality_score += 2
-                elif trend_strength > 0.01:  # Moderate trend (>1%)
-                    quality_score += 1
-            
-            # 4. MACD confirmation (2 points)
             macd_data = indicators.get('macd', {})
-            macd_line = macd_data.get('macd', 0)
-            signal_line = macd_data.get('signal', 0)
-            histogram = macd_data.get('histogram', 0)
-            
-            if abs(histogram) > 0:  # MACD has momentum
-                quality_score += 1
-                if (macd_line > signal_line and histogram > 0) or (macd_line < signal_line and histogram < 0):
-                    quality_score += 1  # Aligned momentum
-            
-            # 5. Multiple confirmations bonus (1 point)
-            if len(confirmations) >= 4:
-                quality_score += 1
-            
-            return min(1.0, quality_score / max_score)  # Cap at 1.0
+            return bar_quality(
+                indicators.get('rsi', 50),
+                indicators.get('volume', {}).get('ratio', 1),
+                supertrend_data.get('price', 0),
+                supertrend_data.get('value', 0),
+                macd_data.get('macd', 0),
+                macd_data.get('signal', 0),
+                len(confirmations)
+            )
             
         except Exception as e:
             logger.error(f"Error calculating signal quality: {e}")
             return 0.5  # Default moderate quality
     
-    def calculate_supertrend(self, df: pd.DataFrame) -> Tuple[pd.Series, pd.Series]:
-        """Calculate SuperTrend indicator - same as before"""
+    def calculate_supertrend(self, df: Candles) -> Tuple[pd.Series, pd.Series]:
+        """Calculate SuperTrend indicator as Series (copied out of the scratch buffers)"""
         try:
-            # Calculate True Range
-            df = df.copy()
-            df['tr1'] = df['high'] - df['low']
-            df['tr2'] = abs(df['high'] - df['close'].shift(1))
-            df['tr3'] = abs(df['low'] - df['close'].shift(1))
-            df['tr'] = df[['tr1', 'tr2', 'tr3']].max(axis=1)
-            
-            # Calculate ATR
-            df['atr'] = df['tr'].rolling(window=self.st_period).mean()
-            
-            # Calculate basic bands
-            df['basic_ub'] = (df['high'] + df['low']) / 2 + (self.st_factor * df['atr'])
-            df['basic_lb'] = (df['high'] + df['low']) / 2 - (self.st_factor * df['atr'])
-            
-            # Calculate final bands
-            df['final_ub'] = df['basic_ub']
-            df['final_lb'] = df['basic_lb']
-            
-            for i in range(1, len(df)):
-                if pd.isna(df['basic_ub'].iloc[i-1]):
-                    continue
-                    
-                # Final Upper Band
-                if df['basic_ub'].iloc[i] < df['final_ub'].iloc[i-1] or df['close'].iloc[i-1] > df['final_ub'].iloc[i-1]:
-                    df.at[df.index[i], 'final_ub'] = df['basic_ub'].iloc[i]
-                else:
-                    df.at[df.index[i], 'final_ub'] = df['final_ub'].iloc[i-1]
-                
-                # Final Lower Band
-                if df['basic_lb'].iloc[i] > df['final_lb'].iloc[i-1] or df['close'].iloc[i-1] < df['final_lb'].iloc[i-1]:
-                    df.at[df.index[i], 'final_lb'] = df['basic_lb'].iloc[i]
-                else:
-                    df.at[df.index[i], 'final_lb'] = df['final_lb'].iloc[i-1]
-            
-            # Calculate SuperTrend
-            df['supertrend'] = np.nan
-            df['trend'] = np.nan
-            
-            for i in range(len(df)):
-                if pd.isna(df['final_ub'].iloc[i]) or pd.isna(df['final_lb'].iloc[i]):
-                    continue
-                    
-                if i == 0:
-                    df.at[df.index[i], 'supertrend'] = df['final_ub'].iloc[i]
-                    df.at[df.index[i], 'trend'] = 1
-                else:
-                    prev_trend = df['trend'].iloc[i-1]
-                    
-                    if prev_trend == 1:
-                        if df['close'].iloc[i] <= df['final_lb'].iloc[i]:
-                            df.at[df.index[i], 'supertrend'] = df['final_lb'].iloc[i]
-                            df.at[df.index[i], 'trend'] = -1
-                        else:
-                            df.at[df.index[i], 'supertrend'] = df['final_lb'].iloc[i]
-                            df.at[df.index[i], 'trend'] = 1
-                    else:
-                        if df['close'].iloc[i] >= df['final_ub'].iloc[i]:
-                            df.at[df.index[i], 'supertrend'] = df['final_ub'].iloc[i]
-                            df.at[df.index[i], 'trend'] = 1
-                        else:
-                            df.at[df.index[i], 'supertrend'] = df['final_ub'].iloc[i]
-                            df.at[df.index[i], 'trend'] = -1
-            
-            return df['supertrend'], df['trend']
-            
+            supertrend, trend = self._supertrend(_array(df, 'high'), _array(df, 'low'), _array(df, 'close'))
+            index = _index(df)
+            return pd.Series(supertrend.copy(), index=index), pd.Series(trend.copy(), index=index)
         except Exception as e:
             logger.error(f"Error calculating SuperTrend: {e}")
-            return pd.Series([np.nan] * len(df), index=df.index), pd.Series([0] * len(df), index=df.index)
+            return pd.Series([np.nan] * len(df), index=_index(df)), pd.Series([0] * len(df), index=_index(df))
     
-    def calculate_rsi(self, df: pd.DataFrame) -> pd.Series:
+    def _supertrend(self, high: np.ndarray, low: np.ndarray, close: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """SuperTrend line and direction in scratch buffers; also leaves true range in 'tr'"""
+        n = len(close)
+        get = self.scratch.get
+        
+        # Calculate ATR
+        tr = true_range(high, low, close, get('tr', n), get('gap', n))
+        atr = rolling_mean(tr, self.st_period, get('st_atr', n))
+        
+        # Calculate basic bands (final bands start as copies of them)
+        final_ub = get('final_ub', n)
+        final_lb = get('final_lb', n)
+        np.add(high, low, out=final_ub)
+        final_ub /= 2
+        atr *= self.st_factor
+        np.subtract(final_ub, atr, out=final_lb)
+        final_ub += atr
+        basic_ub = get('basic_ub', n)
+        basic_lb = get('basic_lb', n)
+        basic_ub[:] = final_ub
+        basic_lb[:] = final_lb
+        
+        # Calculate final bands
+        for i in range(1, n):
+            if np.isnan(basic_ub[i-1]):
+                continue
+            
+            # Final Upper Band
+            if basic_ub[i] < final_ub[i-1] or close[i-1] > final_ub[i-1]:
+                final_ub[i] = basic_ub[i]
+            else:
+                final_ub[i] = final_ub[i-1]
+            
+            # Final Lower Band
+            if basic_lb[i] > final_lb[i-1] or close[i-1] < final_lb[i-1]:
+                final_lb[i] = basic_lb[i]
+            else:
+                final_lb[i] = final_lb[i-1]
+        
+        # Calculate SuperTrend
+        supertrend = get('supertrend', n)
+        trend = get('trend', n)
+        supertrend.fill(np.nan)
+        trend.fill(np.nan)
+        
+        for i in range(n):
+            if np.isnan(final_ub[i]) or np.isnan(final_lb[i]):
+                continue
+            
+            if i == 0:
+                supertrend[i] = final_ub[i]
+                trend[i] = 1
+            elif trend[i-1] == 1:
+                supertrend[i] = final_lb[i]
+                trend[i] = -1 if close[i] <= final_lb[i] else 1
+            else:
+                supertrend[i] = final_ub[i]
+                trend[i] = 1 if close[i] >= final_ub[i] else -1
+        
+        return supertrend, trend
+    
+    def calculate_rsi(self, df: Candles) -> pd.Series:
         """Calculate RSI indicator - same as before"""
         try:
-            delta = df['close'].diff()
+            delta = _series(df, 'close').diff()
             gain = (delta.where(delta > 0, 0)).rolling(window=self.rsi_period).mean()
             loss = (-delta.where(delta < 0, 0)).rolling(window=self.rsi_period).mean()
             rs = gain / loss
@@ -254,25 +255,64 @@ class EnhancedTradingStrategy:
             return rsi
         except Exception as e:
             logger.error(f"Error calculating RSI: {e}")
-            return pd.Series([50] * len(df), index=df.index)
+            return pd.Series([50] * len(df), index=_index(df))
     
-    def calculate_macd(self, df: pd.DataFrame) -> Tuple[pd.Series, pd.Series, pd.Series]:
+    def calculate_macd(self, df: Candles) -> Tuple[pd.Series, pd.Series, pd.Series]:
         """Calculate MACD indicator - same as before"""
         try:
-            exp1 = df['close'].ewm(span=self.macd_fast).mean()
-            exp2 = df['close'].ewm(span=self.macd_slow).mean()
+            close = _series(df, 'close')
+            exp1 = close.ewm(span=self.macd_fast).mean()
+            exp2 = close.ewm(span=self.macd_slow).mean()
             macd = exp1 - exp2
             signal = macd.ewm(span=self.macd_signal).mean()
             histogram = macd - signal
             return macd, signal, histogram
         except Exception as e:
             logger.error(f"Error calculating MACD: {e}")
-            return (pd.Series([0] * len(df), index=df.index), 
-                   pd.Series([0] * len(df), index=df.index), 
-                   pd.Series([0] * len(df), index=df.index))
+            index = _index(df)
+            return (pd.Series([0] * len(df), index=index), 
+                   pd.Series([0] * len(df), index=index), 
+                   pd.Series([0] * len(df), index=index))
     
-    def get_signal(self, df: pd.DataFrame) -> Tuple[str, Dict[str, Any]]:
-        """Enhanced signal generation with regime filter and quality scoring"""
+    def score_history(self, df: Candles) -> np.ndarray:
+        """
+        Score every bar at once (precomputed series, multi-instrument scans)
+
+        Row i holds the buy/sell scores, confirmation bitmask and quality
+        score get_signal would compute from the candles up to bar i (the
+        regime filter aside), as signal_scoring.SCORE_DTYPE. Feed the rows to
+        signal_scoring.decide_signals for signals; decode confirmation bits
+        with signal_scoring.decode_confirmations only where labels are shown.
+        """
+        high = _array(df, 'high')
+        low = _array(df, 'low')
+        close = _array(df, 'close')
+        volume = _array(df, 'volume')
+        n = len(close)
+        get = self.scratch.get
+        
+        supertrend, trend = self._supertrend(high, low, close)
+        rsi = rsi_series(close, self.rsi_period, get('rsi_series', n), get('rsi_scratch', 2 * n))
+        macd = ewm_mean(close, self.macd_fast, get('macd', n))
+        macd -= ewm_mean(close, self.macd_slow, get('macd_slow', n))
+        macd_signal = ewm_mean(macd, self.macd_signal, get('macd_signal', n))
+        avg_volume = rolling_mean(volume, self.volume_period, get('avg_volume', n))
+        recent_high = rolling_max(high, 3, get('recent_high', n))
+        recent_low = rolling_min(low, 3, get('recent_low', n))
+        
+        scores = score_bars(close, supertrend, trend, rsi, macd, macd_signal, volume, avg_volume,
+                            recent_high, recent_low, self.scoring_config)
+        min_data_needed = max(self.st_period, self.rsi_period, self.macd_slow, self.bb_period, self.volume_period)
+        scores[:min_data_needed - 1] = np.zeros((), dtype=scores.dtype)
+        return scores
+    
+    def get_signal(self, df: Candles) -> Tuple[str, Dict[str, Any]]:
+        """
+        Enhanced signal generation with regime filter and quality scoring
+
+        Accepts a candle DataFrame or a Bars window (the live feed and the
+        backtest engine pass Bars views, which avoids per-call DataFrame copies).
+        """
         try:
             # Ensure we have enough data
             min_data_needed = max(self.st_period, self.rsi_period, self.macd_slow, self.bb_period, self.volume_period)
@@ -280,9 +320,15 @@ class EnhancedTradingStrategy:
                 logger.warning(f"Insufficient data: {len(df)} rows, need {min_data_needed}")
                 return "HOLD", {"error": "Insufficient data"}
             
+            high = _array(df, 'high')
+            low = _array(df, 'low')
+            close = _array(df, 'close')
+            volume = _array(df, 'volume')
+            n = len(close)
+            
             # Check market regime first
             if self.regime_filter_enabled:
-                regime = self.detect_market_regime(df)
+                regime = self._market_regime(high, low, close)
                 if regime.get('skip_trading', False):
                     return "HOLD", {
                         "regime": regime,
@@ -292,89 +338,31 @@ class EnhancedTradingStrategy:
                 regime = {'regime': 'FILTER_DISABLED'}
             
             # Calculate all indicators
-            supertrend, trend = self.calculate_supertrend(df.copy())
-            rsi = self.calculate_rsi(df)
-            macd, macd_signal, macd_hist = self.calculate_macd(df)
+            supertrend, trend = self._supertrend(high, low, close)
+            latest_rsi = rsi_last(close, self.rsi_period, self.scratch.get('rsi', 2 * self.rsi_period))
+            macd = ewm_mean(close, self.macd_fast, self.scratch.get('macd', n))
+            macd -= ewm_mean(close, self.macd_slow, self.scratch.get('macd_slow', n))
+            macd_signal = ewm_mean(macd, self.macd_signal, self.scratch.get('macd_signal', n))
             
             # Get latest values
-            latest_close = df['close'].iloc[-1]
-            latest_supertrend = supertrend.iloc[-1]
-            latest_trend = trend.iloc[-1]
-            latest_rsi = rsi.iloc[-1]
-            latest_macd = macd.iloc[-1]
-            latest_macd_signal = macd_signal.iloc[-1]
-            latest_volume = df['volume'].iloc[-1]
-            avg_volume = df['volume'].rolling(window=self.volume_period).mean().iloc[-1]
-            
-            # Calculate ATR for risk management
-            df_temp = df.copy()
-            df_temp['tr1'] = df_temp['high'] - df_temp['low']
-            df_temp['tr2'] = abs(df_temp['high'] - df_temp['close'].shift(1))
-            df_temp['tr3'] = abs(df_temp['low'] - df_temp['close'].shift(1))
-            df_temp['tr'] = df_temp[['tr1', 'tr2', 'tr3']].max(axis=1)
-            atr = df_temp['tr'].rolling(window=14).mean().iloc[-1]
-            
-            # Initialize scoring system
-            buy_score = 0
-            sell_score = 0
-            confirmations = []
-            
-            # 1. SuperTrend Analysis (Weight: 3)
-            if not pd.isna(latest_trend):
-                if latest_trend == 1 and latest_close > latest_supertrend:
-                    buy_score += 3
-                    confirmations.append("SuperTrend Bullish")
-                elif latest_trend == -1 and latest_close < latest_supertrend:
-                    sell_score += 3
-                    confirmations.append("SuperTrend Bearish")
-            
-            # 2. RSI Analysis (Weight: 2) - More selective with adjusted thresholds
-            if not pd.isna(latest_rsi):
-                if latest_rsi < self.rsi_oversold:
-                    buy_score += 2
-                    confirmations.append("RSI Oversold")
-                elif latest_rsi > self.rsi_overbought:
-                    sell_score += 2
-                    confirmations.append("RSI Overbought")
-                elif self.rsi_oversold < latest_rsi < (self.rsi_oversold + 10):
-                    buy_score += 1
-                    confirmations.append("RSI Bullish Zone")
-                elif (self.rsi_overbought - 10) < latest_rsi < self.rsi_overbought:
-                    sell_score += 1
-                    confirmations.append("RSI Bearish Zone")
-            
-            # 3. MACD Analysis (Weight: 2) - More stringent
-            if not pd.isna(latest_macd) and not pd.isna(latest_macd_signal):
-                macd_histogram = latest_macd - latest_macd_signal
-                if latest_macd > latest_macd_signal and macd_histogram > 0:
-                    buy_score += 2
-                    confirmations.append("MACD Bullish")
-                elif latest_macd < latest_macd_signal and macd_histogram < 0:
-                    sell_score += 2
-                    confirmations.append("MACD Bearish")
-            
-            # 4. Volume Analysis (Weight: 2) - Higher threshold
-            if not pd.isna(latest_volume) and not pd.isna(avg_volume):
-                volume_ratio = latest_volume / avg_volume if avg_volume > 0 else 1
-                if volume_ratio > self.volume_threshold:
-                    # High volume supports the trend
-                    if buy_score > sell_score:
-                        buy_score += 2
-                        confirmations.append("High Volume Support")
-                    elif sell_score > buy_score:
-                        sell_score += 2
-                        confirmations.append("High Volume Support")
-            
-            # 5. Price Action (Weight: 1)
-            if len(df) >= 3:
-                recent_highs = df['high'].iloc[-3:].max()
-                recent_lows = df['low'].iloc[-3:].min()
-                if latest_close > recent_highs * 0.999:  # Near recent high
-                    buy_score += 1
-                    confirmations.append("Breaking High")
-                elif latest_close < recent_lows * 1.001:  # Near recent low
-                    sell_score += 1
-                    confirmations.append("Breaking Low")
+            latest_close = close[-1]
+            latest_supertrend = supertrend[-1]
+            latest_trend = trend[-1]
+            latest_macd = macd[-1]
+            latest_macd_signal = macd_signal[-1]
+            latest_volume = volume[-1]
+            avg_volume = last_mean(volume, self.volume_period)
+            
+            # Calculate ATR for risk management (true range left by _supertrend)
+            atr = last_mean(self.scratch.get('tr', n), 14)
+            
+            # Score the bar (buy/sell weights, confirmation bits, quality)
+            recent_high = np.nanmax(high[-3:])
+            recent_low = np.nanmin(low[-3:])
+            buy_score, sell_score, flags, quality_score = score_bar(
+                latest_close, latest_supertrend, latest_trend, latest_rsi, latest_macd, latest_macd_signal,
+                latest_volume, avg_volume, recent_high, recent_low, self.scoring_config)
+            confirmations = Confirmations(flags)
             
             # Prepare initial signal data
             signal_data = {
@@ -406,8 +394,6 @@ class EnhancedTradingStrategy:
                 }
             }
             
-            # Calculate signal quality
-            quality_score = self.calculate_signal_quality(signal_data)
             signal_data['quality_score'] = quality_score
             
             # Adjust minimum confirmations based on quality and regime
@@ -424,8 +410,6 @@ class EnhancedTradingStrategy:
                 adjusted_min_confirmations += 1
             
             # Determine signal based on adjusted scores
-            max_score = max(buy_score, sell_score)
-            
             if buy_score >= adjusted_min_confirmations and buy_score > sell_score:
                 signal = "BUY"
                 confidence = min(0.95, (buy_score / 12) * (1 + quality_score * 0.5))
@@ -0,0 +1,307 @@
+# trading/event_bus.py
+
+import json
+import threading
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, ClassVar, Dict, List, Optional, Sequence, Tuple, Type, Union
+
+from trading.signal_scoring import decode_confirmations
+from trading.state_journal import _encode
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# What a full subscriber queue does with the next event
+DROP_OLDEST = 'drop_oldest'  # evict the oldest queued event (subscriber sees the latest state)
+DROP_NEWEST = 'drop_newest'  # discard the incoming event (subscriber sees an unbroken prefix)
+DROP_POLICIES = (DROP_OLDEST, DROP_NEWEST)
+
+
+# ----------------------------------------------------------------------
+# Events
+# ----------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class Event:
+    """Base of everything published on the bus; timestamp is the bot's clock"""
+    kind: ClassVar[str] = 'event'
+    profile: str
+    timestamp: datetime
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'type': self.kind, **asdict(self)}
+
+
+@dataclass(frozen=True)
+class BarClosed(Event):
+    """A signal-instrument candle completed (the feed moved on to the next one)"""
+    kind: ClassVar[str] = 'bar_closed'
+    bar_time: datetime
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float
+
+
+@dataclass(frozen=True)
+class SignalComputed(Event):
+    """Strategy output for one trading-loop step; changed when it differs from the last step"""
+    kind: ClassVar[str] = 'signal_computed'
+    signal: str
+    previous: str
+    changed: bool
+    signal_price: float
+    trading_price: float
+    symbol: str
+    confidence: float = 0.0
+    quality_score: float = 0.0
+    confirmation_flags: int = 0  # CONFIRMATION_FLAGS bitmask; labels are decoded by consumers
+
+    @property
+    def confirmations(self) -> List[str]:
+        return decode_confirmations(self.confirmation_flags)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**super().to_dict(), 'confirmations': self.confirmations}
+
+
+@dataclass(frozen=True)
+class OrderPlaced(Event):
+    """The broker accepted an entry or exit order"""
+    kind: ClassVar[str] = 'order_placed'
+    order_id: str
+    symbol: str
+    transaction_type: str
+    quantity: int
+    price: float
+    purpose: str  # 'entry' or 'exit'
+    reason: str = ''
+
+
+@dataclass(frozen=True)
+class Fill(Event):
+    """An execution the broker reported complete (average price and filled quantity)"""
+    kind: ClassVar[str] = 'fill'
+    order_id: str
+    symbol: str
+    transaction_type: str
+    quantity: int
+    price: float
+    purpose: str  # 'entry' or 'exit'
+
+
+@dataclass(frozen=True)
+class PositionExit(Event):
+    """A round trip completed; trade is the record written to the trade history"""
+    kind: ClassVar[str] = 'exit'
+    reason: str
+    pnl: float
+    trade: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class RiskStop(Event):
+    """A risk limit stopped trading (daily limits for the rest of the day, drawdown for the session)"""
+    kind: ClassVar[str] = 'risk_stop'
+    reason: str
+
+
+# ----------------------------------------------------------------------
+# Bus
+# ----------------------------------------------------------------------
+
+class Subscription(threading.Thread):
+    """
+    One subscriber: a bounded queue drained by its own daemon thread
+
+    Publishing only appends to the deque and sets an Event (both atomic
+    under the GIL), so the publisher never waits on a lock or a slow
+    handler. When the queue is full the drop policy decides which event is
+    lost; drops are counted, and the first one of each run is logged.
+    """
+
+    def __init__(self, handler: Callable[[Event], None], event_types: Optional[Tuple[Type[Event], ...]] = None,
+                 max_queue: int = 1000, policy: str = DROP_OLDEST, name: Optional[str] = None):
+        if policy not in DROP_POLICIES:
+            raise ValueError(f"Unknown drop policy '{policy}' (expected one of {', '.join(DROP_POLICIES)})")
+        if max_queue < 1:
+            raise ValueError("max_queue must be at least 1")
+        name = name or getattr(handler, '__name__', type(handler).__name__)
+        super().__init__(name=f"events-{name}", daemon=True)
+        self.handler = handler
+        self.event_types = event_types
+        self.max_queue = max_queue
+        self.policy = policy
+
+        self._queue: deque = deque(maxlen=max_queue if policy == DROP_OLDEST else None)
+        self._wakeup = threading.Event()
+        self._stop_event = threading.Event()
+        self._dropping = False
+
+        self.delivered = 0
+        self.dropped = 0
+        self.errors = 0
+
+    def accepts(self, event: Event) -> bool:
+        return self.event_types is None or isinstance(event, self.event_types)
+
+    def offer(self, event: Event):
+        """Queue an event without blocking (called on the publisher's thread)"""
+        if len(self._queue) >= self.max_queue:
+            self.dropped += 1
+            if not self._dropping:
+                self._dropping = True
+                logger.warning(f"⚠️ Event subscriber {self.name} is falling behind - {self.policy.replace('_', ' ')}")
+            if self.policy == DROP_NEWEST:
+                return
+        self._queue.append(event)
+        self._wakeup.set()
+
+    def run(self):
+        while True:
+            self._wakeup.wait()
+            # Clear before draining: an event queued after this re-arms the wakeup
+            self._wakeup.clear()
+            self._drain()
+            if self._stop_event.is_set():
+                self._drain()
+                break
+        close = getattr(self.handler, 'close', None)
+        if callable(close):
+            close()
+
+    def _drain(self):
+        while self._queue:
+            try:
+                event = self._queue.popleft()
+            except IndexError:
+                return
+            try:
+                self.handler(event)
+                self.delivered += 1
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"❌ Event subscriber {self.name} failed on {event.kind}: {e}")
+        self._dropping = False
+
+    def stop(self, timeout: Optional[float] = None):
+        """Deliver what is queued, then end the thread"""
+        self._stop_event.set()
+        self._wakeup.set()
+        if self.is_alive():
+            self.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        return {'queued': len(self._queue), 'delivered': self.delivered,
+                'dropped': self.dropped, 'errors': self.errors, 'policy': self.policy}
+
+
+class EventBus:
+    """
+    In-process publish/subscribe for trading events
+
+    The trading loop publishes typed events (BarClosed, SignalComputed,
+    OrderPlaced, Fill, PositionExit, RiskStop) and moves on: each
+    subscriber has its own bounded queue and thread, so a slow dashboard
+    or sink costs the loop one deque append, never a wait. Subscribers see
+    events in publish order.
+    """
+
+    def __init__(self):
+        self._subscriptions: Tuple[Subscription, ...] = ()
+        self._lock = threading.Lock()
+        self.closed = False
+
+    def subscribe(self, handler: Callable[[Event], None],
+                  event_types: Optional[Sequence[Type[Event]]] = None,
+                  max_queue: int = 1000, policy: str = DROP_OLDEST,
+                  name: Optional[str] = None) -> Subscription:
+        """
+        Run handler on its own thread for every published event (or only
+        event_types). A handler with a close() method is closed when the
+        bus closes.
+        """
+        if self.closed:
+            raise RuntimeError("Event bus is closed")
+        subscription = Subscription(handler, tuple(event_types) if event_types else None,
+                                    max_queue=max_queue, policy=policy, name=name)
+        subscription.start()
+        # Copy-on-write, so publish() iterates without taking the lock
+        with self._lock:
+            self._subscriptions = self._subscriptions + (subscription,)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription, timeout: Optional[float] = 5.0):
+        with self._lock:
+            self._subscriptions = tuple(s for s in self._subscriptions if s is not subscription)
+        subscription.stop(timeout)
+
+    def publish(self, event: Event):
+        """Hand event to every interested subscriber; never blocks"""
+        for subscription in self._subscriptions:
+            if subscription.accepts(event):
+                subscription.offer(event)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {subscription.name: subscription.stats() for subscription in self._subscriptions}
+
+    def close(self, timeout: Optional[float] = 5.0):
+        """Flush every subscriber's queue and stop its thread"""
+        if self.closed:
+            return
+        self.closed = True
+        with self._lock:
+            subscriptions, self._subscriptions = self._subscriptions, ()
+        for subscription in subscriptions:
+            subscription.stop(timeout)
+            if subscription.dropped:
+                logger.warning(f"⚠️ Event subscriber {subscription.name} dropped {subscription.dropped} events")
+
+
+# ----------------------------------------------------------------------
+# Subscribers
+# ----------------------------------------------------------------------
+
+class JsonLinesSink:
+    """Append every event to a JSON-lines file for offline analysis (one object per line)"""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    def __call__(self, event: Event):
+        self._file.write(json.dumps(event.to_dict(), default=_encode) + '\n')
+        self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+
+def log_signal_changes(event: SignalComputed):
+    """The live loop's signal-change report, written from a subscriber thread"""
+    if not event.changed:
+        return
+    logger.info(f"📊 [{event.profile}] Signal Change: {event.previous} → {event.signal}")
+    logger.info(f"📈 NIFTY 50: ₹{event.signal_price:.2f}")
+    logger.info(f"💰 {event.symbol}: ₹{event.trading_price:.2f}")
+    if event.signal != "HOLD":
+        logger.info(f"🎯 Confidence: {event.confidence:.1%}")
+        logger.info(f"⭐ Quality: {event.quality_score:.1%}")
+        logger.info(f"✅ Confirmations: {', '.join(event.confirmations)}")
+
+
+def create_event_bus(event_log: Optional[Union[str, Path]] = None) -> EventBus:
+    """A bus with the signal-change logger and, given event_log, a JSON-lines sink"""
+    bus = EventBus()
+    bus.subscribe(log_signal_changes, [SignalComputed])
+    if event_log:
+        # Offline analysis wants every event in order, so a backed-up sink loses the newest
+        bus.subscribe(JsonLinesSink(event_log), max_queue=10000, policy=DROP_NEWEST)
+        logger.info(f"📝 Writing trading events to {event_log}")
+    return bus
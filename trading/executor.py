@@ -3,18 +3,32 @@
 import pandas as pd
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
+from utils.clock import SYSTEM_CLOCK
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# NSE tick size for ETFs
+TICK_SIZE = 0.01
+
+# Kite order statuses that will not change any more
+TERMINAL_STATUSES = {'COMPLETE', 'CANCELLED', 'REJECTED'}
+
+def round_to_tick(price: float, tick_size: float = TICK_SIZE) -> float:
+    """Round a price to the exchange tick"""
+    return round(round(price / tick_size) * tick_size, 2)
+
 class OrderExecutor:
     """Order execution class for Kite Connect trading"""
     
-    def __init__(self, kite):
+    def __init__(self, kite, clock=None):
         self.kite = kite
+        self.clock = clock or SYSTEM_CLOCK
         logger.info("✅ OrderExecutor initialized")
     
-    def place_order(self, tradingsymbol: str, transaction_type: str, quantity: int) -> Optional[str]:
+    def place_order(self, tradingsymbol: str, transaction_type: str, quantity: int,
+                    order_type: str = 'MARKET', price: Optional[float] = None,
+                    trigger_price: Optional[float] = None) -> Optional[str]:
         """
         Place order with correct Kite SDK format
         
@@ -22,30 +36,211 @@ class OrderExecutor:
             tradingsymbol: Trading symbol (e.g., 'NIFTYBEES')
             transaction_type: 'BUY' or 'SELL'
             quantity: Number of shares
+            order_type: 'MARKET', 'LIMIT', 'SL' or 'SL-M'
+            price: Limit price (LIMIT/SL)
+            trigger_price: Trigger price (SL/SL-M)
             
         Returns:
             Order ID if successful, None if failed
         """
         try:
+            params = {}
+            if price is not None:
+                params['price'] = round_to_tick(price)
+            if trigger_price is not None:
+                params['trigger_price'] = round_to_tick(trigger_price)
+            
             # Use the corrected format with variety as first positional argument
             order_id = self.kite.place_order(
                 variety='regular',           # First positional argument (THE FIX!)
                 tradingsymbol=tradingsymbol,
                 exchange='NSE',
                 transaction_type=transaction_type,
-                order_type='MARKET',
+                order_type=order_type,
                 quantity=int(quantity),
                 product='MIS',               # Intraday
-                validity='DAY'               # Added required validity parameter
+                validity='DAY',              # Added required validity parameter
+                **params
             )
             
-            logger.info(f"✅ Order placed: {transaction_type} {quantity} {tradingsymbol} - ID: {order_id}")
+            if order_type == 'MARKET':
+                logger.info(f"✅ Order placed: {transaction_type} {quantity} {tradingsymbol} - ID: {order_id}")
+            else:
+                logger.info(f"✅ {order_type} order placed: {transaction_type} {quantity} {tradingsymbol} "
+                            f"{params} - ID: {order_id}")
             return order_id
             
         except Exception as e:
             logger.error(f"❌ Order failed: {transaction_type} {quantity} {tradingsymbol} - Error: {e}")
             return None
     
+    def modify_order(self, order_id: str, price: Optional[float] = None,
+                     trigger_price: Optional[float] = None) -> bool:
+        """
+        Modify price / trigger price of an open order
+        
+        Returns:
+            True if the broker accepted the modification
+        """
+        try:
+            params = {}
+            if price is not None:
+                params['price'] = round_to_tick(price)
+            if trigger_price is not None:
+                params['trigger_price'] = round_to_tick(trigger_price)
+            
+            self.kite.modify_order(variety='regular', order_id=order_id, **params)
+            logger.info(f"✏️ Order modified: {order_id} {params}")
+            return True
+            
+        except Exception as e:
+            logger.error(f"❌ Order modify failed: {order_id} - Error: {e}")
+            return False
+    
+    def cancel_order(self, order_id: str) -> bool:
+        """
+        Cancel an open order
+        
+        Returns:
+            True if the broker accepted the cancellation
+        """
+        try:
+            self.kite.cancel_order(variety='regular', order_id=order_id)
+            logger.info(f"🚫 Order cancelled: {order_id}")
+            return True
+            
+        except Exception as e:
+            logger.warning(f"⚠️ Order cancel failed: {order_id} - Error: {e}")
+            return False
+    
+    def get_order_status(self, order_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Latest state of one order
+        
+        Returns:
+            Last entry of the order's history, or None if failed
+        """
+        try:
+            history = self.kite.order_history(order_id)
+            return history[-1] if history else None
+            
+        except Exception as e:
+            logger.error(f"❌ Failed to get order status for {order_id}: {e}")
+            return None
+    
+    def wait_for_fill(self, order_id: str, timeout: float = 5.0, poll_interval: float = 0.25) -> Optional[Dict[str, Any]]:
+        """
+        Wait for an order to reach a terminal status
+        
+        Returns:
+            Final order state if COMPLETE, None otherwise
+        """
+        deadline = self.clock.monotonic() + timeout
+        while True:
+            order = self.get_order_status(order_id)
+            if order and order.get('status') in TERMINAL_STATUSES:
+                return order if order['status'] == 'COMPLETE' else None
+            if self.clock.monotonic() >= deadline:
+                logger.warning(f"⚠️ Order {order_id} not filled after {timeout:.0f}s")
+                return None
+            self.clock.sleep(poll_interval)
+    
+    def place_exit_orders(self, tradingsymbol: str, quantity: int, is_long: bool,
+                          stop_loss: float, take_profit: float) -> Dict[str, Optional[str]]:
+        """
+        Place exchange-resident exits for a filled entry: an SL-M stop and a LIMIT target
+        
+        The two orders form an OCO pair; check_exit_orders() cancels the
+        survivor once either one fills.
+        
+        Returns:
+            {'stop': order_id, 'target': order_id} (None for a leg that failed)
+        """
+        exit_side = "SELL" if is_long else "BUY"
+        
+        stop_id = self.place_order(tradingsymbol, exit_side, quantity,
+                                   order_type='SL-M', trigger_price=stop_loss)
+        target_id = self.place_order(tradingsymbol, exit_side, quantity,
+                                     order_type='LIMIT', price=take_profit)
+        
+        return {'stop': stop_id, 'target': target_id}
+    
+    def check_exit_orders(self, exit_orders: Dict[str, Optional[str]],
+                          orders: Optional[list] = None) -> Optional[Dict[str, Any]]:
+        """
+        Detect a filled native exit and cancel its sibling (OCO)
+        
+        Args:
+            exit_orders: {'stop': order_id, 'target': order_id}
+            orders: An already fetched order list (e.g. the reconciler's
+                snapshot); fetched from the broker when None
+        
+        Returns:
+            {'leg': 'stop'|'target', 'order_id', 'average_price', 'both_filled', 'order'} or None
+            ('order' is the broker's state of the filled leg)
+        """
+        if orders is None:
+            orders = self.get_orders()
+        if not orders:
+            return None
+        
+        by_id = {order.get('order_id'): order for order in orders}
+        filled = {leg: by_id[order_id] for leg, order_id in exit_orders.items()
+                  if order_id and by_id.get(order_id, {}).get('status') == 'COMPLETE'}
+        if not filled:
+            return None
+        
+        leg = 'stop' if 'stop' in filled else 'target'
+        sibling = 'target' if leg == 'stop' else 'stop'
+        
+        sibling_id = exit_orders.get(sibling)
+        if sibling_id and sibling not in filled:
+            if by_id.get(sibling_id, {}).get('status') not in TERMINAL_STATUSES:
+                self.cancel_order(sibling_id)
+        
+        order = filled[leg]
+        return {
+            'leg': leg,
+            'order_id': order['order_id'],
+            'average_price': float(order.get('average_price') or 0),
+            'both_filled': len(filled) == 2,
+            'order': order
+        }
+    
+    @staticmethod
+    def find_closing_order(orders: list, tradingsymbol: str, is_long: bool,
+                           since: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
+        """
+        The latest completed order that closed a position outside the bot
+        
+        Looks for a COMPLETE sell (long) or buy (short) of tradingsymbol,
+        placed at or after since when the broker reports order times.
+        """
+        side = "SELL" if is_long else "BUY"
+        for order in reversed(orders or []):
+            if (order.get('tradingsymbol') != tradingsymbol or order.get('transaction_type') != side
+                    or order.get('status') != 'COMPLETE'):
+                continue
+            placed = order.get('order_timestamp')
+            if since is not None and isinstance(placed, datetime) and placed < since:
+                continue
+            return order
+        return None
+    
+    def cancel_exit_orders(self, exit_orders: Dict[str, Optional[str]]) -> Optional[Dict[str, Any]]:
+        """
+        Cancel both native exits before exiting some other way
+        
+        Returns:
+            The fill from check_exit_orders() if a leg completed first, else None
+        """
+        for order_id in exit_orders.values():
+            if order_id:
+                self.cancel_order(order_id)
+        
+        # A leg may have filled while we were cancelling
+        return self.check_exit_orders(exit_orders)
+    
     def get_historical_data(self, instrument_token: str, from_date: datetime, to_date: datetime, interval: str = "30minute") -> pd.DataFrame:
         """
         Get historical data for analysis
@@ -135,6 +330,63 @@ class OrderExecutor:
             logger.error(f"❌ Failed to get positions: {e}")
             return {}
     
+    def get_orders(self) -> list:
+        """
+        Get today's orders
+        
+        Returns:
+            List of order dictionaries
+        """
+        try:
+            orders = self.kite.orders()
+            logger.debug("✅ Retrieved orders")
+            return orders
+            
+        except Exception as e:
+            logger.error(f"❌ Failed to get orders: {e}")
+            return []
+    
+    def compare_position(self, current_position: Dict[str, Any], positions: Dict[str, Any]) -> tuple:
+        """
+        Compare tracked position against a broker positions payload
+        
+        Args:
+            current_position: Current position tracking
+            positions: Result of kite.positions()
+            
+        Returns:
+            Tuple of (sync_needed: bool, status: str, broker_qty: int or None)
+        """
+        day_positions = positions.get('day', [])
+        
+        # Look for the current symbol
+        symbol = current_position.get('tradingsymbol')
+        if not symbol:
+            return False, "NO_SYMBOL", None
+        
+        # Find matching position
+        broker_position = None
+        for pos in day_positions:
+            if pos.get('tradingsymbol') == symbol and pos.get('exchange') == 'NSE':
+                broker_position = pos
+                break
+        
+        current_qty = current_position.get('quantity', 0)
+        
+        if broker_position:
+            broker_qty = broker_position.get('quantity', 0)
+            
+            if current_qty != broker_qty:
+                if broker_qty == 0 and current_qty != 0:
+                    return True, "CLOSED_EXTERNALLY", 0
+                return True, "SYNCED", broker_qty
+            return False, "IN_SYNC", broker_qty
+        
+        if current_qty != 0:
+            return True, "CLOSED_EXTERNALLY", None
+        
+        return False, "IN_SYNC", None
+    
     def sync_position_with_broker(self, current_position: Dict[str, Any]) -> tuple:
         """
         Sync position with broker to detect external changes
@@ -148,41 +400,21 @@ class OrderExecutor:
         try:
             # Get actual positions from broker
             positions = self.get_positions()
-            day_positions = positions.get('day', [])
-            
-            # Look for the current symbol
-            symbol = current_position.get('tradingsymbol')
-            if not symbol:
-                return False, "NO_SYMBOL"
-            
-            # Find matching position
-            broker_position = None
-            for pos in day_positions:
-                if pos.get('tradingsymbol') == symbol and pos.get('exchange') == 'NSE':
-                    broker_position = pos
-                    break
+            if not positions:
+                # A failed fetch must not be mistaken for a flat account
+                return False, "ERROR"
             
-            current_qty = current_position.get('quantity', 0)
+            sync_needed, status, broker_qty = self.compare_position(current_position, positions)
             
-            if broker_position:
-                broker_qty = broker_position.get('quantity', 0)
-                
-                if current_qty != broker_qty:
-                    logger.warning(f"⚠️ Position mismatch: Bot={current_qty}, Broker={broker_qty}")
-                    
-                    if broker_qty == 0 and current_qty > 0:
-                        logger.info("📉 Position was closed externally (auto square-off)")
-                        return True, "CLOSED_EXTERNALLY"
-                    else:
-                        logger.info(f"🔄 Position synced: {broker_qty} shares")
-                        current_position['quantity'] = broker_qty
-                        return True, "SYNCED"
-            else:
-                if current_qty > 0:
-                    logger.warning("⚠️ Position not found in broker, assuming closed")
-                    return True, "CLOSED_EXTERNALLY"
+            if status == "CLOSED_EXTERNALLY":
+                logger.warning(f"⚠️ Position mismatch: Bot={current_position.get('quantity', 0)}, Broker={broker_qty or 0}")
+                logger.info("📉 Position was closed externally (auto square-off)")
+            elif status == "SYNCED":
+                logger.warning(f"⚠️ Position mismatch: Bot={current_position.get('quantity', 0)}, Broker={broker_qty}")
+                logger.info(f"🔄 Position synced: {broker_qty} shares")
+                current_position['quantity'] = broker_qty
             
-            return False, "IN_SYNC"
+            return sync_needed, status
             
         except Exception as e:
             logger.error(f"❌ Position sync failed: {e}")
@@ -195,6 +427,6 @@ class OrderExecutor:
         Returns:
             True if approaching market close
         """
-        current_time = datetime.now().time()
+        current_time = self.clock.now().time()
         close_time = datetime.strptime("15:15", "%H:%M").time()  # 15 min before actual close
         return current_time >= close_time
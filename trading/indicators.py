@@ -0,0 +1,166 @@
+# trading/indicators.py
+
+from typing import Dict
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+class ScratchBuffers:
+    """
+    Named float64 work arrays reused across indicator calls
+
+    get() hands out a view of the first n elements of a buffer that only
+    grows (doubling), so steady-state evaluation allocates nothing. A
+    buffer's contents are valid until the next call that asks for the same
+    name - copy anything that must outlive it. Not thread-safe: give each
+    thread its own strategy instance (the multi-strategy runner already does).
+    """
+
+    __slots__ = ('_buffers',)
+
+    def __init__(self):
+        self._buffers: Dict[str, np.ndarray] = {}
+
+    def get(self, name: str, n: int) -> np.ndarray:
+        buffer = self._buffers.get(name)
+        if buffer is None or len(buffer) < n:
+            size = max(n, 2 * len(buffer) if buffer is not None else 0, 64)
+            buffer = self._buffers[name] = np.empty(size, dtype=np.float64)
+        return buffer[:n]
+
+    def nbytes(self) -> int:
+        return sum(buffer.nbytes for buffer in self._buffers.values())
+
+
+def true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray,
+               out: np.ndarray, scratch: np.ndarray) -> np.ndarray:
+    """True range; the first bar has no previous close and uses high - low"""
+    np.subtract(high, low, out=out)
+    if len(out) > 1:
+        tail = out[1:]
+        prev_close = close[:-1]
+        gap = scratch[:len(tail)]
+        for other in (high, low):
+            np.subtract(other[1:], prev_close, out=gap)
+            np.fmax(tail, np.abs(gap, out=gap), out=tail)
+    return out
+
+
+def rolling_sum(values: np.ndarray, window: int, out: np.ndarray) -> np.ndarray:
+    """Trailing window sum; the first window - 1 entries are NaN. out may be values."""
+    if len(values) >= window:
+        np.sum(sliding_window_view(values, window), axis=1, out=out[window - 1:])
+    out[:window - 1] = np.nan                           # after the sums, which may read these
+    return out
+
+
+def rolling_mean(values: np.ndarray, window: int, out: np.ndarray) -> np.ndarray:
+    rolling_sum(values, window, out)
+    out /= window
+    return out
+
+
+def rolling_std(values: np.ndarray, window: int, out: np.ndarray, scratch: np.ndarray) -> np.ndarray:
+    """Trailing sample standard deviation (ddof=1); scratch must be as long as values"""
+    rolling_sum(values, window, out)                    # sum x
+    np.multiply(values, values, out=scratch)
+    squares = rolling_sum(scratch, window, scratch)     # sum x^2, computed in place
+    np.multiply(out, out, out=out)
+    out /= window                                       # (sum x)^2 / n
+    np.subtract(squares, out, out=out)
+    np.maximum(out, 0.0, out=out)                       # clamp rounding below zero
+    out /= window - 1
+    return np.sqrt(out, out=out)
+
+
+def ewm_mean(values: np.ndarray, span: float, out: np.ndarray) -> np.ndarray:
+    """
+    Exponentially weighted mean, same recursion as pandas ewm(span=...).mean()
+
+    (adjust=True, no missing values), so results match pandas exactly.
+    """
+    alpha = 2.0 / (span + 1.0)
+    old_wt_factor = 1.0 - alpha
+    if not len(values):
+        return out
+
+    weighted = float(values[0])
+    old_wt = 1.0
+    out[0] = weighted
+    for i in range(1, len(values)):
+        cur = float(values[i])
+        old_wt *= old_wt_factor
+        if weighted != cur:
+            weighted = ((old_wt * weighted) + cur) / (old_wt + 1.0)
+        old_wt += 1.0
+        out[i] = weighted
+    return out
+
+
+def rsi_last(close: np.ndarray, period: int, scratch: np.ndarray) -> float:
+    """
+    RSI of the last bar with simple-average gains and losses
+
+    Matches the rolling-mean RSI (the first bar's missing change counts as 0).
+    """
+    n = len(close)
+    if n < period:
+        return np.nan
+    count = min(period, n - 1)
+    changes = scratch[:count]
+    np.subtract(close[n - count:], close[n - count - 1:n - 1], out=changes)
+    gain = np.maximum(changes, 0.0, out=scratch[count:2 * count]).sum() / period
+    loss = -np.minimum(changes, 0.0, out=scratch[count:2 * count]).sum() / period
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rs = np.float64(gain) / np.float64(loss)
+        return float(100 - (100 / (1 + rs)))
+
+
+def last_mean(values: np.ndarray, window: int) -> float:
+    """Mean of the trailing window (NaN when there are fewer values)"""
+    if len(values) < window:
+        return np.nan
+    return float(np.mean(values[-window:]))
+
+
+def rsi_series(close: np.ndarray, period: int, out: np.ndarray, scratch: np.ndarray) -> np.ndarray:
+    """
+    RSI of every bar, as rsi_last would compute it on the history up to it
+
+    scratch must be twice as long as close; the first period - 1 entries are NaN.
+    """
+    n = len(close)
+    gains = scratch[:n]
+    losses = scratch[n:2 * n]
+    gains[:1] = 0.0
+    np.subtract(close[1:], close[:-1], out=gains[1:])
+    np.minimum(gains, 0.0, out=losses)
+    np.negative(losses, out=losses)
+    np.maximum(gains, 0.0, out=gains)
+    rolling_sum(gains, period, gains)
+    rolling_sum(losses, period, out)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        np.divide(gains, out, out=out)                  # rs (the 1/period cancels)
+        out += 1
+        np.divide(100.0, out, out=out)
+        np.subtract(100.0, out, out=out)
+    return out
+
+
+def rolling_max(values: np.ndarray, window: int, out: np.ndarray) -> np.ndarray:
+    """Trailing window max ignoring NaNs; the first window - 1 entries are NaN"""
+    out[:window - 1] = np.nan
+    if len(values) >= window:
+        with np.errstate(invalid='ignore'):
+            np.fmax.reduce(sliding_window_view(values, window), axis=1, out=out[window - 1:])
+    return out
+
+
+def rolling_min(values: np.ndarray, window: int, out: np.ndarray) -> np.ndarray:
+    """Trailing window min ignoring NaNs; the first window - 1 entries are NaN"""
+    out[:window - 1] = np.nan
+    if len(values) >= window:
+        with np.errstate(invalid='ignore'):
+            np.fmin.reduce(sliding_window_view(values, window), axis=1, out=out[window - 1:])
+    return out
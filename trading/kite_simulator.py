@@ -0,0 +1,557 @@
+# trading/kite_simulator.py
+
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from trading.bars import Bars
+from trading.mock_broker import MockKite
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+IST = timezone(timedelta(hours=5, minutes=30))
+
+# Kite Connect request limits (requests per second) by endpoint group
+KITE_RATE_LIMITS = {
+    'quote': 1.0,
+    'historical': 3.0,
+    'order': 10.0,
+    'default': 10.0
+}
+
+ENDPOINT_GROUPS = {
+    'quote': 'quote',
+    'ltp': 'quote',
+    'historical_data': 'historical',
+    'place_order': 'order',
+    'modify_order': 'order',
+    'cancel_order': 'order'
+}
+
+# Longest range Kite serves in one historical_data call, in days
+MAX_HISTORICAL_DAYS = {
+    1: 60, 3: 100, 5: 100, 10: 100, 15: 200, 30: 200, 60: 400, 1440: 2000
+}
+
+SESSION_OPEN_MINUTES = 9 * 60 + 15
+MINUTE_NS = 60 * 10**9
+
+
+class SimulatedKiteError(Exception):
+    """Base of the errors the simulator raises where Kite would return one"""
+    code = 500
+
+
+class SimulatedNetworkError(SimulatedKiteError):
+    """Injected transport failure (Kite's NetworkException)"""
+    code = 503
+
+
+class SimulatedRateLimitError(SimulatedNetworkError):
+    """Request over the endpoint's rate limit (Kite answers 429)"""
+    code = 429
+
+
+class SimulatedInputError(SimulatedKiteError):
+    """Request Kite would reject as invalid (Kite's InputException)"""
+    code = 400
+
+
+def interval_minutes(interval: str) -> int:
+    """'minute' -> 1, '30minute' -> 30, 'day' -> 1440"""
+    if interval == 'day':
+        return 1440
+    if interval.endswith('minute'):
+        count = interval[:-len('minute')]
+        if not count or count.isdigit():
+            return int(count or 1)
+    raise SimulatedInputError(f"Invalid interval: {interval}")
+
+
+class TokenBucket:
+    """Requests-per-second limiter with a burst of one second's worth"""
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.capacity = max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def take(self) -> float:
+        """Take a token; returns 0 on success, else seconds until one is free"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1.0:
+                self.tokens -= 1.0
+                return 0.0
+            return (1.0 - self.tokens) / self.rate
+
+
+class KiteSimulator(MockKite):
+    """
+    Offline stand-in for KiteConnect that replays stored candles and ticks
+
+    Candles are rebased so that bar `warmup_bars` opens when the simulator
+    is created; everything before it is history. The replay clock then runs
+    at `speed` times wall-clock time (speed=0 freezes it, advance() steps it
+    by hand for deterministic runs), or follows `clock` (a SimulatedClock
+    shared with the bot) when one is given. Inside a candle the price walks
+    open -> low -> high -> close (open -> high -> low -> close for a falling
+    bar), unless stored ticks are given for that instrument. Every call
+    first replays the price path up to the clock into the MockKite order
+    book, so stops and targets fill as they would have.
+
+    Each call is rate limited per Kite endpoint group (raise a 429-style
+    error, or wait when rate_limit_mode='wait'), delayed by latency_ms plus
+    up to latency_jitter_ms, and fails with probability error_rate. All
+    randomness comes from one seeded generator.
+    """
+
+    def __init__(self, candles: Dict[str, pd.DataFrame],
+                 ticks: Optional[Dict[str, pd.DataFrame]] = None,
+                 symbols: Optional[Dict[str, str]] = None,
+                 warmup_bars: int = 200, speed: float = 1.0,
+                 latency_ms: float = 0.0, latency_jitter_ms: float = 0.0,
+                 error_rate: float = 0.0, rate_limits: Optional[Dict[str, float]] = None,
+                 rate_limit_mode: str = 'raise', account_balance: float = 100000.0,
+                 mis_leverage: float = 5.0, seed: Optional[int] = None, clock=None):
+        from config.enhanced_settings import INSTRUMENTS
+
+        if not candles:
+            raise ValueError("KiteSimulator needs candles for at least one instrument")
+        if rate_limit_mode not in ('raise', 'wait'):
+            raise ValueError(f"Unknown rate_limit_mode: {rate_limit_mode}")
+
+        # instrument_token -> tradingsymbol, and every quote key form -> token
+        self.symbols = {info['token']: info['symbol'] for info in INSTRUMENTS.values()}
+        self.symbols.update(symbols or {})
+        self.keys: Dict[str, str] = {}
+        for token in candles:
+            symbol = self.symbols.setdefault(token, token)
+            for key in (token, f"NSE:{token}", f"NSE:{symbol}", symbol):
+                self.keys[key] = token
+
+        super().__init__(instruments={key: self.symbols[token] for key, token in self.keys.items()})
+
+        self.bars = {token: Bars.from_frame(frame) for token, frame in candles.items()}
+        first = next(iter(self.bars.values()))
+        self.interval_ns = int(np.median(np.diff(first.timestamp))) if len(first) > 1 else 30 * MINUTE_NS
+        self.interval = max(1, self.interval_ns // MINUTE_NS)
+
+        # Rebase stored time so bar `warmup_bars` opens at the current minute
+        start = int(first.timestamp[min(max(0, warmup_bars), len(first) - 1)])
+        self.clock = clock
+        self.epoch_ns = pd.Timestamp(clock.now() if clock else datetime.now()).value
+        self.offset_ns = self.epoch_ns - self.epoch_ns % MINUTE_NS - start
+        for bars in self.bars.values():
+            bars.timestamp[:] += self.offset_ns
+
+        self.ticks: Dict[str, tuple] = {}
+        for token, frame in (ticks or {}).items():
+            stamps = pd.DatetimeIndex(pd.to_datetime(frame['timestamp'] if 'timestamp' in frame else frame.index))
+            if stamps.tz is not None:
+                stamps = stamps.tz_localize(None)
+            order = np.argsort(stamps.asi8, kind='stable')
+            self.ticks[token] = (stamps.asi8[order] + self.offset_ns,
+                                 frame['last_price'].to_numpy(dtype=np.float64)[order])
+
+        self.speed = speed
+        self.started = time.monotonic()
+        self.manual_ns = 0
+        self.synced_ns: Dict[str, int] = {}
+
+        self.latency_ms = latency_ms
+        self.latency_jitter_ms = latency_jitter_ms
+        self.error_rate = error_rate
+        self.rate_limit_mode = rate_limit_mode
+        limits = dict(KITE_RATE_LIMITS, **(rate_limits or {}))
+        self.buckets = {group: TokenBucket(rate) for group, rate in limits.items() if rate and rate > 0}
+        self.rng = random.Random(seed)
+        self.request_lock = threading.Lock()
+
+        self.account_balance = account_balance
+        self.mis_leverage = mis_leverage
+        self.call_stats: Dict[str, Dict[str, float]] = {}
+        self.access_token = None
+
+        self._sync()
+        logger.info(f"🧪 Kite simulator: {len(self.bars)} instruments, {self.interval}-minute candles, "
+                    f"replay from {self.now():%Y-%m-%d %H:%M} (speed {speed}x)")
+
+    # ------------------------------------------------------------------
+    # Construction
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def from_frame(cls, data: pd.DataFrame, signal_token: str = '256265',
+                   trading_token: str = '2707457', **kwargs) -> 'KiteSimulator':
+        """
+        Simulator over a backtest frame (prepare_backtest_data / `data fetch`
+        output, or generate_sample_data)
+
+        Trading candles come from the *_trading columns when present, else
+        the signal candles are scaled by trading_price / close.
+        """
+        signal = data[['open', 'high', 'low', 'close', 'volume']]
+        if 'close_trading' in data.columns:
+            trading = data[['open_trading', 'high_trading', 'low_trading', 'close_trading', 'volume_trading']]
+            trading.columns = ['open', 'high', 'low', 'close', 'volume']
+        else:
+            ratio = data['trading_price'] / data['close']
+            trading = signal[['open', 'high', 'low', 'close']].mul(ratio, axis=0)
+            trading['volume'] = signal['volume']
+        return cls({signal_token: signal, trading_token: trading}, **kwargs)
+
+    @classmethod
+    def from_file(cls, path: str, ticks_path: Optional[str] = None, **kwargs) -> 'KiteSimulator':
+        """Simulator over a saved backtest frame (dataset or CSV), plus optional ticks CSV
+        (timestamp, instrument_token, last_price)"""
+        from backtesting.dataset import load_frame
+
+        data = load_frame(path)
+        if ticks_path:
+            ticks = pd.read_csv(ticks_path, dtype={'instrument_token': str})
+            kwargs['ticks'] = {token: group for token, group in ticks.groupby('instrument_token')}
+        return cls.from_frame(data, **kwargs)
+
+    @classmethod
+    def from_settings(cls) -> 'KiteSimulator':
+        """Simulator configured by Settings.SIMULATOR_CONFIG"""
+        from config.settings import Settings
+
+        config = dict(Settings.SIMULATOR_CONFIG)
+        data_file = config.pop('data_file', None)
+        ticks_file = config.pop('ticks_file', None)
+        sample_days = config.pop('sample_days', 30)
+        if data_file:
+            return cls.from_file(data_file, ticks_file, **config)
+
+        from backtesting.data_fetcher import HistoricalDataFetcher
+
+        # Seed the sample generator without disturbing the global RNG
+        state = np.random.get_state()
+        try:
+            if config.get('seed') is not None:
+                np.random.seed(config['seed'])
+            data = HistoricalDataFetcher().generate_sample_data(sample_days)
+        finally:
+            np.random.set_state(state)
+        return cls.from_frame(data, **config)
+
+    # ------------------------------------------------------------------
+    # Replay clock
+    # ------------------------------------------------------------------
+
+    def now_ns(self) -> int:
+        if self.clock is not None:
+            return pd.Timestamp(self.clock.now()).value
+        return self.epoch_ns + self.manual_ns + int((time.monotonic() - self.started) * self.speed * 1e9)
+
+    def now(self) -> datetime:
+        return pd.Timestamp(self.now_ns()).to_pydatetime(warn=False)
+
+    def advance(self, seconds: float):
+        """Move the replay clock forward (fills resting orders on the way)"""
+        with self._lock:
+            if self.clock is not None:
+                self.clock.advance(seconds)
+            else:
+                self.manual_ns += int(seconds * 1e9)
+            self._sync()
+
+    def _path(self, bars: Bars, i: int):
+        """Vertex times and prices of bar i's intrabar path"""
+        o, h, l, c = bars.open[i], bars.high[i], bars.low[i], bars.close[i]
+        prices = (o, l, h, c) if c >= o else (o, h, l, c)
+        start = int(bars.timestamp[i])
+        return [start + k * self.interval_ns // 3 for k in range(4)], prices
+
+    def _price_at(self, token: str, at_ns: int) -> Optional[float]:
+        if token in self.ticks:
+            stamps, prices = self.ticks[token]
+            i = int(np.searchsorted(stamps, at_ns, side='right')) - 1
+            if i >= 0:
+                return float(prices[i])
+        bars = self.bars[token]
+        i = int(np.searchsorted(bars.timestamp, at_ns, side='right')) - 1
+        if i < 0:
+            return None
+        times, prices = self._path(bars, i)
+        return float(np.interp(at_ns, times, prices))
+
+    def ticks_between(self, token: str, after_ns: int, until_ns: int) -> List[tuple]:
+        """(time ns, price) of the ticks, or path vertices, in (after_ns, until_ns], ending at until_ns"""
+        if token in self.ticks:
+            stamps, prices = self.ticks[token]
+            lo, hi = np.searchsorted(stamps, [after_ns, until_ns], side='right')
+            if hi > lo:
+                return list(zip(stamps[lo:hi].tolist(), prices[lo:hi].tolist()))
+        bars = self.bars[token]
+        first, last = np.searchsorted(bars.timestamp, [after_ns, until_ns], side='right') - 1
+        points = []
+        for i in range(max(0, first), last + 1):
+            times, prices = self._path(bars, i)
+            points.extend((t, float(price)) for t, price in zip(times, prices) if after_ns < t < until_ns)
+        current = self._price_at(token, until_ns)
+        if current is not None:
+            points.append((until_ns, current))
+        return points
+
+    def _sync(self):
+        """Replay every instrument's price path up to the clock into the order book"""
+        with self._lock:
+            until = self.now_ns()
+            for token in self.bars:
+                after = self.synced_ns.get(token, until - 1)
+                if until <= after:
+                    continue
+                symbol = self.symbols[token]
+                for _, price in self.ticks_between(token, after, until):
+                    self.set_price(symbol, price)
+                self.synced_ns[token] = until
+
+    # ------------------------------------------------------------------
+    # Request pipeline: rate limit, latency, injected errors
+    # ------------------------------------------------------------------
+
+    def _request(self, endpoint: str):
+        with self.request_lock:
+            stats = self.call_stats.setdefault(endpoint, {'calls': 0, 'throttled': 0, 'errors': 0, 'latency_ms': 0.0})
+            stats['calls'] += 1
+
+        group = ENDPOINT_GROUPS.get(endpoint, 'default')
+        bucket = self.buckets.get(group)
+        while bucket is not None:
+            wait = bucket.take()
+            if not wait:
+                break
+            with self.request_lock:
+                stats['throttled'] += 1
+            if self.rate_limit_mode == 'raise':
+                raise SimulatedRateLimitError(f"Too many requests ({endpoint}: {bucket.rate:g}/s)")
+            time.sleep(wait)
+
+        with self.request_lock:
+            delay = self.latency_ms + self.rng.uniform(0, self.latency_jitter_ms)
+            failed = self.error_rate > 0 and self.rng.random() < self.error_rate
+            stats['latency_ms'] += delay
+            stats['errors'] += failed
+        if delay > 0:
+            time.sleep(delay / 1000)
+        if failed:
+            raise SimulatedNetworkError(f"Simulated gateway timeout ({endpoint})")
+
+        self._sync()
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Per-endpoint calls, throttled and failed requests, and injected latency"""
+        with self.request_lock:
+            return {endpoint: dict(values) for endpoint, values in self.call_stats.items()}
+
+    # ------------------------------------------------------------------
+    # Session and account
+    # ------------------------------------------------------------------
+
+    def set_access_token(self, access_token: str):
+        self.access_token = access_token
+
+    def invalidate_access_token(self, access_token: Optional[str] = None):
+        self.access_token = None
+        return True
+
+    def profile(self) -> Dict[str, Any]:
+        self._request('profile')
+        return {
+            'user_id': 'SIM001',
+            'user_name': 'Kite Simulator',
+            'user_shortname': 'Simulator',
+            'email': 'simulator@localhost',
+            'user_type': 'individual',
+            'broker': 'ZERODHA',
+            'exchanges': ['NSE'],
+            'products': ['CNC', 'MIS', 'NRML'],
+            'order_types': ['MARKET', 'LIMIT', 'SL', 'SL-M']
+        }
+
+    def margins(self, segment: Optional[str] = None) -> Dict[str, Any]:
+        self._request('margins')
+        with self._lock:
+            rows = MockKite.positions(self)['net']
+            realised = float(sum(row['sell_value'] - row['buy_value'] + row['quantity'] * row['average_price']
+                                 for row in rows))
+            unrealised = float(sum(row['quantity'] * (row['last_price'] - row['average_price']) for row in rows))
+            exposure = float(sum(abs(row['quantity']) * row['average_price'] for row in rows)) / self.mis_leverage
+        net = self.account_balance + realised + unrealised - exposure
+        equity = {
+            'enabled': True,
+            'net': net,
+            'available': {
+                'cash': self.account_balance + realised,
+                'opening_balance': self.account_balance,
+                'live_balance': net,
+                'intraday_payin': 0.0,
+                'adhoc_margin': 0.0,
+                'collateral': 0.0
+            },
+            'utilised': {
+                'debits': exposure,
+                'exposure': exposure,
+                'm2m_realised': realised,
+                'm2m_unrealised': unrealised,
+                'span': 0.0,
+                'option_premium': 0.0,
+                'holding_sales': 0.0,
+                'turnover': 0.0
+            }
+        }
+        margins = {'equity': equity, 'commodity': {'enabled': False, 'net': 0.0, 'available': {}, 'utilised': {}}}
+        return margins[segment] if segment else margins
+
+    # ------------------------------------------------------------------
+    # Market data
+    # ------------------------------------------------------------------
+
+    def _token_for(self, key) -> str:
+        token = self.keys.get(str(key))
+        if token is None:
+            raise SimulatedInputError(f"Unknown instrument: {key}")
+        return token
+
+    def quote(self, instruments, *more) -> Dict[str, Dict[str, Any]]:
+        self._request('quote')
+        return self._quotes(instruments, *more)
+
+    def ltp(self, instruments, *more) -> Dict[str, Dict[str, Any]]:
+        self._request('ltp')
+        return {key: {'instrument_token': quote['instrument_token'], 'last_price': quote['last_price']}
+                for key, quote in self._quotes(instruments, *more).items()}
+
+    def _quotes(self, instruments, *more) -> Dict[str, Dict[str, Any]]:
+        keys = [instruments] if isinstance(instruments, (str, int)) else list(instruments)
+        keys.extend(more)
+        at = self.now_ns()
+        timestamp = pd.Timestamp(at).to_pydatetime(warn=False)
+        result = {}
+        for key in keys:
+            token = self.keys.get(str(key))
+            if token is None:
+                continue
+            price = self._price_at(token, at)
+            if price is None:
+                continue
+            result[str(key)] = {
+                'instrument_token': int(token) if token.isdigit() else token,
+                'tradingsymbol': self.symbols[token],
+                'timestamp': timestamp,
+                'last_price': price
+            }
+        return result
+
+    def historical_data(self, instrument_token, from_date, to_date, interval: str,
+                        continuous: bool = False, oi: bool = False) -> List[Dict[str, Any]]:
+        """
+        Candles in [from_date, to_date] that have opened on the replay clock
+
+        The last one is still forming: its high, low and close only cover the
+        path walked so far. A to_date at or past the caller's wall clock means
+        "up to now" on the replay clock. Coarser intervals than the stored one
+        are aggregated from session open (9:15), as Kite does.
+        """
+        self._request('historical_data')
+        token = self._token_for(instrument_token)
+        minutes = interval_minutes(interval)
+        if minutes % self.interval:
+            raise SimulatedInputError(f"Only multiples of the stored {self.interval}minute candles are available")
+
+        start = pd.Timestamp(from_date)
+        end = pd.Timestamp(to_date)
+        start = start.tz_localize(None) if start.tz is not None else start
+        end = end.tz_localize(None) if end.tz is not None else end
+        max_days = MAX_HISTORICAL_DAYS.get(minutes, MAX_HISTORICAL_DAYS[60])
+        if (end - start).days > max_days:
+            raise SimulatedInputError(f"interval exceeds max limit: {max_days} days")
+
+        now = self.now_ns()
+        caller_now = pd.Timestamp(self.clock.now() if self.clock else datetime.now())
+        end_ns = now if end >= caller_now - pd.Timedelta(minutes=1) else min(end.value, now)
+        bars = self.bars[token]
+        lo = int(np.searchsorted(bars.timestamp, start.value, side='left'))
+        hi = int(np.searchsorted(bars.timestamp, end_ns, side='right'))
+        if hi <= lo:
+            return []
+
+        stamps = bars.timestamp[lo:hi].copy()
+        columns = [bars[name][lo:hi].copy() for name in ('open', 'high', 'low', 'close', 'volume')]
+        if now < stamps[-1] + self.interval_ns:
+            # Forming candle: only the part of the path walked so far
+            times, path = self._path(bars, hi - 1)
+            walked = [p for t, p in zip(times, path) if t <= now] + [self._price_at(token, now)]
+            fraction = (now - stamps[-1]) / self.interval_ns
+            columns[1][-1], columns[2][-1], columns[3][-1] = max(walked), min(walked), walked[-1]
+            columns[4][-1] *= fraction
+
+        if minutes != self.interval:
+            stamps, columns = self._aggregate(stamps, columns, minutes)
+
+        dates = pd.DatetimeIndex(stamps).tz_localize(IST).to_pydatetime()
+        return [
+            {'date': date, 'open': float(o), 'high': float(h), 'low': float(l), 'close': float(c), 'volume': int(v)}
+            for date, o, h, l, c, v in zip(dates, *columns)
+        ]
+
+    def _aggregate(self, stamps: np.ndarray, columns: List[np.ndarray], minutes: int):
+        """Group candles into `minutes`-long candles counted from session open"""
+        day = stamps - stamps % (1440 * MINUTE_NS)
+        if minutes >= 1440:
+            keys = day
+        else:
+            since_open = stamps - day - SESSION_OPEN_MINUTES * MINUTE_NS
+            keys = day + SESSION_OPEN_MINUTES * MINUTE_NS + since_open // (minutes * MINUTE_NS) * minutes * MINUTE_NS
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        ends = np.r_[starts[1:], len(keys)] - 1
+        o, h, l, c, v = columns
+        return keys[starts], [
+            o[starts],
+            np.maximum.reduceat(h, starts),
+            np.minimum.reduceat(l, starts),
+            c[ends],
+            np.add.reduceat(v, starts)
+        ]
+
+    # ------------------------------------------------------------------
+    # Orders and positions
+    # ------------------------------------------------------------------
+
+    def place_order(self, variety: str, **kwargs) -> str:
+        self._request('place_order')
+        return super().place_order(variety, **kwargs)
+
+    def modify_order(self, variety: str, order_id: str, **kwargs) -> str:
+        self._request('modify_order')
+        return super().modify_order(variety, order_id, **kwargs)
+
+    def cancel_order(self, variety: str, order_id: str, **kwargs) -> str:
+        self._request('cancel_order')
+        return super().cancel_order(variety, order_id, **kwargs)
+
+    def orders(self) -> List[Dict[str, Any]]:
+        self._request('orders')
+        return super().orders()
+
+    def order_history(self, order_id: str) -> List[Dict[str, Any]]:
+        self._request('order_history')
+        return super().order_history(order_id)
+
+    def positions(self) -> Dict[str, List[Dict[str, Any]]]:
+        self._request('positions')
+        return super().positions()
+
@@ -0,0 +1,77 @@
+# trading/market_feed.py
+
+from datetime import timedelta
+from typing import Any, Dict, Optional
+
+import pandas as pd
+
+from trading.bars import Bars
+from utils.clock import SYSTEM_CLOCK
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class MarketDataFeed:
+    """
+    Live market data for one signal/trading instrument pair
+
+    Keeps an incrementally refreshed Bars window of signal-instrument candles
+    and fetches the latest traded price. One feed can be shared by several
+    strategy profiles so the broker is polled once per cycle, not per profile.
+    """
+
+    def __init__(self, executor=None, history_days: int = 2, clock=None):
+        self.executor = executor
+        self.history_days = history_days
+        self.clock = clock or SYSTEM_CLOCK
+        self.bars = Bars()
+
+    def refresh_bars(self, signal_token: str) -> Bars:
+        """
+        Fetch only candles newer than the cached window and trim it to history_days
+
+        Returns a read-only view, so callers holding it across the next
+        refresh keep seeing the bars they were given.
+        """
+        end_date = self.clock.now()
+        start_date = end_date - timedelta(days=self.history_days)
+
+        fetch_from = start_date
+        if not self.bars.empty:
+            fetch_from = max(start_date, self.bars.last_timestamp.to_pydatetime())
+
+        new_bars = self.executor.get_historical_data(signal_token, fetch_from, end_date)
+        if not new_bars.empty:
+            if fetch_from == start_date:
+                self.bars = Bars.from_frame(new_bars)
+            else:
+                self.bars.extend(Bars.from_frame(new_bars))
+            self.bars.drop_before(start_date)
+        return self.bars.view()
+
+    def latest_price(self, trading_token: str) -> Optional[float]:
+        """Latest traded price, falling back to the last historical close"""
+        price = self.executor.get_latest_price(f"NSE:{trading_token}")
+        if price:
+            return price
+
+        end_date = self.clock.now()
+        start_date = end_date - timedelta(days=self.history_days)
+        trading_df = self.executor.get_historical_data(trading_token, start_date, end_date)
+        if not trading_df.empty:
+            return trading_df['close'].iloc[-1]
+        return None
+
+    def get_state(self) -> Optional[Dict[str, Any]]:
+        """Bar window in a JSON-friendly layout"""
+        if self.bars.empty:
+            return None
+        state = {'timestamp': [ts.isoformat() for ts in pd.DatetimeIndex(self.bars.timestamp.astype('datetime64[ns]'))]}
+        for col in ('open', 'high', 'low', 'close', 'volume'):
+            state[col] = self.bars[col].tolist()
+        return state
+
+    def restore_state(self, state: Dict[str, Any]):
+        """Restore a bar window saved by get_state (or by the earlier DataFrame layout)"""
+        self.bars = Bars.from_frame(pd.DataFrame(state))
@@ -0,0 +1,256 @@
+# trading/mock_broker.py
+
+import threading
+from copy import deepcopy
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class MockOrderException(Exception):
+    """Raised where Kite would reject an order request"""
+
+
+class MockKite:
+    """
+    In-memory stand-in for the KiteConnect order, position and quote API
+
+    Orders follow Kite's lifecycle: MARKET fills at the last price, LIMIT
+    rests as OPEN, SL / SL-M rest as TRIGGER PENDING. Every set_price()
+    matches resting orders for that symbol, so stop and target exits can
+    be exercised without a live session. Positions are MIS day positions.
+    """
+
+    def __init__(self, prices: Optional[Dict[str, float]] = None,
+                 instruments: Optional[Dict[str, str]] = None):
+        from config.enhanced_settings import INSTRUMENTS
+
+        # Last traded price by tradingsymbol
+        self.prices: Dict[str, float] = dict(prices or {})
+        # Quote key -> tradingsymbol, e.g. "NSE:2707457" -> "NIFTYBEES"
+        self.instruments = instruments or {
+            f"NSE:{info['token']}": info['symbol']
+            for info in INSTRUMENTS.values() if 'exchange' in info
+        }
+
+        self._orders: Dict[str, Dict[str, Any]] = {}
+        self._history: Dict[str, List[Dict[str, Any]]] = {}
+        self._positions: Dict[str, Dict[str, Any]] = {}
+        self._next_id = 1
+        self._lock = threading.RLock()
+
+    # ------------------------------------------------------------------
+    # Market
+    # ------------------------------------------------------------------
+
+    def set_price(self, tradingsymbol: str, price: float):
+        """Move the market and match resting orders"""
+        with self._lock:
+            self.prices[tradingsymbol] = price
+            self._match(tradingsymbol)
+
+    def _symbol_for(self, key: str) -> str:
+        if key in self.instruments:
+            return self.instruments[key]
+        return key.split(':', 1)[-1]
+
+    def quote(self, instruments) -> Dict[str, Dict[str, Any]]:
+        if isinstance(instruments, str):
+            instruments = [instruments]
+        with self._lock:
+            result = {}
+            for key in instruments:
+                symbol = self._symbol_for(key)
+                if symbol in self.prices:
+                    result[key] = {'last_price': self.prices[symbol], 'tradingsymbol': symbol}
+            return result
+
+    def ltp(self, instruments) -> Dict[str, Dict[str, Any]]:
+        return self.quote(instruments)
+
+    # ------------------------------------------------------------------
+    # Orders
+    # ------------------------------------------------------------------
+
+    def place_order(self, variety: str, tradingsymbol: str, exchange: str, transaction_type: str,
+                    quantity: int, product: str, order_type: str, validity: str = 'DAY',
+                    price: Optional[float] = None, trigger_price: Optional[float] = None,
+                    tag: Optional[str] = None, **kwargs) -> str:
+        with self._lock:
+            if quantity <= 0:
+                raise MockOrderException(f"Invalid quantity {quantity}")
+            if transaction_type not in ('BUY', 'SELL'):
+                raise MockOrderException(f"Invalid transaction type {transaction_type}")
+            if order_type in ('LIMIT', 'SL') and not price:
+                raise MockOrderException(f"{order_type} order needs a price")
+            if order_type in ('SL', 'SL-M') and not trigger_price:
+                raise MockOrderException(f"{order_type} order needs a trigger price")
+            if order_type not in ('MARKET', 'LIMIT', 'SL', 'SL-M'):
+                raise MockOrderException(f"Invalid order type {order_type}")
+
+            order_id = f"MOCK{self._next_id:06d}"
+            self._next_id += 1
+
+            order = {
+                'order_id': order_id,
+                'variety': variety,
+                'tradingsymbol': tradingsymbol,
+                'exchange': exchange,
+                'transaction_type': transaction_type,
+                'order_type': order_type,
+                'product': product,
+                'validity': validity,
+                'quantity': int(quantity),
+                'price': price or 0,
+                'trigger_price': trigger_price or 0,
+                'average_price': 0,
+                'filled_quantity': 0,
+                'pending_quantity': int(quantity),
+                'status': 'OPEN',
+                'status_message': None,
+                'tag': tag,
+                'order_timestamp': datetime.now()
+            }
+            self._orders[order_id] = order
+
+            if order_type == 'MARKET':
+                last_price = self.prices.get(tradingsymbol)
+                if last_price is None:
+                    self._set_status(order, 'REJECTED', 'No market price')
+                else:
+                    self._fill(order, last_price)
+            elif order_type in ('SL', 'SL-M'):
+                self._set_status(order, 'TRIGGER PENDING')
+                self._match(tradingsymbol)
+            else:
+                self._set_status(order, 'OPEN')
+                self._match(tradingsymbol)
+
+            return order_id
+
+    def modify_order(self, variety: str, order_id: str, price: Optional[float] = None,
+                     trigger_price: Optional[float] = None, quantity: Optional[int] = None, **kwargs) -> str:
+        with self._lock:
+            order = self._active_order(order_id)
+            if price is not None:
+                order['price'] = price
+            if trigger_price is not None:
+                order['trigger_price'] = trigger_price
+            if quantity is not None:
+                order['quantity'] = order['pending_quantity'] = int(quantity)
+            self._set_status(order, order['status'], 'Modified')
+            self._match(order['tradingsymbol'])
+            return order_id
+
+    def cancel_order(self, variety: str, order_id: str, **kwargs) -> str:
+        with self._lock:
+            order = self._active_order(order_id)
+            self._set_status(order, 'CANCELLED')
+            return order_id
+
+    def orders(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [deepcopy(order) for order in self._orders.values()]
+
+    def order_history(self, order_id: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            if order_id not in self._history:
+                raise MockOrderException(f"Unknown order {order_id}")
+            return deepcopy(self._history[order_id])
+
+    def _active_order(self, order_id: str) -> Dict[str, Any]:
+        order = self._orders.get(order_id)
+        if order is None:
+            raise MockOrderException(f"Unknown order {order_id}")
+        if order['status'] in ('COMPLETE', 'CANCELLED', 'REJECTED'):
+            raise MockOrderException(f"Order {order_id} is already {order['status']}")
+        return order
+
+    def _set_status(self, order: Dict[str, Any], status: str, message: Optional[str] = None):
+        order['status'] = status
+        order['status_message'] = message
+        self._history.setdefault(order['order_id'], []).append(deepcopy(order))
+
+    def _match(self, tradingsymbol: str):
+        """Trigger and fill resting orders against the last price"""
+        price = self.prices.get(tradingsymbol)
+        if price is None:
+            return
+
+        for order in list(self._orders.values()):
+            if order['tradingsymbol'] != tradingsymbol:
+                continue
+            is_buy = order['transaction_type'] == 'BUY'
+
+            if order['status'] == 'TRIGGER PENDING':
+                triggered = price >= order['trigger_price'] if is_buy else price <= order['trigger_price']
+                if not triggered:
+                    continue
+                if order['order_type'] == 'SL-M':
+                    self._fill(order, price)
+                    continue
+                # SL becomes a limit order once triggered
+                self._set_status(order, 'OPEN')
+
+            if order['status'] == 'OPEN' and order['order_type'] in ('LIMIT', 'SL'):
+                if (is_buy and price <= order['price']) or (not is_buy and price >= order['price']):
+                    self._fill(order, order['price'])
+
+    def _fill(self, order: Dict[str, Any], price: float):
+        order['average_price'] = price
+        order['filled_quantity'] = order['quantity']
+        order['pending_quantity'] = 0
+        self._set_status(order, 'COMPLETE')
+        self._apply_fill(order['tradingsymbol'], order['exchange'], order['product'],
+                         order['quantity'] if order['transaction_type'] == 'BUY' else -order['quantity'],
+                         price)
+        logger.debug(f"Mock fill: {order['transaction_type']} {order['quantity']} "
+                     f"{order['tradingsymbol']} @ {price:.2f} ({order['order_type']})")
+
+    # ------------------------------------------------------------------
+    # Positions
+    # ------------------------------------------------------------------
+
+    def _apply_fill(self, tradingsymbol: str, exchange: str, product: str, signed_qty: int, price: float):
+        position = self._positions.setdefault(tradingsymbol, {
+            'tradingsymbol': tradingsymbol,
+            'exchange': exchange,
+            'product': product,
+            'quantity': 0,
+            'average_price': 0.0,
+            'buy_quantity': 0,
+            'sell_quantity': 0,
+            'buy_value': 0.0,
+            'sell_value': 0.0
+        })
+
+        old_qty = position['quantity']
+        new_qty = old_qty + signed_qty
+        if signed_qty > 0:
+            position['buy_quantity'] += signed_qty
+            position['buy_value'] += signed_qty * price
+        else:
+            position['sell_quantity'] -= signed_qty
+            position['sell_value'] -= signed_qty * price
+
+        if new_qty == 0:
+            position['average_price'] = 0.0
+        elif old_qty == 0 or (old_qty > 0) != (new_qty > 0):
+            position['average_price'] = price
+        elif abs(new_qty) > abs(old_qty):
+            position['average_price'] = (position['average_price'] * abs(old_qty) + price * abs(signed_qty)) / abs(new_qty)
+        position['quantity'] = new_qty
+
+    def positions(self) -> Dict[str, List[Dict[str, Any]]]:
+        with self._lock:
+            rows = []
+            for symbol, position in self._positions.items():
+                row = dict(position)
+                last_price = self.prices.get(symbol, 0)
+                row['last_price'] = last_price
+                row['pnl'] = (row['sell_value'] - row['buy_value']) + row['quantity'] * last_price
+                rows.append(row)
+            return {'net': deepcopy(rows), 'day': rows}
@@ -7,13 +7,50 @@ from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Typical price ratios and scaling factors (used when there is no calibration)
+ATR_SCALING_FACTORS = {
+    'NIFTYBEES': {
+        'typical_nifty_price': 25000,
+        'typical_instrument_price': 280,
+        'atr_ratio': 0.8  # NIFTYBEES typically has lower volatility than NIFTY
+    },
+    'JUNIORBEES': {
+        'typical_nifty_price': 25000,
+        'typical_instrument_price': 420,
+        'atr_ratio': 0.9
+    },
+    'BANKBEES': {
+        'typical_nifty_price': 25000,
+        'typical_instrument_price': 470,
+        'atr_ratio': 1.1  # Bank index can be more volatile
+    }
+}
+
+# One row per candidate trade from calculate_position_size_batch
+SIZING_BATCH_DTYPE = np.dtype([
+    ('quantity', np.int64),
+    ('margin_required', np.float64),
+    ('trade_value', np.float64),
+    ('capital_utilization', np.float64),
+    ('volatility_factor', np.float64),
+    ('risk_per_trade', np.float64),
+    ('risk_percentage', np.float64),
+    ('leverage_used', np.float64),
+    ('stop_loss_distance', np.float64),
+    ('scaled_atr', np.float64),
+    ('max_risk_constraint', np.int64),
+    ('capital_constraint', np.int64)
+])
+
 class EnhancedPositionSizer:
     """
     Advanced position sizing with proper ATR scaling and improved risk management
     """
     
-    def __init__(self, config: Dict[str, Any]):
+    def __init__(self, config: Dict[str, Any], calibrator=None):
         self.config = config
+        # Optional ATRCalibrator; hardcoded ratios below are the fallback
+        self.calibrator = calibrator
         self.max_risk = config.get('max_risk_per_trade', 1.5) / 100  # Updated default
         self.base_size = config.get('base_position_size', 0.6)
         self.confidence_mult = config.get('confidence_multiplier', True)
@@ -28,27 +65,22 @@ class EnhancedPositionSizer:
         CRITICAL FIX: Properly scale NIFTY ATR to trading instrument
         """
         try:
-            # Define typical price ratios and scaling factors
-            scaling_factors = {
-                'NIFTYBEES': {
-                    'typical_nifty_price': 25000,
-                    'typical_instrument_price': 280,
-                    'atr_ratio': 0.8  # NIFTYBEES typically has lower volatility than NIFTY
-                },
-                'JUNIORBEES': {
-                    'typical_nifty_price': 25000,
-                    'typical_instrument_price': 420,
-                    'atr_ratio': 0.9
-                },
-                'BANKBEES': {
-                    'typical_nifty_price': 25000,
-                    'typical_instrument_price': 470,
-                    'atr_ratio': 1.1  # Bank index can be more volatile
-                }
-            }
+            # Empirical calibration from stored history, when available
+            calibration = self.calibrator.get(symbol) if self.calibrator else None
+            if calibration:
+                scaled_atr = calibration.scale(nifty_atr)
+                final_atr = max(current_price * 0.01, min(scaled_atr, current_price * 0.08))
+                
+                logger.info(f"🔧 ATR Scaling for {symbol} (calibrated {calibration.calibrated_at[:10]}):")
+                logger.info(f"   NIFTY ATR: ₹{nifty_atr:.2f}")
+                logger.info(f"   Price Ratio: {calibration.price_ratio:.5f}")
+                logger.info(f"   Vol Beta: {calibration.vol_beta:.3f}")
+                logger.info(f"   Scaled ATR: ₹{scaled_atr:.2f} → ₹{final_atr:.2f}")
+                
+                return final_atr
             
-            if symbol in scaling_factors:
-                scale_info = scaling_factors[symbol]
+            if symbol in ATR_SCALING_FACTORS:
+                scale_info = ATR_SCALING_FACTORS[symbol]
                 
                 # Calculate scaling ratio
                 price_ratio = current_price / scale_info['typical_nifty_price']
@@ -199,6 +231,107 @@ class EnhancedPositionSizer:
         
         return sizing_details
     
+    def scale_nifty_atr_batch(self, nifty_atr: np.ndarray, current_price: np.ndarray, symbol: str) -> np.ndarray:
+        """Array version of scale_nifty_atr_to_instrument (no logging)"""
+        nifty_atr = np.asarray(nifty_atr, dtype=np.float64)
+        current_price = np.asarray(current_price, dtype=np.float64)
+        
+        calibration = self.calibrator.get(symbol) if self.calibrator else None
+        if calibration:
+            scaled_atr = calibration.scale(nifty_atr)
+            min_atr, max_atr = current_price * 0.01, current_price * 0.08
+        elif symbol in ATR_SCALING_FACTORS:
+            scale_info = ATR_SCALING_FACTORS[symbol]
+            price_ratio = current_price / scale_info['typical_nifty_price']
+            scaled_atr = nifty_atr * price_ratio * scale_info['atr_ratio']
+            min_atr, max_atr = current_price * 0.01, current_price * 0.08
+        else:
+            scaled_atr = nifty_atr * (current_price / 25000)
+            min_atr, max_atr = current_price * 0.015, current_price * 0.06
+        
+        # Same result as max(min_atr, min(scaled_atr, max_atr)), which maps NaN to min_atr
+        bounded = np.maximum(min_atr, np.minimum(scaled_atr, max_atr))
+        return np.where(np.isnan(scaled_atr), min_atr, bounded)
+    
+    def calculate_position_size_batch(self,
+                                      account_balance,
+                                      current_price,
+                                      atr_value,
+                                      signal_confidence,
+                                      symbol: str = "NIFTYBEES") -> np.ndarray:
+        """
+        Size many candidate trades of one symbol at once
+        
+        Array arguments broadcast against each other. Returns a structured
+        array (SIZING_BATCH_DTYPE) whose rows equal the matching fields of
+        calculate_position_size; nothing is logged per row.
+        """
+        account_balance, current_price, atr_value, signal_confidence = np.broadcast_arrays(
+            *(np.asarray(x, dtype=np.float64) for x in (account_balance, current_price, atr_value, signal_confidence)))
+        
+        # Ensure minimum values
+        account_balance = np.maximum(account_balance, 1000)
+        current_price = np.maximum(current_price, 1)
+        signal_confidence = np.maximum(signal_confidence, 0.3)
+        
+        scaled_atr = self.scale_nifty_atr_batch(atr_value, current_price, symbol)
+        
+        # Capital allocation with confidence and volatility adjustment
+        adjusted_capital = account_balance * self.base_size
+        if self.confidence_mult:
+            adjusted_capital = adjusted_capital * (0.5 + (signal_confidence * 0.5))
+        
+        volatility_factor = np.ones_like(scaled_atr)
+        if self.volatility_adj:
+            has_atr = scaled_atr > 0
+            with np.errstate(divide='ignore', invalid='ignore'):
+                factor = np.maximum(0.3, np.minimum(1.0, (current_price * 0.02) / scaled_atr))
+            volatility_factor = np.where(has_atr, factor, 1.0)
+            adjusted_capital = np.where(has_atr, adjusted_capital * volatility_factor, adjusted_capital)
+        
+        mis_leverage = self.get_mis_leverage(symbol)
+        effective_capital = adjusted_capital * mis_leverage
+        
+        # Risk- and capital-constrained share counts
+        stop_distance = scaled_atr * self.config.get('stop_loss_atr_multiple', 2.5)
+        max_risk_amount = account_balance * self.max_risk
+        with np.errstate(divide='ignore', invalid='ignore'):
+            by_risk = np.trunc(max_risk_amount / stop_distance)
+        max_shares_by_risk = np.where(stop_distance > 0, by_risk, 1).astype(np.int64)
+        max_shares_by_capital = np.trunc(effective_capital / current_price).astype(np.int64)
+        base_quantity = np.minimum(max_shares_by_capital, max_shares_by_risk)
+        
+        # Minimum viable quantity (see calculate_minimum_quantity)
+        margin_per_share = current_price / mis_leverage
+        min_by_value = np.maximum(1, np.trunc(np.maximum(account_balance * 0.003, 500) / current_price)).astype(np.int64)
+        min_affordable = np.trunc((account_balance * 0.85) / margin_per_share).astype(np.int64)
+        min_quantity = np.minimum(np.minimum(min_by_value, min_affordable), 1)
+        
+        final_quantity = np.maximum(min_quantity, base_quantity)
+        
+        # Never exceed available capital, and always at least 1 share
+        max_affordable_quantity = np.trunc((account_balance * 0.9) / margin_per_share).astype(np.int64)
+        final_quantity = np.minimum(final_quantity, max_affordable_quantity)
+        final_quantity = np.maximum(final_quantity, 1)
+        margin_required = final_quantity * margin_per_share
+        
+        actual_risk_amount = final_quantity * stop_distance
+        
+        result = np.empty(final_quantity.shape, dtype=SIZING_BATCH_DTYPE)
+        result['quantity'] = final_quantity
+        result['margin_required'] = margin_required
+        result['trade_value'] = final_quantity * current_price
+        result['capital_utilization'] = margin_required / account_balance
+        result['volatility_factor'] = volatility_factor
+        result['risk_per_trade'] = actual_risk_amount
+        result['risk_percentage'] = (actual_risk_amount / account_balance) * 100
+        result['leverage_used'] = mis_leverage
+        result['stop_loss_distance'] = stop_distance
+        result['scaled_atr'] = scaled_atr
+        result['max_risk_constraint'] = max_shares_by_risk
+        result['capital_constraint'] = max_shares_by_capital
+        return result
+    
     def calculate_minimum_quantity(self, account_balance: float, current_price: float, leverage: float) -> int:
         """Calculate minimum viable quantity based on account size"""
         # Minimum trade should be at least 0.3% of account balance or ₹500
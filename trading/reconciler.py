@@ -0,0 +1,150 @@
+# trading/reconciler.py
+
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class BrokerSnapshot:
+    """Immutable view of broker state from one reconciliation poll"""
+    positions: Dict[str, Any] = field(default_factory=dict)
+    orders: List[Dict[str, Any]] = field(default_factory=list)
+    fetched_at: float = 0.0  # time.monotonic() of the poll
+    status: str = "PENDING"
+    broker_quantity: Optional[int] = None
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.fetched_at if self.fetched_at else float('inf')
+
+
+@dataclass(frozen=True)
+class ReconciliationEvent:
+    """Raised when the broker disagrees with the bot's tracked position"""
+    status: str  # CLOSED_EXTERNALLY or SYNCED
+    broker_quantity: Optional[int]
+    expected_quantity: int
+    tradingsymbol: str
+    version: int  # position version the mismatch was detected against
+    detected_at: float
+
+
+class BrokerReconciler(threading.Thread):
+    """
+    Background broker reconciliation off the trading loop
+
+    Polls positions and orders on its own cadence and publishes each result
+    as an immutable BrokerSnapshot. Publishing is a single reference swap, so
+    the trading loop reads `snapshot` without taking a lock or blocking on
+    the broker.
+
+    The bot publishes its own view with watch() after every position change.
+    A mismatch that survives the settle period is queued as a
+    ReconciliationEvent and wakes any wait_for_event() caller immediately.
+    """
+
+    def __init__(self, executor, poll_interval: float = 15.0, settle_seconds: float = 10.0):
+        super().__init__(name="BrokerReconciler", daemon=True)
+        self.executor = executor
+        self.poll_interval = poll_interval
+        self.settle_seconds = settle_seconds
+
+        self._snapshot = BrokerSnapshot()
+        self._expected: Dict[str, Any] = {}
+        self._expected_since = time.monotonic()
+        self._version = 0
+        self._events: "queue.Queue[ReconciliationEvent]" = queue.Queue()
+        self._stop_event = threading.Event()
+        self._wakeup = threading.Event()
+        self._last_reported = None
+
+        logger.info(f"✅ Broker reconciler initialized (every {poll_interval:.0f}s)")
+
+    @property
+    def snapshot(self) -> BrokerSnapshot:
+        """Latest published broker state (never blocks)"""
+        return self._snapshot
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def watch(self, position: Dict[str, Any]):
+        """Publish the bot's current position for comparison"""
+        self._expected = dict(position)
+        self._expected_since = time.monotonic()
+        self._version += 1
+        self._last_reported = None
+
+    def run(self):
+        while not self._stop_event.is_set():
+            self.poll()
+            self._stop_event.wait(self.poll_interval)
+
+    def poll(self):
+        """Fetch broker state once, publish it and raise events on mismatch"""
+        expected, version, since = self._expected, self._version, self._expected_since
+
+        try:
+            positions = self.executor.kite.positions()
+            orders = self.executor.kite.orders()
+        except Exception as e:
+            logger.warning(f"⚠️ Reconciliation poll failed: {e}")
+            return
+
+        sync_needed, status, broker_qty = False, "NO_POSITION", None
+        if expected.get('tradingsymbol'):
+            sync_needed, status, broker_qty = self.executor.compare_position(expected, positions)
+
+        self._snapshot = BrokerSnapshot(
+            positions=positions,
+            orders=orders,
+            fetched_at=time.monotonic(),
+            status=status,
+            broker_quantity=broker_qty
+        )
+
+        # Orders placed just before the poll may not show up in positions yet
+        if not sync_needed or time.monotonic() - since < self.settle_seconds:
+            return
+
+        if version != self._version or (status, broker_qty, version) == self._last_reported:
+            return
+
+        self._last_reported = (status, broker_qty, version)
+        logger.warning(f"⚠️ Broker mismatch for {expected['tradingsymbol']}: "
+                       f"Bot={expected.get('quantity', 0)}, Broker={broker_qty} ({status})")
+        self._events.put(ReconciliationEvent(
+            status=status,
+            broker_quantity=broker_qty,
+            expected_quantity=expected.get('quantity', 0),
+            tradingsymbol=expected['tradingsymbol'],
+            version=version,
+            detected_at=time.monotonic()
+        ))
+        self._wakeup.set()
+
+    def wait_for_event(self, timeout: float) -> bool:
+        """Sleep up to timeout, returning early (True) when an event is pending"""
+        return self._wakeup.wait(timeout)
+
+    def drain_events(self) -> List[ReconciliationEvent]:
+        """Return all pending events without blocking"""
+        self._wakeup.clear()
+        events = []
+        while True:
+            try:
+                events.append(self._events.get_nowait())
+            except queue.Empty:
+                return events
+
+    def stop(self):
+        self._stop_event.set()
+        self._wakeup.set()
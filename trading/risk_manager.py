@@ -2,13 +2,48 @@
 # FILE 3: trading/risk_manager.py
 # =============================================================================
 
+import numpy as np
 import pandas as pd
+from collections import deque
 from datetime import datetime, timedelta
-from typing import Dict, Any, Tuple, List
+from typing import Dict, Any, Tuple, List, Callable, Optional
+from utils.clock import SYSTEM_CLOCK
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Bits of RISK_BATCH_DTYPE['warning_flags'], in assess_trade_risk warning order
+RISK_WARNING_FLAGS = {
+    'RISK_LIMIT': 1,
+    'POSITION_SIZE': 2,
+    'DAILY_LOSS': 4,
+    'DRAWDOWN': 8,
+    'TRADE_COUNT': 16
+}
+
+# One row per candidate trade from assess_trade_risk_batch
+RISK_BATCH_DTYPE = np.dtype([
+    ('risk_level', 'U7'),
+    ('risk_score', np.int8),
+    ('risk_percentage', np.float64),
+    ('warning_flags', np.uint8),
+    ('recommendation', 'U15'),
+    ('suggested_quantity', np.int64),
+    ('max_safe_quantity', np.int64),
+    ('position_value_pct', np.float64)
+])
+
+# One row per candidate entry from evaluate_entries_batch
+ENTRY_BATCH_DTYPE = np.dtype([
+    ('quantity', np.int64),
+    ('margin_required', np.float64),
+    ('risk_percentage', np.float64),
+    ('risk_score', np.int8),
+    ('recommendation', 'U15'),
+    ('stop_loss', np.float64),
+    ('scaled_atr', np.float64)
+])
+
 class EnhancedRiskManager:
     """
     Comprehensive risk management system:
@@ -18,7 +53,9 @@ class EnhancedRiskManager:
     - Dynamic position sizing
     """
     
-    def __init__(self, config: Dict[str, Any]):
+    def __init__(self, config: Dict[str, Any], clock=None):
+        # The bot's clock, so a replay's trading day and event times follow the candles
+        self.clock = clock or SYSTEM_CLOCK
         self.max_risk_per_trade = config.get('max_risk_per_trade', 2.0) / 100
         self.max_daily_loss = config.get('max_daily_loss', 5.0) / 100
         self.max_drawdown = config.get('max_drawdown_limit', 10.0) / 100
@@ -26,9 +63,13 @@ class EnhancedRiskManager:
         
         # Risk tracking
         self.daily_pnl = 0
+        self.realized_pnl = 0  # all closed trades, for mark-to-market valuation
         self.max_portfolio_value = config.get('account_balance', 10000)
         self.current_drawdown = 0
-        self.risk_events = []
+        self._drawdown_warned = 0  # whole percent last logged, so per-tick marks log each new level once
+        # Recent events only; older ones reach disk through event_sink (the bot's journal)
+        self.risk_events = deque(maxlen=config.get('risk_event_history', 100))
+        self.event_sink: Optional[Callable[[Dict[str, Any]], None]] = None
         self.trade_count_today = 0
         self.max_trades_per_day = config.get('max_trades_per_day', 5)
         
@@ -117,9 +158,105 @@ class EnhancedRiskManager:
             'position_value_pct': position_value / account_balance if account_balance > 0 else 0
         }
     
+    def assess_trade_risk_batch(self,
+                                entry_price,
+                                quantity,
+                                stop_loss,
+                                account_balance) -> np.ndarray:
+        """
+        Assess many proposed trades at once against the current risk state
+        
+        Array arguments broadcast against each other. Returns a structured
+        array (RISK_BATCH_DTYPE) whose rows equal assess_trade_risk; the
+        warning strings are replaced by RISK_WARNING_FLAGS bits.
+        """
+        entry_price, stop_loss, account_balance = (np.asarray(x, dtype=np.float64)
+                                                   for x in (entry_price, stop_loss, account_balance))
+        entry_price, quantity, stop_loss, account_balance = np.broadcast_arrays(
+            entry_price, np.asarray(quantity, dtype=np.int64), stop_loss, account_balance)
+        has_balance = account_balance > 0
+        safe_balance = np.where(has_balance, account_balance, 1.0)
+        
+        # Calculate trade risk
+        risk_per_share = np.abs(entry_price - stop_loss)
+        total_risk = risk_per_share * quantity
+        risk_percentage = np.where(has_balance, total_risk / safe_balance, 0.0)
+        position_value = entry_price * quantity
+        potential_daily_loss = np.where(has_balance, np.abs(self.daily_pnl - total_risk) / safe_balance, 0.0)
+        
+        # Risk assessment (same weights as assess_trade_risk)
+        checks = (
+            (risk_percentage > self.max_risk_per_trade, 3, RISK_WARNING_FLAGS['RISK_LIMIT']),
+            (position_value > account_balance * self.max_position_value, 2, RISK_WARNING_FLAGS['POSITION_SIZE']),
+            (potential_daily_loss > self.max_daily_loss, 3, RISK_WARNING_FLAGS['DAILY_LOSS']),
+            (np.full(quantity.shape, self.current_drawdown > self.max_drawdown * 0.8), 2, RISK_WARNING_FLAGS['DRAWDOWN']),
+            (np.full(quantity.shape, self.trade_count_today >= self.max_trades_per_day), 2, RISK_WARNING_FLAGS['TRADE_COUNT'])
+        )
+        risk_score = np.zeros(quantity.shape, dtype=np.int8)
+        warning_flags = np.zeros(quantity.shape, dtype=np.uint8)
+        for failed, weight, flag in checks:
+            risk_score += np.where(failed, weight, 0).astype(np.int8)
+            warning_flags |= np.where(failed, flag, 0).astype(np.uint8)
+        
+        # Risk level determination
+        levels = [risk_score >= 5, risk_score >= 3, risk_score >= 1]
+        risk_level = np.select(levels, ['HIGH', 'MEDIUM', 'LOW'], default='MINIMAL')
+        recommendation = np.select(levels, ['REJECT', 'REDUCE_SIZE', 'PROCEED_CAUTION'], default='PROCEED')
+        
+        # Suggested safe quantity
+        has_risk = risk_per_share > 0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            by_risk = np.trunc((account_balance * self.max_risk_per_trade) / risk_per_share)
+        max_safe_quantity = np.where(has_risk, by_risk, quantity).astype(np.int64)
+        reduced = np.maximum(1, np.minimum(np.where(has_risk, by_risk, 1).astype(np.int64),
+                                           np.trunc(quantity * 0.5).astype(np.int64)))
+        suggested_quantity = np.where(recommendation == 'REDUCE_SIZE', reduced, quantity)
+        
+        result = np.empty(quantity.shape, dtype=RISK_BATCH_DTYPE)
+        result['risk_level'] = risk_level
+        result['risk_score'] = risk_score
+        result['risk_percentage'] = risk_percentage
+        result['warning_flags'] = warning_flags
+        result['recommendation'] = recommendation
+        result['suggested_quantity'] = suggested_quantity
+        result['max_safe_quantity'] = max_safe_quantity
+        result['position_value_pct'] = np.where(has_balance, position_value / safe_balance, 0.0)
+        return result
+    
+    def evaluate_entries_batch(self, position_sizer, entry_price, atr_value, signal_confidence,
+                               account_balance, is_long=True, symbol: str = "NIFTYBEES") -> np.ndarray:
+        """
+        Size and risk-check many candidate entries, as the bot's entry handler does
+        
+        Stops sit EXIT_ATR_MULTIPLES['stop_loss'] scaled ATRs from entry;
+        REDUCE_SIZE rows carry the reduced quantity. Returns ENTRY_BATCH_DTYPE.
+        """
+        from config.enhanced_settings import EXIT_ATR_MULTIPLES
+        
+        sizing = position_sizer.calculate_position_size_batch(
+            account_balance, entry_price, atr_value, signal_confidence, symbol)
+        entry_price = np.broadcast_to(np.asarray(entry_price, dtype=np.float64), sizing.shape)
+        is_long = np.broadcast_to(np.asarray(is_long, dtype=bool), sizing.shape)
+        
+        stop_distance = sizing['scaled_atr'] * EXIT_ATR_MULTIPLES['stop_loss']
+        stop_loss = np.where(is_long, entry_price - stop_distance, entry_price + stop_distance)
+        risk = self.assess_trade_risk_batch(entry_price, sizing['quantity'], stop_loss, account_balance)
+        
+        quantity = risk['suggested_quantity']
+        result = np.empty(sizing.shape, dtype=ENTRY_BATCH_DTYPE)
+        result['quantity'] = quantity
+        result['margin_required'] = quantity * (entry_price / sizing['leverage_used'])
+        result['risk_percentage'] = risk['risk_percentage']
+        result['risk_score'] = risk['risk_score']
+        result['recommendation'] = risk['recommendation']
+        result['stop_loss'] = stop_loss
+        result['scaled_atr'] = sizing['scaled_atr']
+        return result
+    
     def update_daily_pnl(self, pnl_change: float):
         """Update daily P&L tracking"""
         self.daily_pnl += pnl_change
+        self.realized_pnl += pnl_change
         logger.info(f"📊 Daily P&L updated: ₹{self.daily_pnl:.2f}")
         
     def update_drawdown(self, current_portfolio_value: float):
@@ -127,10 +264,13 @@ class EnhancedRiskManager:
         if current_portfolio_value > self.max_portfolio_value:
             self.max_portfolio_value = current_portfolio_value
             self.current_drawdown = 0
+            self._drawdown_warned = 0
         else:
             self.current_drawdown = (self.max_portfolio_value - current_portfolio_value) / self.max_portfolio_value
         
-        if self.current_drawdown > 0.05:  # Log significant drawdowns
+        level = int(self.current_drawdown * 100)
+        if self.current_drawdown > 0.05 and level > self._drawdown_warned:  # Log significant drawdowns
+            self._drawdown_warned = level
             logger.warning(f"📉 Current drawdown: {self.current_drawdown:.1%}")
     
     def increment_trade_count(self):
@@ -144,6 +284,31 @@ class EnhancedRiskManager:
         self.trade_count_today = 0
         logger.info("🔄 Daily risk counters reset")
     
+    def get_state(self) -> Dict[str, Any]:
+        """Counters that must survive a restart"""
+        return {
+            'daily_pnl': self.daily_pnl,
+            'realized_pnl': self.realized_pnl,
+            'trade_count_today': self.trade_count_today,
+            'max_portfolio_value': self.max_portfolio_value,
+            'current_drawdown': self.current_drawdown,
+            'trading_day': self.clock.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        }
+    
+    def restore_state(self, state: Dict[str, Any]):
+        """Restore counters saved by get_state (daily counters only for the same day)"""
+        self.max_portfolio_value = state.get('max_portfolio_value', self.max_portfolio_value)
+        self.realized_pnl = state.get('realized_pnl', self.realized_pnl)
+        self.current_drawdown = state.get('current_drawdown', self.current_drawdown)
+        
+        trading_day = state.get('trading_day')
+        if isinstance(trading_day, datetime) and trading_day.date() == self.clock.now().date():
+            self.daily_pnl = state.get('daily_pnl', 0)
+            self.trade_count_today = state.get('trade_count_today', 0)
+        
+        logger.info(f"♻️ Risk counters restored: {self.trade_count_today} trades today, "
+                    f"daily P&L ₹{self.daily_pnl:.2f}, drawdown {self.current_drawdown:.1%}")
+    
     def should_stop_trading(self) -> Tuple[bool, str]:
         """Check if trading should be stopped due to risk limits"""
         
@@ -152,7 +317,7 @@ class EnhancedRiskManager:
             return True, f"Daily loss limit exceeded: ₹{abs(self.daily_pnl):.2f}"
         
         # Max drawdown check
-        if self.current_drawdown > self.max_drawdown:
+        if self.drawdown_exceeded():
             return True, f"Maximum drawdown exceeded: {self.current_drawdown:.1%}"
         
         # Max trades per day check
@@ -161,14 +326,20 @@ class EnhancedRiskManager:
         
         return False, ""
     
+    def drawdown_exceeded(self) -> bool:
+        """The one stop that does not reset with the trading day"""
+        return self.current_drawdown > self.max_drawdown
+    
     def log_risk_event(self, event_type: str, details: str):
         """Log significant risk events"""
         risk_event = {
-            'timestamp': datetime.now(),
+            'timestamp': self.clock.now(),
             'event_type': event_type,
             'details': details,
             'daily_pnl': self.daily_pnl,
             'drawdown': self.current_drawdown
         }
         self.risk_events.append(risk_event)
+        if self.event_sink:
+            self.event_sink(risk_event)
         logger.warning(f"🚨 Risk Event: {event_type} - {details}")
\ No newline at end of file
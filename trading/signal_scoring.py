@@ -0,0 +1,302 @@
+# trading/signal_scoring.py
+
+from typing import Any, Dict, Iterator, List, Tuple
+
+import numpy as np
+
+# Bits of SCORE_DTYPE['confirmations'], in get_signal confirmation order
+CONFIRMATION_FLAGS = {
+    'SuperTrend Bullish': 1,
+    'SuperTrend Bearish': 2,
+    'RSI Oversold': 4,
+    'RSI Overbought': 8,
+    'RSI Bullish Zone': 16,
+    'RSI Bearish Zone': 32,
+    'MACD Bullish': 64,
+    'MACD Bearish': 128,
+    'High Volume Support': 256,
+    'Breaking High': 512,
+    'Breaking Low': 1024
+}
+
+# One row per scored bar from score_bars
+SCORE_DTYPE = np.dtype([
+    ('buy_score', np.int8),
+    ('sell_score', np.int8),
+    ('confirmations', np.uint16),
+    ('quality_score', np.float64)
+])
+
+# Signal codes from decide_signals
+SIGNAL_CODES = {1: 'BUY', -1: 'SELL', 0: 'HOLD'}
+
+
+def decode_confirmations(flags: int) -> List[str]:
+    """Confirmation labels set in a CONFIRMATION_FLAGS bitmask"""
+    flags = int(flags)
+    return [label for label, bit in CONFIRMATION_FLAGS.items() if flags & bit]
+
+
+class Confirmations:
+    """
+    Read-only list view of a confirmation bitmask
+
+    len() counts bits; labels are only built when iterated (logging,
+    reports), so scoring a bar never creates strings.
+    """
+
+    __slots__ = ('flags',)
+
+    def __init__(self, flags: int):
+        self.flags = int(flags)
+
+    def __len__(self) -> int:
+        return bin(self.flags).count('1')
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(decode_confirmations(self.flags))
+
+    def __getitem__(self, index):
+        return decode_confirmations(self.flags)[index]
+
+    def __contains__(self, label: str) -> bool:
+        return bool(self.flags & CONFIRMATION_FLAGS.get(label, 0))
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Confirmations):
+            return self.flags == other.flags
+        return list(self) == other
+
+    def __repr__(self) -> str:
+        return repr(decode_confirmations(self.flags))
+
+
+def bar_quality(rsi: float, volume_ratio: float, price: float, supertrend: float,
+                macd: float, macd_signal: float, confirmation_count: int) -> float:
+    """Signal quality score (0-1) of one bar; signal_quality is the array form"""
+    quality_score = 0
+    
+    # 1. RSI quality (2 points)
+    if rsi < 20 or rsi > 80:  # Extreme levels
+        quality_score += 2
+    elif rsi < 30 or rsi > 70:  # Strong levels
+        quality_score += 1
+    
+    # 2. Volume confirmation (2 points)
+    if volume_ratio > 2.5:  # Very high volume
+        quality_score += 2
+    elif volume_ratio > 2.0:
+        quality_score += 1.5
+    elif volume_ratio > 1.5:
+        quality_score += 1
+    
+    # 3. Trend alignment (3 points)
+    if price and supertrend:
+        trend_strength = abs(price - supertrend) / price
+        if trend_strength > 0.03:  # Very strong trend (>3%)
+            quality_score += 3
+        elif trend_strength > 0.02:  # Strong trend (>2%)
+            quality_score += 2
+        elif trend_strength > 0.01:  # Moderate trend (>1%)
+            quality_score += 1
+    
+    # 4. MACD confirmation (2 points)
+    histogram = macd - macd_signal
+    if abs(histogram) > 0:  # MACD has momentum
+        quality_score += 1
+        if (macd > macd_signal and histogram > 0) or (macd < macd_signal and histogram < 0):
+            quality_score += 1  # Aligned momentum
+    
+    # 5. Multiple confirmations bonus (1 point)
+    if confirmation_count >= 4:
+        quality_score += 1
+    
+    return min(1.0, quality_score / 10)  # Cap at 1.0
+
+
+def score_bar(close: float, supertrend: float, trend: float, rsi: float, macd: float, macd_signal: float,
+              volume: float, avg_volume: float, recent_high: float, recent_low: float,
+              config: Dict[str, Any]) -> Tuple[int, int, int, float]:
+    """
+    Score one bar: (buy_score, sell_score, confirmation flags, quality score)
+
+    The same rules as score_bars in plain Python - a single bar scores
+    faster this way than through ~100 numpy scalar operations.
+    """
+    oversold = config.get('rsi_oversold', 25)
+    overbought = config.get('rsi_overbought', 75)
+    buy_score = 0
+    sell_score = 0
+    flags = 0
+    
+    # 1. SuperTrend Analysis (Weight: 3)
+    if trend == 1 and close > supertrend:
+        buy_score += 3
+        flags |= CONFIRMATION_FLAGS['SuperTrend Bullish']
+    elif trend == -1 and close < supertrend:
+        sell_score += 3
+        flags |= CONFIRMATION_FLAGS['SuperTrend Bearish']
+    
+    # 2. RSI Analysis (Weight: 2)
+    if rsi < oversold:
+        buy_score += 2
+        flags |= CONFIRMATION_FLAGS['RSI Oversold']
+    elif rsi > overbought:
+        sell_score += 2
+        flags |= CONFIRMATION_FLAGS['RSI Overbought']
+    elif oversold < rsi < (oversold + 10):
+        buy_score += 1
+        flags |= CONFIRMATION_FLAGS['RSI Bullish Zone']
+    elif (overbought - 10) < rsi < overbought:
+        sell_score += 1
+        flags |= CONFIRMATION_FLAGS['RSI Bearish Zone']
+    
+    # 3. MACD Analysis (Weight: 2)
+    histogram = macd - macd_signal
+    if macd > macd_signal and histogram > 0:
+        buy_score += 2
+        flags |= CONFIRMATION_FLAGS['MACD Bullish']
+    elif macd < macd_signal and histogram < 0:
+        sell_score += 2
+        flags |= CONFIRMATION_FLAGS['MACD Bearish']
+    
+    # 4. Volume Analysis (Weight: 2) - high volume supports the leading side
+    volume_ratio = volume / avg_volume if avg_volume > 0 else 1
+    if not np.isnan(volume) and not np.isnan(avg_volume) and volume_ratio > config.get('volume_threshold', 2.0):
+        if buy_score > sell_score:
+            buy_score += 2
+            flags |= CONFIRMATION_FLAGS['High Volume Support']
+        elif sell_score > buy_score:
+            sell_score += 2
+            flags |= CONFIRMATION_FLAGS['High Volume Support']
+    
+    # 5. Price Action (Weight: 1)
+    if close > recent_high * 0.999:  # Near recent high
+        buy_score += 1
+        flags |= CONFIRMATION_FLAGS['Breaking High']
+    elif close < recent_low * 1.001:  # Near recent low
+        sell_score += 1
+        flags |= CONFIRMATION_FLAGS['Breaking Low']
+    
+    quality_score = bar_quality(rsi, volume_ratio, close, supertrend, macd, macd_signal, bin(flags).count('1'))
+    return buy_score, sell_score, flags, quality_score
+
+
+def signal_quality(rsi, volume_ratio, price, supertrend, macd, macd_signal, confirmation_count) -> np.ndarray:
+    """
+    Signal quality score (0-1) with bar_quality's weights
+
+    Arguments broadcast against each other; NaNs score nothing. Tiered
+    points are sums of nested threshold masks (rsi < 20 implies rsi < 30),
+    weighted as floats since bool + bool is a logical or.
+    """
+    rsi, volume_ratio, price, supertrend, macd, macd_signal = (
+        np.asarray(x, dtype=np.float64) for x in (rsi, volume_ratio, price, supertrend, macd, macd_signal))
+    histogram = macd - macd_signal
+    with np.errstate(divide='ignore', invalid='ignore'):
+        trend_strength = np.abs(price - supertrend) / price
+    trend_strength = np.where((price != 0) & (supertrend != 0), trend_strength, 0.0)
+
+    score = (
+        # 1. RSI quality (2 points)
+        1.0 * ((rsi < 20) | (rsi > 80)) + 1.0 * ((rsi < 30) | (rsi > 70))
+        # 2. Volume confirmation (2 points)
+        + 1.0 * (volume_ratio > 1.5) + 0.5 * (volume_ratio > 2.0) + 0.5 * (volume_ratio > 2.5)
+        # 3. Trend alignment (3 points)
+        + 1.0 * (trend_strength > 0.01) + 1.0 * (trend_strength > 0.02) + 1.0 * (trend_strength > 0.03)
+        # 4. MACD momentum (1 point) and alignment (1 point)
+        + 1.0 * (np.abs(histogram) > 0)
+        + 1.0 * (((macd > macd_signal) & (histogram > 0)) | ((macd < macd_signal) & (histogram < 0)))
+        # 5. Multiple confirmations bonus (1 point)
+        + 1.0 * (np.asarray(confirmation_count) >= 4)
+    )
+    return np.minimum(1.0, score / 10)
+
+
+def score_bars(close, supertrend, trend, rsi, macd, macd_signal, volume, avg_volume,
+               recent_high, recent_low, config: Dict[str, Any]) -> np.ndarray:
+    """
+    Score bars with get_signal's six-confirmation rules as array masks
+
+    Each argument is one value per bar (any broadcastable shape - a 2-D
+    instruments x bars stack works too); config carries the strategy's
+    rsi_oversold, rsi_overbought and volume_threshold. Returns SCORE_DTYPE
+    rows: buy/sell scores, the CONFIRMATION_FLAGS bitmask and the quality
+    score - row for row what score_bar gives. The regime filter is not
+    applied here.
+    """
+    close, supertrend, trend, rsi, macd, macd_signal, volume, avg_volume, recent_high, recent_low = (
+        np.asarray(x, dtype=np.float64)
+        for x in (close, supertrend, trend, rsi, macd, macd_signal, volume, avg_volume, recent_high, recent_low))
+    oversold = config.get('rsi_oversold', 25)
+    overbought = config.get('rsi_overbought', 75)
+
+    # 1. SuperTrend (weight 3)
+    st_bull = (trend == 1) & (close > supertrend)
+    st_bear = (trend == -1) & (close < supertrend)
+
+    # 2. RSI (weight 2 at the extremes, 1 in the zones) - first matching zone wins
+    rsi_oversold = rsi < oversold
+    rsi_overbought = (rsi > overbought) & ~rsi_oversold
+    rsi_bull_zone = (oversold < rsi) & (rsi < oversold + 10) & ~rsi_overbought
+    rsi_bear_zone = (overbought - 10 < rsi) & (rsi < overbought) & ~(rsi_oversold | rsi_bull_zone)
+
+    # 3. MACD (weight 2)
+    histogram = macd - macd_signal
+    macd_bull = (macd > macd_signal) & (histogram > 0)
+    macd_bear = (macd < macd_signal) & (histogram < 0)
+
+    buy_score = 3 * st_bull + 2 * rsi_oversold + rsi_bull_zone + 2 * macd_bull
+    sell_score = 3 * st_bear + 2 * rsi_overbought + rsi_bear_zone + 2 * macd_bear
+
+    # 4. High volume backs whichever side leads so far (weight 2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        volume_ratio = np.where(avg_volume > 0, volume / avg_volume, 1.0)
+    high_volume = ~np.isnan(volume) & ~np.isnan(avg_volume) & (volume_ratio > config.get('volume_threshold', 2.0))
+    volume_buy = high_volume & (buy_score > sell_score)
+    volume_sell = high_volume & (sell_score > buy_score)
+    volume_support = volume_buy | volume_sell
+
+    # 5. Price action against the last three bars' range (weight 1)
+    breaking_high = close > recent_high * 0.999
+    breaking_low = (close < recent_low * 1.001) & ~breaking_high
+
+    buy_score = buy_score + 2 * volume_buy + breaking_high
+    sell_score = sell_score + 2 * volume_sell + breaking_low
+
+    masks = (st_bull, st_bear, rsi_oversold, rsi_overbought, rsi_bull_zone, rsi_bear_zone,
+             macd_bull, macd_bear, volume_support, breaking_high, breaking_low)
+    flags = sum(mask * bit for mask, bit in zip(masks, CONFIRMATION_FLAGS.values()))
+    confirmation_count = sum(masks)
+
+    result = np.empty(np.shape(flags), dtype=SCORE_DTYPE)
+    result['buy_score'] = buy_score
+    result['sell_score'] = sell_score
+    result['confirmations'] = flags
+    result['quality_score'] = signal_quality(rsi, volume_ratio, close, supertrend, macd, macd_signal,
+                                             confirmation_count)
+    return result
+
+
+def decide_signals(scores: np.ndarray, min_confirmations: int, high_volatility=False) -> Dict[str, np.ndarray]:
+    """
+    get_signal's decision step over score_bars rows
+
+    Returns 'signal' (SIGNAL_CODES keys), 'confidence' and
+    'adjusted_min_confirmations' arrays shaped like scores.
+    """
+    buy = scores['buy_score'].astype(np.int64)
+    sell = scores['sell_score'].astype(np.int64)
+    quality = scores['quality_score']
+
+    # Quality- and regime-based adjustment of the confirmation threshold
+    adjusted = np.where(quality < 0.5, min_confirmations + 1,
+                        np.where(quality > 0.8, max(2, min_confirmations - 1), min_confirmations))
+    adjusted = adjusted + np.asarray(high_volatility, dtype=np.int64)
+
+    is_buy = (buy >= adjusted) & (buy > sell)
+    is_sell = ~is_buy & (sell >= adjusted) & (sell > buy)
+    signal = np.where(is_buy, 1, np.where(is_sell, -1, 0)).astype(np.int8)
+    leading = np.where(is_buy, buy, sell)
+    confidence = np.where(signal != 0, np.minimum(0.95, (leading / 12) * (1 + quality * 0.5)), 0.0)
+    return {'signal': signal, 'confidence': confidence, 'adjusted_min_confirmations': adjusted}
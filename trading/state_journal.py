@@ -0,0 +1,232 @@
+# trading/state_journal.py
+
+import json
+import os
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Keys holding datetimes that must round-trip through JSON
+DATETIME_KEYS = {'entry_time', 'exit_time', 'timestamp', 'trading_day'}
+
+
+def _encode(value: Any) -> Any:
+    """JSON fallback for datetimes and numpy/pandas scalars"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+
+def _decode(obj: Dict[str, Any]) -> Dict[str, Any]:
+    """json object_hook restoring datetime fields"""
+    for key in DATETIME_KEYS & obj.keys():
+        if isinstance(obj[key], str):
+            try:
+                obj[key] = datetime.fromisoformat(obj[key])
+            except ValueError:
+                pass
+    return obj
+
+
+class StateJournal:
+    """
+    Append-only write-ahead journal of live trading state
+
+    Every state change (position open/update/close, completed trade, risk
+    counters) is appended as one JSON line and fsynced before the bot moves
+    on. Periodic snapshots fold the journal into a single JSON document and
+    truncate it, so a restart reads one small snapshot plus a short tail.
+    The cached bar window is only written with snapshots.
+
+    Detail the bot no longer keeps in memory (completed trades, risk
+    events, closed-day summaries) goes to a separate append-only history
+    file that snapshots never truncate and recovery never reads.
+
+    Recovered state layout:
+        {'current_position': {...}, 'daily_trades': [...], 'total_pnl': float,
+         'risk': {...}, 'bar_window': {...}}
+    """
+
+    def __init__(self, profile: str, state_dir: Optional[str] = None, snapshot_interval: float = 300):
+        from config.settings import Settings
+
+        self.profile = profile
+        self.state_dir = Path(state_dir) if state_dir else Settings.STATE_DIR
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        self.journal_path = self.state_dir / f"{profile}_journal.jsonl"
+        self.snapshot_path = self.state_dir / f"{profile}_snapshot.json"
+        self.history_path = self.state_dir / f"{profile}_history.jsonl"
+        self.snapshot_interval = snapshot_interval
+
+        self.seq = 0
+        self.last_snapshot_time = time.monotonic()
+        self._journal_file = None
+        self._history_file = None
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    def _open_journal(self):
+        if self._journal_file is None:
+            self._journal_file = open(self.journal_path, 'a', encoding='utf-8')
+        return self._journal_file
+
+    def append(self, event_type: str, data: Any, sync: bool = True):
+        """Append one state change to the journal"""
+        self.seq += 1
+        record = {'seq': self.seq, 'ts': time.time(), 'type': event_type, 'data': data}
+
+        f = self._open_journal()
+        f.write(json.dumps(record, default=_encode) + '\n')
+        f.flush()
+        if sync:
+            os.fsync(f.fileno())
+
+    def record_position(self, position: Dict[str, Any]):
+        self.append('position', position)
+
+    def record_trade(self, trade: Dict[str, Any]):
+        self.append('trade', trade)
+
+    def record_risk(self, risk_state: Dict[str, Any]):
+        self.append('risk', risk_state)
+
+    def archive(self, event_type: str, data: Any, sync: bool = False):
+        """Append a record to the history file (kept across snapshots, never replayed)"""
+        if self._history_file is None:
+            self._history_file = open(self.history_path, 'a', encoding='utf-8')
+        record = {'ts': time.time(), 'type': event_type, 'data': data}
+        self._history_file.write(json.dumps(record, default=_encode) + '\n')
+        self._history_file.flush()
+        if sync:
+            os.fsync(self._history_file.fileno())
+
+    def snapshot(self, state: Dict[str, Any]):
+        """Write a full snapshot atomically and truncate the journal"""
+        document = {'seq': self.seq, 'saved_at': time.time(), 'profile': self.profile, 'state': state}
+
+        fd, tmp_name = tempfile.mkstemp(dir=self.state_dir, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(document, f, default=_encode)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_name, self.snapshot_path)
+
+        # Records up to self.seq now live in the snapshot; replay skips them
+        # even if we crash before the truncate below completes.
+        if self._journal_file is not None:
+            self._journal_file.close()
+            self._journal_file = None
+        open(self.journal_path, 'w').close()
+
+        self.last_snapshot_time = time.monotonic()
+        logger.debug(f"💾 State snapshot written (seq {self.seq})")
+
+    def snapshot_due(self) -> bool:
+        return time.monotonic() - self.last_snapshot_time >= self.snapshot_interval
+
+    def close(self):
+        if self._journal_file is not None:
+            self._journal_file.close()
+            self._journal_file = None
+        if self._history_file is not None:
+            self._history_file.close()
+            self._history_file = None
+
+    # ------------------------------------------------------------------
+    # Recovery
+    # ------------------------------------------------------------------
+
+    def load(self) -> Dict[str, Any]:
+        """Rebuild state from the last snapshot plus the journal tail"""
+        start = time.perf_counter()
+        state: Dict[str, Any] = {}
+        snapshot_seq = 0
+
+        if self.snapshot_path.exists():
+            try:
+                with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                    document = json.load(f, object_hook=_decode)
+                state = document.get('state', {})
+                snapshot_seq = document.get('seq', 0)
+            except Exception as e:
+                logger.error(f"❌ Unreadable state snapshot, ignoring: {e}")
+
+        replayed = 0
+        self.seq = snapshot_seq
+        if self.journal_path.exists():
+            # Byte offset just past the last complete record
+            good_end = 0
+            with open(self.journal_path, 'rb') as f:
+                for line in f:
+                    try:
+                        if not line.endswith(b'\n'):
+                            raise ValueError("unterminated record")
+                        record = json.loads(line, object_hook=_decode)
+                    except ValueError:
+                        # Torn final write from a crash - everything before it is intact
+                        logger.warning("⚠️ Ignoring partial journal record")
+                        break
+                    good_end += len(line)
+                    if record['seq'] <= snapshot_seq:
+                        continue
+                    self._apply(state, record)
+                    self.seq = record['seq']
+                    replayed += 1
+
+            # Cut the torn tail off, or the next append would be glued onto it
+            if good_end < self.journal_path.stat().st_size:
+                self.close()
+                os.truncate(self.journal_path, good_end)
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if state:
+            logger.info(f"♻️ Restored {self.profile} state: snapshot seq {snapshot_seq}, "
+                        f"{replayed} journal records ({elapsed_ms:.1f} ms)")
+        return state
+
+    def history(self, event_type: Optional[str] = None) -> Iterator[Any]:
+        """Archived records (data only), oldest first, optionally of one type"""
+        if self._history_file is not None:
+            self._history_file.flush()
+        if not self.history_path.exists():
+            return
+        with open(self.history_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line, object_hook=_decode)
+                except json.JSONDecodeError:
+                    break
+                if event_type is None or record['type'] == event_type:
+                    yield record['data']
+
+    @staticmethod
+    def _apply(state: Dict[str, Any], record: Dict[str, Any]):
+        event_type, data = record['type'], record['data']
+
+        if event_type == 'position':
+            state['current_position'] = data
+        elif event_type == 'trade':
+            state.setdefault('daily_trades', []).append(data)
+            state['total_pnl'] = state.get('total_pnl', 0) + data.get('pnl', 0)
+        elif event_type == 'risk':
+            state['risk'] = data
+
+    def reset(self):
+        """Discard all persisted state for this profile (the history file is kept)"""
+        self.close()
+        self.journal_path.unlink(missing_ok=True)
+        self.snapshot_path.unlink(missing_ok=True)
+        self.seq = 0
+        logger.info(f"🔄 State journal reset for {self.profile}")
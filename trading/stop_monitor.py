@@ -0,0 +1,213 @@
+# trading/stop_monitor.py
+
+import threading
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+from utils.clock import SYSTEM_CLOCK
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def exit_trigger(position: Dict[str, Any], price: float) -> Optional[str]:
+    """Protective level breached by price, if any (same order as the slow loop)"""
+    quantity = position.get('quantity', 0)
+    if quantity == 0 or not price:
+        return None
+
+    if quantity > 0:
+        if position.get('stop_loss') and price <= position['stop_loss']:
+            return "Stop Loss Hit"
+        if position.get('take_profit') and price >= position['take_profit']:
+            return "Take Profit Hit"
+        if position.get('trail_stop') and price <= position['trail_stop']:
+            return "Trailing Stop Hit"
+    else:
+        if position.get('stop_loss') and price >= position['stop_loss']:
+            return "Stop Loss Hit"
+        if position.get('take_profit') and price <= position['take_profit']:
+            return "Take Profit Hit"
+        if position.get('trail_stop') and price >= position['trail_stop']:
+            return "Trailing Stop Hit"
+    return None
+
+
+class LatencyTracker:
+    """Bounded sample of latencies in milliseconds with a budget"""
+
+    def __init__(self, budget_ms: float, max_samples: int = 1000):
+        self.budget_ms = budget_ms
+        self.samples = deque(maxlen=max_samples)
+        self.count = 0
+        self.over_budget = 0
+        self.max_ms = 0.0
+
+    def record(self, latency_ms: float) -> bool:
+        """Add a sample; returns False when it blew the budget"""
+        self.samples.append(latency_ms)
+        self.count += 1
+        self.max_ms = max(self.max_ms, latency_ms)
+        if latency_ms > self.budget_ms:
+            self.over_budget += 1
+            return False
+        return True
+
+    def summary(self) -> Dict[str, float]:
+        if not self.samples:
+            return {'count': 0}
+        ordered = sorted(self.samples)
+        return {
+            'count': self.count,
+            'last_ms': self.samples[-1],
+            'mean_ms': sum(ordered) / len(ordered),
+            'p95_ms': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+            'max_ms': self.max_ms,
+            'over_budget': self.over_budget,
+            'budget_ms': self.budget_ms
+        }
+
+
+class StopLossMonitor(threading.Thread):
+    """
+    Fast-path exit monitor decoupled from the indicator loop
+
+    The signal loop only runs every check_interval (up to 60s), so protective
+    exits are checked here against every new LTP instead. Prices arrive from
+    a tight quote poll, or from a tick feed calling on_tick() directly.
+
+    One monitor can watch several bots trading the same instrument. A breach
+    calls bot.execute_exit() under the bot's position_lock, so it never races
+    the slow loop. Two latencies are tracked against the budget: quote
+    round-trip and breach-to-exit-order. Every tick also marks open
+    positions to market, so drawdown tracking sees intrabar lows.
+
+    When a position has native exit orders at the exchange, a breach only
+    checks for their fill; the market-order fallback fires if the position
+    is still open native_grace_seconds after the breach.
+    """
+
+    def __init__(self, executor, instrument: str, poll_interval: float = 0.5,
+                 latency_budget_ms: float = 250, retry_seconds: float = 5.0,
+                 native_grace_seconds: float = 3.0, on_exit=None, clock=None):
+        super().__init__(name="StopLossMonitor", daemon=True)
+        self.executor = executor
+        self.instrument = instrument  # quote key, e.g. "NSE:2707457"
+        self.poll_interval = poll_interval
+        self.retry_seconds = retry_seconds
+        self.native_grace_seconds = native_grace_seconds
+        self.on_exit = on_exit  # called with the bot after a fast-path exit order
+        self.clock = clock or SYSTEM_CLOCK
+
+        self.bots: List[Any] = []
+        self.quote_latency = LatencyTracker(latency_budget_ms)
+        self.exit_latency = LatencyTracker(latency_budget_ms)
+        self.last_price: Optional[float] = None
+        self._last_attempt: Dict[int, float] = {}
+        self._breach_since: Dict[int, float] = {}
+        self._last_budget_warning = 0.0
+        self._stop_event = threading.Event()
+
+        logger.info(f"✅ Stop-loss monitor initialized ({poll_interval * 1000:.0f}ms poll, "
+                    f"{latency_budget_ms:.0f}ms budget)")
+
+    def register(self, bot):
+        self.bots.append(bot)
+
+    def run(self):
+        while not self._stop_event.is_set():
+            started = self.clock.monotonic()
+            if any(bot.current_position['quantity'] != 0 for bot in self.bots):
+                self.poll()
+            elapsed = self.clock.monotonic() - started
+            self._stop_event.wait(max(0.0, self.poll_interval - elapsed))
+
+    def poll(self):
+        """Fetch one LTP and evaluate it"""
+        sent = self.clock.monotonic()
+        try:
+            price = self.executor.get_latest_price(self.instrument)
+        except Exception as e:
+            logger.warning(f"⚠️ Stop monitor quote failed: {e}")
+            return
+        received = self.clock.monotonic()
+
+        if not self.quote_latency.record((received - sent) * 1000):
+            self._warn_budget(f"quote took {(received - sent) * 1000:.0f}ms")
+
+        if price:
+            self.on_tick(price, received)
+
+    def on_tick(self, price: float, received_at: Optional[float] = None):
+        """Evaluate every watched position against a new LTP"""
+        received_at = received_at or self.clock.monotonic()
+        self.last_price = price
+
+        for bot in self.bots:
+            # Mark only between position changes: mid-exit, realized P&L already holds the trade
+            # while the position is still open. A busy lock means the owner marks it anyway.
+            if bot.position_lock.acquire(blocking=False):
+                try:
+                    if bot.current_position['quantity']:
+                        bot.mark_to_market(price)
+                finally:
+                    bot.position_lock.release()
+            if exit_trigger(bot.current_position, price) is None:
+                self._breach_since.pop(id(bot), None)
+                continue
+            breached_at = self._breach_since.setdefault(id(bot), received_at)
+
+            # A failed exit order is retried, but not on every tick
+            if received_at - self._last_attempt.get(id(bot), 0.0) < self.retry_seconds:
+                continue
+
+            with bot.position_lock:
+                # Re-check under the lock: the slow loop may have exited already
+                reason = exit_trigger(bot.current_position, price)
+                if reason is None:
+                    continue
+
+                if bot.current_position.get('exit_orders'):
+                    # The exchange holds the stop - look for its fill before overriding it
+                    order_id = bot.sync_native_exits()
+                    if order_id:
+                        logger.info(f"⚡ [{bot.strategy_profile}] Native exit filled ({order_id})")
+                        self._notify_exit(bot)
+                        continue
+                    if received_at - breached_at < self.native_grace_seconds:
+                        continue
+                    logger.warning(f"⚠️ [{bot.strategy_profile}] Native exit still open "
+                                   f"{received_at - breached_at:.1f}s after breach - exiting at market")
+
+                self._last_attempt[id(bot)] = received_at
+                logger.warning(f"⚡ [{bot.strategy_profile}] {reason} at ₹{price:.2f} (fast path)")
+                bot.update_position_pnl(price)
+                order_id = bot.execute_exit(price, f"{reason} (fast path)")
+
+            if order_id:
+                latency_ms = (self.clock.monotonic() - breached_at) * 1000
+                if not self.exit_latency.record(latency_ms):
+                    self._warn_budget(f"breach to exit order took {latency_ms:.0f}ms")
+                logger.info(f"⏱️ Breach to exit order: {latency_ms:.0f}ms")
+                self._notify_exit(bot)
+
+    def _notify_exit(self, bot):
+        self._breach_since.pop(id(bot), None)
+        if self.on_exit:
+            self.on_exit(bot)
+
+    def _warn_budget(self, message: str):
+        # Slow quotes tend to come in bursts - keep the log readable
+        now = self.clock.monotonic()
+        if now - self._last_budget_warning >= 60:
+            self._last_budget_warning = now
+            logger.warning(f"⚠️ Stop monitor over latency budget: {message}")
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            'quote_latency': self.quote_latency.summary(),
+            'exit_latency': self.exit_latency.summary()
+        }
+
+    def stop(self):
+        self._stop_event.set()
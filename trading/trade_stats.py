@@ -0,0 +1,80 @@
+# trading/trade_stats.py
+
+from collections import deque
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+
+@dataclass
+class RunningTotals:
+    """Trade counters updated in O(1) per completed trade"""
+    trades: int = 0
+    wins: int = 0
+    pnl: float = 0.0
+    hold_hours: float = 0.0
+
+    def add(self, trade: Dict[str, Any]):
+        self.trades += 1
+        self.wins += trade['pnl'] > 0
+        self.pnl += trade['pnl']
+        self.hold_hours += trade.get('hold_time_hours', 0)
+
+    @property
+    def win_rate(self) -> float:
+        return self.wins / self.trades * 100 if self.trades else 0
+
+    @property
+    def avg_hold_hours(self) -> float:
+        return self.hold_hours / self.trades if self.trades else 0
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'trades': self.trades,
+            'wins': self.wins,
+            'win_rate': self.win_rate,
+            'pnl': self.pnl,
+            'avg_hold_hours': self.avg_hold_hours
+        }
+
+
+class TradeStats:
+    """
+    Bounded trade history with running daily and session statistics
+
+    Only the last max_recent trade records and max_days closed-day
+    summaries stay in memory; totals are running counters, so recording a
+    trade or reading the win rate never scans the history. The full detail
+    lives in the state journal's history file. roll() starts a new trading
+    day - callers decide when a day starts (the bot's clock).
+    """
+
+    def __init__(self, max_recent: int = 200, max_days: int = 30):
+        self.recent = deque(maxlen=max_recent)
+        self.days = deque(maxlen=max_days)
+        self.day: Optional[date] = None
+        self.today = RunningTotals()
+        self.session = RunningTotals()
+
+    def record(self, trade: Dict[str, Any]):
+        """Add a completed trade to today's and the session's totals"""
+        self.recent.append(trade)
+        self.today.add(trade)
+        self.session.add(trade)
+
+    def roll(self, day: date) -> Optional[Dict[str, Any]]:
+        """Start trading day `day`; returns the closed day's summary if it had trades"""
+        if day == self.day:
+            return None
+        closed = None
+        if self.day is not None and self.today.trades:
+            closed = {'day': self.day.isoformat(), **self.today.summary()}
+            self.days.append(closed)
+        self.day = day
+        self.today = RunningTotals()
+        return closed
+
+    def today_trades(self) -> List[Dict[str, Any]]:
+        """Today's trade records (the newest today.trades entries, if still held)"""
+        count = min(self.today.trades, len(self.recent))
+        return list(self.recent)[len(self.recent) - count:]
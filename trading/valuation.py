@@ -0,0 +1,41 @@
+# trading/valuation.py
+
+import threading
+from typing import Any, Dict, Optional
+
+
+class MarkToMarket:
+    """
+    Portfolio value from prices the bot already has, feeding drawdown tracking
+
+    Value = starting balance + realized P&L (kept by the risk manager, so it
+    survives restarts with the other risk counters) + the open position
+    marked at the latest price. Each mark is O(1) and hands the value to
+    risk_manager.update_drawdown, which keeps the high-water mark and the
+    drawdown should_stop_trading checks. Prices come from the trading
+    cycle's cached quote and the stop monitor's ticks - never a new broker call.
+    """
+
+    def __init__(self, risk_manager, starting_balance: float):
+        self.risk_manager = risk_manager
+        self.starting_balance = starting_balance
+        self.last_value: Optional[float] = None
+        self._lock = threading.Lock()  # marks arrive from the loop and the stop monitor
+
+    @staticmethod
+    def unrealized_pnl(position: Dict[str, Any], price: float) -> float:
+        quantity = position['quantity']
+        return (price - position['entry_price']) * quantity if quantity else 0.0
+
+    def mark(self, position: Dict[str, Any], price: float) -> float:
+        """
+        Value the book at price and update the high-water mark / drawdown
+
+        Callers hold the bot's position_lock, so realized P&L and the open
+        position are read from the same side of an exit.
+        """
+        with self._lock:
+            value = self.starting_balance + self.risk_manager.realized_pnl + self.unrealized_pnl(position, price)
+            self.risk_manager.update_drawdown(value)
+            self.last_value = value
+        return value
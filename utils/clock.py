@@ -0,0 +1,57 @@
+# utils/clock.py
+
+import threading
+import time
+from datetime import datetime, timedelta
+
+
+class SystemClock:
+    """Wall clock - what the live bot runs on"""
+
+    def now(self) -> datetime:
+        return datetime.now()
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+    def sleep(self, seconds: float):
+        if seconds > 0:
+            time.sleep(seconds)
+
+
+class SimulatedClock:
+    """
+    Clock that only moves when told to
+
+    sleep() advances it instantly instead of blocking, so code written
+    against the live clock runs as fast as it can compute. monotonic() is
+    the simulated time in epoch seconds, so intervals measured with it are
+    simulated intervals too.
+    """
+
+    def __init__(self, start: datetime):
+        self._now = start
+        self._lock = threading.Lock()
+
+    def now(self) -> datetime:
+        return self._now
+
+    def monotonic(self) -> float:
+        return self._now.timestamp()
+
+    def sleep(self, seconds: float):
+        if seconds > 0:
+            self.advance(seconds)
+
+    def advance(self, seconds: float):
+        with self._lock:
+            self._now += timedelta(seconds=seconds)
+
+    def set(self, moment: datetime):
+        """Jump forward to moment (never backwards)"""
+        with self._lock:
+            if moment > self._now:
+                self._now = moment
+
+
+SYSTEM_CLOCK = SystemClock()
@@ -2,31 +2,57 @@ import logging
 import sys
 from pathlib import Path
 
+_formatter = logging.Formatter(
+    '[%(asctime)s] %(levelname)s: %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+_file_handler = None
+
+class _DeferredFileHandler(logging.Handler):
+    """
+    Log file handler shared by every logger
+
+    Settings (and its .env loading), the logs directory and the file itself
+    are only touched when the first record is written, so importing a
+    module that creates a logger costs nothing.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._handler = None
+
+    def emit(self, record: logging.LogRecord):
+        if self._handler is None:
+            # Import here to avoid circular imports
+            from config.settings import Settings
+            Settings.ensure_directories()
+            self._handler = logging.FileHandler(Settings.LOG_FILE, delay=True)
+            self._handler.setFormatter(_formatter)
+        self._handler.emit(record)
+
+    def close(self):
+        if self._handler is not None:
+            self._handler.close()
+        super().close()
+
 def get_logger(name: str) -> logging.Logger:
     """Get configured logger"""
+    global _file_handler
     logger = logging.getLogger(name)
-    
+
     if logger.handlers:
         return logger
-    
+
     logger.setLevel(logging.INFO)
-    
-    # Create formatters
-    formatter = logging.Formatter(
-        '[%(asctime)s] %(levelname)s: %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-    
+
     # Console handler
     console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setFormatter(formatter)
+    console_handler.setFormatter(_formatter)
     logger.addHandler(console_handler)
-    
-    # File handler - import here to avoid circular imports
-    from config.settings import Settings
-    Settings.ensure_directories()
-    file_handler = logging.FileHandler(Settings.LOG_FILE)
-    file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
-    
+
+    # File handler - one per process, opened on first write
+    if _file_handler is None:
+        _file_handler = _DeferredFileHandler()
+    logger.addHandler(_file_handler)
+
     return logger